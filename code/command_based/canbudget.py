@@ -0,0 +1,142 @@
+"""
+Planning the CAN bus traffic from our SparkMax motor controllers.
+
+Each SparkMax sends its measurements to the roboRIO in "status frames", each
+frame carrying a few signals (see FRAMES), sent every so many milliseconds.
+Left alone, every SparkMax sends its frames at the default rates, whether or
+not we use them, and may send the encoder position less often than we read
+it.  With more motors, the bus can fill up, and then frames are delayed or
+lost.
+
+Instead, when setting up a motor, declare which signals the code reads and
+how often it needs them, before calling configure():
+
+    config = rev.SparkMaxConfig()
+    canbudget.request('elevator', config, primaryEncoderPosition=20, limits=20)
+    motor.configure(config, ...)
+
+request() sets each frame to the fastest rate any of its signals needs, and
+slows down status 0 (which every SparkMax always sends) if nothing needs it.
+It also keeps track of what every motor sends, so report() can estimate how
+busy the bus will be, and start() can compare that with what the roboRIO
+measures.  If the estimate is over BUDGET, request() prints a warning, so
+adding motors can't quietly saturate the bus.
+
+The estimate counts each frame as FRAME_BITS bits on a 1 Mbit/second bus,
+and adds one control frame per motor every CONTROL_PERIOD_MS from the
+roboRIO.  Other devices (power distribution, pneumatics) aren't counted, so
+the measured value will be somewhat higher.
+"""
+
+# Import WPILib and other robotics modules.
+import rev
+import wpilib
+
+# SparkMax status frames: (default period in ms, signals in the frame).  The
+# signal names are the ones in rev.SignalsConfig, without "PeriodMs".
+FRAMES = {
+    'status 0': (10, ('appliedOutput', 'busVoltage', 'outputCurrent', 'motorTemperature', 'limits')),
+    'status 1': (250, ('faults', 'warnings')),
+    'status 2': (20, ('primaryEncoderVelocity', 'primaryEncoderPosition')),
+    'status 3': (20, ('analogVoltage', 'analogVelocity', 'analogPosition')),
+    'status 4': (20, ('externalOrAltEncoderVelocity', 'externalOrAltEncoderPosition')),
+    'status 5': (20, ('absoluteEncoderPosition', 'absoluteEncoderVelocity')),
+    'status 6': (20, ('dutyCyclePeriod', 'unadjustedDutyCyclePeriod')),
+    'status 7': (20, ('IAccumulation',)),
+    'status 8': (20, ('setpoint', 'isAtSetpoint', 'selectedSlot')),
+    'status 9': (20, ('maxMotionSetpointPosition', 'maxMotionSetpointVelocity')),
+}
+ALWAYS_SENT = ('status 0', 'status 1') # Sent whether or not their signals are used.
+UNUSED_PERIOD_MS = 100 # Period for status 0 when none of its signals are requested.
+
+# Which frame each signal is in.
+SIGNAL_FRAMES = {signal: frame for (frame, (_, signals)) in FRAMES.items() for signal in signals}
+
+FRAME_BITS = 150          # An 8-byte extended CAN frame, about 131 bits plus stuff bits.
+BUS_BITS_PER_SECOND = 1000000
+CONTROL_PERIOD_MS = 20    # The roboRIO sends each motor its output about this often.
+BUDGET = 0.6              # Warn if the estimated bus utilization is over this fraction.
+
+# Every motor requested so far, {name: (number of motors, {frame: period ms})}.
+# Requesting a name again replaces it.
+_motors = {}
+
+def request(name: str, config: rev.SparkMaxConfig, count: int = 1, **periods_ms):
+    """
+    Declare the signals a motor (or several motors sharing a configuration)
+    needs, and set up config to send them that often.  Call before configure().
+    :param: name       what to call the motor(s) in report().  Names must be unique.
+    :param: config     the configuration to change.
+    :param: count      how many motors config will be applied to.
+    :param: periods_ms signal=period, in milliseconds, for each signal the code
+                       reads, using the names in FRAMES.  Leave out signals
+                       that are never read.
+    """
+    frame_periods = {}
+    for (signal, period) in periods_ms.items():
+        if signal not in SIGNAL_FRAMES:
+            raise ValueError('Unknown SparkMax signal {}; see canbudget.FRAMES'.format(signal))
+        frame = SIGNAL_FRAMES[signal]
+        frame_periods[frame] = min(period, frame_periods.get(frame, period))
+
+    # Frames are made up of signals; each gets its frame's period.  Setting
+    # one signal in each frame would do, but setting them all makes it clear
+    # in config.flatten() what was asked for.
+    for (frame, period) in frame_periods.items():
+        for signal in FRAMES[frame][1]:
+            _set_period(config, signal, period)
+        getattr(config.signals, FRAMES[frame][1][0] + 'AlwaysOn')(True)
+    if 'status 0' not in frame_periods:
+        for signal in FRAMES['status 0'][1]:
+            _set_period(config, signal, UNUSED_PERIOD_MS)
+        frame_periods['status 0'] = UNUSED_PERIOD_MS
+    for frame in ALWAYS_SENT:
+        frame_periods.setdefault(frame, FRAMES[frame][0])
+
+    _motors[name] = (count, frame_periods)
+    if estimate() > BUDGET:
+        print('Warning: estimated CAN bus utilization {:.0%} is over the budget of {:.0%}.'.format(estimate(), BUDGET))
+        print(report())
+
+def _set_period(config, signal, period):
+    # Most methods are the signal name plus "PeriodMs", but not quite all.
+    for method in (signal + 'PeriodMs', signal + 'Ms', signal):
+        if hasattr(config.signals, method):
+            getattr(config.signals, method)(int(period))
+            return
+
+def frames_per_second() -> float:
+    """:returns: estimated CAN frames per second from and to all requested motors."""
+    total = 0.0
+    for (count, frame_periods) in _motors.values():
+        total += count * (sum(1000.0 / period for period in frame_periods.values()) + 1000.0 / CONTROL_PERIOD_MS)
+    return total
+
+def estimate() -> float:
+    """:returns: estimated fraction of the CAN bus used, 0 to 1."""
+    return frames_per_second() * FRAME_BITS / BUS_BITS_PER_SECOND
+
+def measured() -> float:
+    """:returns: fraction of the CAN bus used, measured by the roboRIO, 0 to 1."""
+    return wpilib.RobotController.getCANStatus().percentBusUtilization
+
+def report() -> str:
+    """:returns: a printable table of what each motor sends, and the totals."""
+    lines = []
+    for (name, (count, frame_periods)) in _motors.items():
+        frames = ', '.join('{} {}ms'.format(frame, period) for (frame, period) in sorted(frame_periods.items()))
+        per_motor = sum(1000.0 / period for period in frame_periods.values()) + 1000.0 / CONTROL_PERIOD_MS
+        lines.append('{:12s} x{}  {:5.0f} frames/s each: {}'.format(name, count, per_motor, frames))
+    lines.append('CAN estimate {:.0%} of the bus ({:.0f} frames/s), measured {:.0%}'.format(
+        estimate(), frames_per_second(), measured()))
+    return '\n'.join(lines)
+
+def publish():
+    """Send the estimated and measured utilization to the dashboard.  start() schedules this."""
+    wpilib.SmartDashboard.putNumber('CAN/estimated', estimate())
+    wpilib.SmartDashboard.putNumber('CAN/measured', measured())
+
+def start(robot: wpilib.TimedRobot, period: float = 1.0):
+    """Print report() and schedule publish() every period seconds.  Call from robotInit()."""
+    print(report())
+    robot.addPeriodic(publish, period, 0.005)
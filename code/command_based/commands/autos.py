@@ -7,6 +7,7 @@ from constants.fieldconstants import Positions
 from commands.elevatorcommands import ElevatorCommands
 from constants.elevatorconstants import ElevatorConsts
 import subsystems.elevatorsubsystem
+import trajectories
 
 class Autos:
     """Class to hold autonomous command factories"""
@@ -18,20 +19,20 @@ class Autos:
     def side_step(drive: subsystems.drivesubsystem.DriveSubsystem):
         """Autonomous routine that drives forward, waits, then moves left."""
         return commands2.cmd.sequence(
-            DriveCommands.drive_goal(Positions.AWAY, drive),
+            DriveCommands.follow_trajectory(trajectories.get((Positions.HOME, Positions.AWAY)), drive),
             DriveCommands.drive_idle_wait(5.0, drive),
-            DriveCommands.drive_goal(Positions.SIDE, drive)
+            DriveCommands.follow_trajectory(trajectories.get((Positions.AWAY, Positions.SIDE)), drive)
         )
     
     def forward(drive: subsystems.drivesubsystem.DriveSubsystem):
         """Autonomous routine that drives forward"""
         return commands2.cmd.sequence(
-            DriveCommands.drive_goal(Positions.AWAY, drive)
+            DriveCommands.follow_trajectory(trajectories.get((Positions.HOME, Positions.AWAY)), drive)
         )
     def forward_elevator(drive: subsystems.drivesubsystem.DriveSubsystem, elevator: subsystems.elevatorsubsystem.ElevatorSubsystem):
         return commands2.cmd.parallel(
             ElevatorCommands.move_goal(ElevatorConsts.MID, elevator),
-            DriveCommands.drive_goal(Positions.AWAY, drive)
+            DriveCommands.follow_trajectory(trajectories.get((Positions.HOME, Positions.AWAY)), drive)
         )
            
         
\ No newline at end of file
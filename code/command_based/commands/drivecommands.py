@@ -1,7 +1,15 @@
+import math
+
+import commands2
 import commands2.cmd
+import wpilib
+import wpimath
 import wpimath.geometry
+import wpimath.kinematics
 
 import subsystems.drivesubsystem
+import trajectories
+from constants.driveconstants import DriveConsts
 
 class DriveCommands:
     """Container for drive command factories."""
@@ -34,6 +42,16 @@ class DriveCommands:
             drive
         )
 
+    @staticmethod
+    def follow_trajectory(trajectory: trajectories.HolonomicTrajectory, drive: subsystems.drivesubsystem.DriveSubsystem):
+        """
+        A command that drives the robot along a planned trajectory, and ends
+        when the trajectory's time is up.
+        :param: trajectory The trajectory to follow, from trajectories.get().
+        :param: drive      The drive subsystem to operate on.
+        """
+        return FollowTrajectory(trajectory, drive)
+
     @staticmethod
     def drive_idle_wait(delay_seconds: float, drive: subsystems.drivesubsystem.DriveSubsystem):
         """
@@ -51,4 +69,52 @@ class DriveCommands:
             commands2.cmd.RunCommand(
                 lambda: drive.drive_field_relative(0.0, 0.0, 0.0)
             )
-        )
\ No newline at end of file
+        )
+
+
+class FollowTrajectory(commands2.Command):
+    """
+    Follows a HolonomicTrajectory (see trajectories.py).
+
+    Each loop, the planned velocity at that moment is sent straight to the
+    drive (feedforward, see TRAJ_LEAD), and any error between where the robot is and where
+    it was planned to be is corrected by a proportional term on each of x, y,
+    and heading.  The feedforward does most of the work, so the three axes
+    move together and arrive together, rather than each closing its own gap
+    at its own pace.  The command ends when the trajectory's time is up.
+    """
+
+    def __init__(self, trajectory, drive):
+        super().__init__()
+        self.trajectory = trajectory
+        self.drive = drive
+        self.timer = wpilib.Timer()
+        self.addRequirements(drive)
+
+    def initialize(self):
+        self.timer.restart()
+
+    def execute(self):
+        t = self.timer.get()
+        (x, y, heading, _, _, _) = self.trajectory.sample(t)
+        # The wheels take a moment to reach a new speed, so ask for the
+        # velocity planned a little ahead (like adding acceleration * lag).
+        (_, _, _, vx, vy, omega) = self.trajectory.sample(t + DriveConsts.TRAJ_LEAD)
+        pose = self.drive.pose
+
+        # Field-relative velocity: planned, plus a correction toward the plan.
+        vx += DriveConsts.TRAJ_KP * (x - pose.X())
+        vy += DriveConsts.TRAJ_KP * (y - pose.Y())
+        heading_error = wpimath.inputModulus(heading - pose.rotation().degrees(), -180, 180)
+        omega += DriveConsts.TRAJ_ROT_KP * heading_error
+
+        # The drive wants it relative to the robot, with rotation in radians.
+        speeds = wpimath.kinematics.ChassisSpeeds.fromFieldRelativeSpeeds(
+            vx, vy, math.radians(omega), pose.rotation())
+        self.drive.drive_chassis_speeds(speeds)
+
+    def end(self, interrupted: bool):
+        self.drive.drive_field_relative(0.0, 0.0, 0.0)
+
+    def isFinished(self) -> bool:
+        return self.timer.hasElapsed(self.trajectory.duration)
@@ -0,0 +1,102 @@
+import commands2
+import wpilib
+import wpimath
+from wpimath.controller import PIDController
+
+import subsystems.drivesubsystem
+import subsystems.visionsubsystem
+from constants.visionconstants import VisionConsts
+
+class VisionCommands:
+    """Container for vision-guided command factories."""
+
+    def __init__(self):
+        raise Exception("This is a utility class, don't make instances of it.")
+
+    @staticmethod
+    def aim_at_target(drive: subsystems.drivesubsystem.DriveSubsystem,
+                      vision: subsystems.visionsubsystem.VisionSubsystem,
+                      forward=lambda: 0.0, left=lambda: 0.0, strafe: bool = False):
+        """
+        A command that turns (or strafes) the robot to face the vision target,
+        while the driver keeps control of translation.  Runs until interrupted.
+        :param: drive   The drive subsystem to operate on.
+        :param: vision  The vision subsystem to get targets from.
+        :param: forward Function returning the driver's forward command (-1 to 1).
+        :param: left    Function returning the driver's left command (-1 to 1).
+        :param: strafe  If True, slide sideways to center the target instead of turning.
+                        forward and left are then relative to the robot, not the field.
+        """
+        return AimAtTarget(drive, vision, forward, left, strafe)
+
+
+class AimAtTarget(commands2.Command):
+    """
+    Closes a loop on the bearing to the vision target.
+
+    Vision frames arrive at camera rate (up to 60/second), a bit after they
+    were taken, and don't line up with the 50/second command loop.  So the
+    setpoint is only recomputed when a new frame arrives: the bearing in the
+    frame is added to the heading the robot had when the frame was taken,
+    giving a heading on the field to turn to.  Between frames, that field
+    heading stays put while the robot turns, which extrapolates the bearing
+    without waiting for the camera.
+    """
+
+    def __init__(self, drive, vision, forward, left, strafe):
+        super().__init__()
+        self.drive = drive
+        self.vision = vision
+        self.forward = forward
+        self.left = left
+        self.strafe = strafe
+
+        # Rotation controller works in degrees, like the drive subsystem's.
+        self.rot_controller = PIDController(VisionConsts.AIM_KP, 0, 0)
+        self.rot_controller.enableContinuousInput(-180, 180)
+        self.rot_controller.setTolerance(VisionConsts.AIM_TOL)
+
+        # Only the drive is required.  Reading vision frames doesn't interfere
+        # with anything else using the camera.
+        self.addRequirements(drive)
+
+    def initialize(self):
+        self.last_sequence = -1      # Process whatever frame is there now.
+        self.goal_heading = None     # Field heading to face, in degrees.
+        self.bearing = 0.0           # Latest bearing, for strafing.
+        self.seen_time = 0.0         # When the target was last seen.
+
+    def execute(self):
+        # Only recompute the setpoint when there is a new frame.
+        frame = self.vision.get_latest()
+        if frame.sequence != self.last_sequence:
+            self.last_sequence = frame.sequence
+            if frame.has_target:
+                heading = self.drive.get_heading_at(frame.timestamp).degrees()
+                self.goal_heading = wpimath.inputModulus(heading + frame.bearing, -180, 180)
+                self.bearing = frame.bearing
+                self.seen_time = frame.timestamp
+
+        # Stop correcting if the target has been lost for a while.
+        lost = self.goal_heading is None or \
+            wpilib.Timer.getFPGATimestamp() - self.seen_time > VisionConsts.TARGET_TIMEOUT
+
+        if self.strafe:
+            # Strafing doesn't change the heading, so hold the latest bearing until the next frame.
+            slide = 0.0 if lost else subsystems.drivesubsystem.clamp(
+                VisionConsts.STRAFE_KP * self.bearing, -VisionConsts.STRAFE_MAX, VisionConsts.STRAFE_MAX)
+            self.drive.drive_robot_relative(self.forward(), self.left() + slide, 0.0)
+        else:
+            rot = 0.0
+            if not lost:
+                rot = self.rot_controller.calculate(self.drive.get_heading_continuous_degrees(), self.goal_heading)
+                rot = subsystems.drivesubsystem.clamp(rot, -VisionConsts.AIM_MAX_ROT, VisionConsts.AIM_MAX_ROT)
+                if self.rot_controller.atSetpoint():
+                    rot = 0.0
+            self.drive.drive_field_relative(self.forward(), self.left(), rot)
+
+    def end(self, interrupted):
+        self.drive.drive_field_relative(0.0, 0.0, 0.0)
+
+    def isFinished(self):
+        return False # Run until the button is released or something else needs the drive.
@@ -31,6 +31,11 @@ class DriveConsts:
     # RPM_TO_INCHES_S = sqrt(2) * (wheel circumference) / (gear ratio) / (60 seconds/minute)
     RPM_TO_INCHES_S = 1.414 * math.pi * WHEEL_DIA / GEAR_RATIO / 60
 
+    # Wheel rim speed at full motor output, from the NEO's free speed of 5676 RPM.
+    MAX_WHEEL_SPEED: float = 5676 * RPM_TO_INCHES_S # inches/second
+    # How far a wheel's rim moves per radian the robot turns (in the kinematics).
+    TURN_RADIUS: float = TRACK_HALF_WIDTH + WHEELBASE_HALF_LENGTH # inches
+
     # PID controller constants (gains)
     # Proportional constant only at the moment, all others assumed zero.
     # For X and Y, 1 meter error results in a motor command of 1.0 (full voltage).
@@ -51,3 +56,24 @@ class DriveConsts:
     ROT_MAX_A: float = 20.0  # Rotational maximum acceleration in degrees/second/second
     ROT_POS_TOL: float = 5.0 # Rotational position tolerance in degrees
     ROT_VEL_TOL: float = 1.0 # Rotational velocity tolerance in degrees/second
+
+    # Trajectory following (see commands/drivecommands.py).  The planned
+    # velocity is sent straight to the drive, and these correct the error.
+    TRAJ_KP: float = 3.0     # Inches/second per inch of position error
+    TRAJ_ROT_KP: float = 3.0 # Degrees/second per degree of heading error
+    TRAJ_LEAD: float = 0.15  # Seconds ahead to take the planned velocity from, about the wheels' response time
+
+    # How many seconds of pose history to keep, for matching up with vision frames.
+    HISTORY_TIME: float = 1.5
+
+    # Odometry.  With FAST_ODOMETRY, odometry runs on its own thread every
+    # ODOMETRY_PERIOD seconds (200 Hz), rather than once per 20 msec loop.
+    # The SparkMaxes are asked to send their positions that often too.
+    FAST_ODOMETRY: bool = True
+    ODOMETRY_PERIOD: float = 0.005
+    ENCODER_POSITION_PERIOD_MS: int = 5
+
+    # Simulation physics model (see subsystems/drivesim.py).
+    SIM_STEP: float = 0.005                            # Fixed model time step, seconds
+    SIM_MAX_WHEEL_SPEED: float = MAX_WHEEL_SPEED        # Rim speed at full output, inches/second
+    SIM_TIME_CONSTANT: float = 0.15                    # Seconds for wheel speed to get 63% of the way to its target
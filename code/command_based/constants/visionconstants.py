@@ -0,0 +1,59 @@
+"""
+Module of constants related to the Pixy2 camera and vision-guided driving.
+Units are inches, seconds, and degrees unless otherwise noted.
+"""
+from dataclasses import dataclass
+from wpimath.geometry import Translation2d
+
+@dataclass(frozen=True)
+class VisionConsts:
+    """Vision related constants"""
+    # Pixy2 connection: 4 is the MXP connector's SPI (see Pixy2.__init__()).
+    SPI_PORT: int = 4
+
+    # Which color connected components to ask for.
+    SIGMAP: int = 0x01   # Signature 1 only
+    MAX_BLOCKS: int = 10
+
+    # Camera geometry.  Pixy2's field of view is 60 degrees horizontal, 40 vertical.
+    FRAME_WIDTH: int = 316  # pixels
+    FRAME_HEIGHT: int = 208 # pixels
+    HORIZ_FOV: float = 60.0
+    VERT_FOV: float = 40.0
+
+    # Frame timing.
+    LATENCY: float = 0.02       # Approximate time from exposure to getting the blocks.
+    BUSY_SLEEP: float = 0.005   # How long the reader thread waits when Pixy2 has no new frame.
+    ERROR_SLEEP: float = 0.1    # How long the reader thread waits after a communication error.
+    TARGET_TIMEOUT: float = 0.5 # Stop aiming if the target hasn't been seen for this long.
+
+    # Target selection: the largest block at least this many times taller than it is wide.
+    MIN_ASPECT: float = 2.0
+    TARGET_HEIGHT: float = 12.0 # Height of the real target in inches, for estimating range.
+
+    # Aiming controller.  Like the drive PIDs, 90 degrees of error => full rotation command.
+    AIM_KP: float = 1.0/90.0
+    AIM_MAX_ROT: float = 0.5     # Largest rotation command (-1 to 1 scale).
+    AIM_TOL: float = 2.0         # Degrees; close enough to stop turning.
+    STRAFE_KP: float = 1.0/30.0  # Strafe command per degree of bearing.
+    STRAFE_MAX: float = 0.3
+
+    # Where the target is on the field, for working out the robot's position
+    # from it (see subsystems/poseestimatorsubsystem.py).
+    TARGET_POSITION = Translation2d(120.0, 24.0)
+
+    # Where the simulated target sits on the field.
+    SIM_TARGET = TARGET_POSITION
+
+    # Pose estimation.  Standard deviations say how far off (one sigma) each
+    # source tends to be: bigger means trusted less.  Inches and radians.
+    ODOMETRY_STD_XY: float = 2.0      # Odometry, which drifts as the robot drives.
+    ODOMETRY_STD_HEADING: float = 0.02
+    VISION_STD_MIN: float = 2.0       # Vision position at close range.
+    VISION_PIXEL_STD: float = 1.0     # Error in the target's height in pixels, which grows with range.
+    VISION_STD_HEADING: float = 1e6   # Vision doesn't measure heading (it uses the gyro's), so ignore it.
+    VISION_MAX_DISTANCE: float = 240.0 # Don't use targets farther away than this.
+    VISION_MAX_TURN_RATE: float = 90.0 # Degrees/second; above this, frames are blurred and timing matters too much.
+    VISION_GATE_SIGMAS: float = 4.0    # Reject measurements more than this many standard deviations off,
+    VISION_GATE_MIN: float = 12.0      # but never reject ones within this many inches.
+    VISION_MAX_REJECTS: int = 10       # After this many rejections in a row, trust vision again.
@@ -0,0 +1,61 @@
+"""
+Configuring SparkMax motor controllers quickly at boot.
+
+Resetting a SparkMax's parameters and saving ("persisting") new ones to its
+flash memory takes a noticeable time for each controller, and flash only
+lasts so many writes.  But the configuration almost never changes between
+boots, and a SparkMax keeps its saved parameters through power cycles.
+
+So configure() makes a fingerprint (a short hash) of the configuration and
+compares it with the one saved in wpilib.Preferences (which the roboRIO
+keeps across reboots) for that CAN ID:
+
+* Different, or none saved: reset, apply, and persist, as before, then save
+  the new fingerprint.
+* The same: the controller already has this configuration saved, so
+  reset and apply it without persisting, which is fast.  Resetting first
+  means the controller ends up with exactly this configuration, whatever
+  was in it before.
+
+If a controller is swapped for a new one with the same CAN ID, the new one
+won't have the configuration saved.  It still gets exactly this
+configuration every boot, but to save it to flash too, delete its
+"MotorConfig/<CAN ID>" preference (for instance in Glass or OutlineViewer,
+under Preferences), or call forget().
+"""
+
+# Import standard Python modules.
+import hashlib
+
+# Import WPILib and other robotics modules.
+import rev
+import wpilib
+
+PREFIX = 'MotorConfig/'
+
+def fingerprint(config: rev.SparkMaxConfig) -> str:
+    """:returns: a short hash of everything in config."""
+    return hashlib.sha1(config.flatten().encode()).hexdigest()[:16]
+
+def configure(motor: rev.SparkMax, config: rev.SparkMaxConfig) -> rev.REVLibError:
+    """
+    Reset motor and apply config, only persisting it if it changed.
+    Use instead of motor.configure(config, kResetSafeParameters, kPersistParameters).
+    :returns: the result of motor.configure().
+    """
+    key = PREFIX + str(motor.getDeviceId())
+    new_fingerprint = fingerprint(config)
+    if wpilib.Preferences.getString(key, '') == new_fingerprint:
+        return motor.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kNoPersistParameters)
+
+    result = motor.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+    if result == rev.REVLibError.kOk:
+        wpilib.Preferences.setString(key, new_fingerprint)
+    else:
+        # Try again next boot.
+        wpilib.Preferences.remove(key)
+    return result
+
+def forget(can_id: int):
+    """Make the next configure() for can_id reset and persist, whatever the fingerprint."""
+    wpilib.Preferences.remove(PREFIX + str(can_id))
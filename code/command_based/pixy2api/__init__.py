@@ -0,0 +1,5 @@
+"""
+A copy of ../pixyvision/pixy2api, which is where changes should be made.
+It is copied because robotpy deploys only this project's folder.  Keep them
+the same; tests/vision_test.py checks that they are.
+"""
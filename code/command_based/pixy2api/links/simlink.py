@@ -0,0 +1,120 @@
+# !/usr/bin/env python3
+"""
+    Python port of the Pixy2 FRC Java library, which was ported from Pixy2 Arduino.
+
+    Simulated link that emulates a Pixy2 running the color connected components program,
+    so that code using Pixy2 can run in simulation without a camera.
+"""
+import struct
+import wpilib
+import pixy2api.links.link
+
+class SimLink(pixy2api.links.link.Link):
+    """Link that answers Pixy2 requests itself, using the same packet protocol as the real camera.
+    Responses use checksum packets, so the checksum code in Pixy2 is exercised as well."""
+    FRAME_WIDTH = 316
+    FRAME_HEIGHT = 208
+    FRAMES_PER_SECOND = 60
+
+    def __init__(self, link_arg = 0):
+        """:param link_arg is ignored; it is here to match the other links."""
+        # Callable that returns a list of (signature, x, y, width, height) tuples, largest first.
+        self.block_source = None
+        self.response = bytearray() # Bytes waiting to be received by Pixy2.
+        self.read_pos = 0
+        self.last_frame_time = None # Simulated time that the last frame was returned.
+        self.frame_age = 0          # Number of frames in a row that have had blocks.
+        # State that commands would change on a real Pixy2.
+        self.brightness = 128
+        self.lamp = (0, 0)
+        self.led = (0, 0, 0)
+
+    def setBlockSource(self, source):
+        """Set where simulated blocks come from.
+        :param source - a callable with no arguments that returns a list of (signature, x, y, width, height)
+                        tuples, largest first, or None for no blocks."""
+        self.block_source = source
+
+    def receive(self, buf, chksum = None):
+        """Fills the buffer with the next bytes of the pending response.
+        :param buf    Byte buffer to fill with return value.
+        :param chksum An optional Checksum object.  Without it, there will be no checking.
+
+        :returns length of value read, or -1 if there is not enough response left."""
+        if chksum is not None:
+            chksum.reset()
+        n = len(buf)
+        if self.read_pos + n > len(self.response):
+            return -1
+        buf[:] = self.response[self.read_pos:self.read_pos + n]
+        self.read_pos += n
+        if chksum is not None:
+            for ch in buf:
+                chksum.update(ch & 0xFF)
+        return n
+
+    def send(self, buf):
+        """Interprets a request packet and prepares the response.
+        :param buf    Byte buffer to send (sends all bytes in the buffer).
+
+        :returns length of bytes sent."""
+        packet_type = buf[2]
+        length = buf[3]
+        payload = bytes(buf[4:4 + length])
+
+        if packet_type == 0x0e:   # Version
+            self._respond(0x0f, struct.pack('<HBBH10s', 0x2201, 3, 0, 0, b'sim'))
+        elif packet_type == 0x0c: # Resolution
+            self._respond(0x0d, struct.pack('<HH', SimLink.FRAME_WIDTH, SimLink.FRAME_HEIGHT))
+        elif packet_type == 0x20: # CCC blocks
+            self._respond_blocks(payload[0], payload[1])
+        elif packet_type == 0x10: # Brightness
+            self.brightness = payload[0]
+            self._respond_result(0)
+        elif packet_type == 0x14: # LED
+            self.led = (payload[0], payload[1], payload[2])
+            self._respond_result(0)
+        elif packet_type == 0x16: # Lamp
+            self.lamp = (payload[0], payload[1])
+            self._respond_result(0)
+        elif packet_type == 0x18: # FPS
+            self._respond_result(SimLink.FRAMES_PER_SECOND)
+        else:
+            self._respond_error(-1)
+        return len(buf)
+
+    def _respond_blocks(self, sigmap, max_blocks):
+        """Respond with the present blocks, or busy if a new frame isn't ready yet."""
+        now = wpilib.Timer.getFPGATimestamp()
+        if self.last_frame_time is not None and now - self.last_frame_time < 1.0 / SimLink.FRAMES_PER_SECOND:
+            self._respond_error(-2) # Busy
+            return
+        self.last_frame_time = now
+
+        blocks = self.block_source() if self.block_source is not None else None
+        data = bytearray()
+        if blocks:
+            self.frame_age = min(self.frame_age + 1, 255)
+            count = 0
+            for (index, (signature, x, y, width, height)) in enumerate(blocks):
+                if count >= max_blocks:
+                    break
+                if signature <= 7 and not (sigmap & (1 << (signature - 1))):
+                    continue
+                data += struct.pack('<HHHHHhBB', signature, int(x), int(y), int(width), int(height), 0, index, self.frame_age)
+                count += 1
+        else:
+            self.frame_age = 0
+        self._respond(0x21, data)
+
+    def _respond_result(self, result):
+        self._respond(0x01, struct.pack('<i', result))
+
+    def _respond_error(self, error):
+        self._respond(0x03, struct.pack('<i', error))
+
+    def _respond(self, packet_type, payload):
+        """Queue a checksum packet for receive()."""
+        checksum = sum(payload) & 0xFFFF
+        self.response = bytearray(struct.pack('<HBBH', 0xc1af, packet_type, len(payload), checksum)) + payload
+        self.read_pos = 0
@@ -0,0 +1,332 @@
+# !/usr/bin/env python3
+"""
+    Python port of the Pixy2 FRC Java library, which was ported from Pixy2 Arduino.
+    Interfaces with the Pixy2 over any provided, compatible link.
+
+    Java port by PseudoResonance (Josh Otake), https://github.com/PseudoResonance/Pixy2JavaAPI
+
+ *         ORIGINAL HEADER -
+ *         https://github.com/charmedlabs/pixy2/blob/master/src/host/arduino/libraries/Pixy2/TPixy2.h
+ *         ==========================================================================================
+ *         begin license header
+ *
+ *         This file is part of Pixy CMUcam5 or "Pixy" for short
+ *
+ *         All Pixy source code is provided under the terms of the GNU General
+ *         Public License v2 (http://www.gnu.org/licenses/gpl-2.0.html). Those
+ *         wishing to use Pixy source code, software and/or technologies under
+ *         different licensing terms should contact us at cmucam@cs.cmu.edu.
+ *         Such licensing terms are available for all portions of the Pixy
+ *         codebase presented here.
+ *
+ *         end license header
+ *
+ *         Class to interact with the Color Connected Components algorithm on the Pixy2.
+
+"""
+
+import time
+import pixy2api.pixy2
+
+
+class Pixy2CCC(object):
+    """Color Connected Components Class."""
+    # Define some helpful constants.
+    CCC_MAX_SIGNATURE = 7
+    CCC_RESPONSE_BLOCKS = 0x21 # Byte in response to request for blocks. TODO: verify these comments are accurate.
+    CCC_REQUEST_BLOCKS = 0x20  # Byte used in request for blocks.
+    CCC_BLOCK_SIZE = 14        # Number of bytes per block in a response.
+
+    # Defines for sigmap:
+    # You can bitwise OR these together to make a custom sigmap.
+    # Sigmaps tell Pixy2 which of the signatures (pre-defined colors)
+    # to look for in the image.
+    # For example, if you are only interested in receiving blocks with
+    # signatures 1 and 5, you could use a sigmap of Pixy2CCC.CCC_SIG1 | Pixy2CCC.CCC_SIG5
+    # TODO: suggest to Java author update to above comment.  He has "PIXY_SIG1", but the code is "CCC_SIG1".
+    CCC_SIG1 = 0x01
+    CCC_SIG2 = 0x02
+    CCC_SIG3 = 0x04
+    CCC_SIG4 = 0x08
+    CCC_SIG5 = 0x10
+    CCC_SIG6 = 0x20
+    CCC_SIG7 = 0x40
+    CCC_COLOR_CODES = 0x80
+
+    CCC_SIG_ALL = 0xFF # All bits or 'ed together
+
+    def __init__(self, pixy):
+        """Constructs Pixy2 Color Connected Components tracker.
+        :param pixy - parent Pixy2 object that holds this Pixy2CCC object."""
+        self.pixy = pixy
+        self.blocks = None # TODO: would an empty list be better?
+        # A single view over the parent's response buffer, reused by every lazy getBlocks() call.
+        self.block_view = Pixy2CCC.BlockCacheView(pixy.response_buffer)
+
+    def getBlocks(self, wait=True, sigmap=0xFF, maxBlocks=0xFF, lazy=False):
+        """Gets signature Blocks from Pixy2.
+        Defaults to waiting for a response, getting blocks from all signatures, and a maximum of all 256 blocks.
+        Returned data should be retrieved from the cache with getBlockCache().
+        :param wait -   Boolean that indicates whether to wait until a signature is detected, or return immediately.
+        :param sigmap - Signature map to look for.
+        :param maxBlocks - Maximum number of blocks to look for (0-255).
+        :param lazy -   If True, the cache becomes a BlockCacheView over the response buffer instead of a list
+                        of Block objects.  Nothing is decoded until a block is indexed, which is much cheaper
+                        when only the first (largest) block is used.  The view is only valid until the next
+                        request to Pixy2, which overwrites the response buffer.
+        :returns Number of blocks found, or Pixy2 error code.
+        """
+        start = time.time() # Get time in seconds so we can check on timeouts.
+
+        while True:
+            # Fill in the request data (using the Pixy2 object's fields).
+            self.pixy.payload_buffer[0] = self.pixy.clip_unsigned_byte(sigmap)
+            self.pixy.payload_buffer[1] = self.pixy.clip_unsigned_byte(maxBlocks)
+            self.pixy.length = 2
+            self.pixy.type = Pixy2CCC.CCC_REQUEST_BLOCKS
+
+            # Send request.
+            self.pixy.sendPacket()
+            res = self.pixy.receivePacket()
+            if res == pixy2api.pixy2.Pixy2.PIXY_RESULT_OK:
+                if self.pixy.type == Pixy2CCC.CCC_RESPONSE_BLOCKS:
+                    if lazy:
+                        # Just record how many blocks are in the buffer; decoding happens on access.
+                        self.block_view.count = self.pixy.length // Pixy2CCC.CCC_BLOCK_SIZE
+                        self.blocks = self.block_view
+                        return self.block_view.count
+                    self.blocks = [] # Clear, creating an empty list.
+                    for i in range(0, self.pixy.length - 13, 14):
+                        b = Pixy2CCC.Block(((self.pixy.response_buffer[i+1] & 0xFF) << 8) | (self.pixy.response_buffer[i] & 0xFF),
+                                           ((self.pixy.response_buffer[i+3] & 0xFF) << 8) | (self.pixy.response_buffer[i+2] & 0xFF),
+                                           ((self.pixy.response_buffer[i+5] & 0xFF) << 8) | (self.pixy.response_buffer[i+4] & 0xFF),
+                                           ((self.pixy.response_buffer[i+7] & 0xFF) << 8) | (self.pixy.response_buffer[i+6] & 0xFF),
+                                           ((self.pixy.response_buffer[i+9] & 0xFF) << 8) | (self.pixy.response_buffer[i+8] & 0xFF),
+                                           ((self.pixy.response_buffer[i+11] & 0xFF) << 8) | (self.pixy.response_buffer[i+10] & 0xFF),
+                                           (self.pixy.response_buffer[i+12] & 0xFF), (self.pixy.response_buffer[i+13] & 0xFF))
+                        self.blocks.append(b)
+                    return len(self.blocks)
+                elif self.pixy.type == pixy2api.pixy2.Pixy2.PIXY_TYPE_RESPONSE_ERROR:
+                    # Deal with busy and program changing states from Pixy2 (we'll wait).
+                    # The error code is a signed byte, so convert before comparing with the negative constants.
+                    error = self.pixy.response_buffer[0] - 256 if self.pixy.response_buffer[0] > 127 else self.pixy.response_buffer[0]
+                    if error == pixy2api.pixy2.Pixy2.PIXY_RESULT_BUSY:
+                        if not wait:
+                            return pixy2api.pixy2.Pixy2.PIXY_RESULT_BUSY # New data not available yet.
+                    elif error == pixy2api.pixy2.Pixy2.PIXY_RESULT_PROG_CHANGING:
+                        return error
+            else:
+                return pixy2api.pixy2.Pixy2.PIXY_RESULT_ERROR
+            if time.time() - start > 0.5:
+                # Half a second timeout.
+                return pixy2api.pixy2.Pixy2.PIXY_RESULT_ERROR
+            # If we are waiting for frame data, pause for 500 microseconds to allow Pixy2 to process
+            time.sleep(0.0005)
+
+    def getBlockCache(self):
+        """Gets a list of signature Blocks from the cache.
+        getBlocks() must be executed first to get the actual data from Pixy2.
+        :returns list of Blocks, or a BlockCacheView if getBlocks() was called with lazy=True."""
+        return self.blocks
+
+    class Block(object):
+        """Inner class that encapsulates a color connected block."""
+
+        def __init__(self, signature, x, y, width, height, angle, index, age):
+            """Constructs block instance.
+            :param signature - Block signature (color) or color code number.  Signatures are 0-7.
+                               Color codes are larger than 7.
+            :param x         - X value of center of block in pixels (0 on left of image, 315 at right)
+            :param y         - Y value of center of block in pixels (0 on top of image, 207 at bottom)
+            :param width     - Width of block in pixels  (0 to full screen).
+            :param height    - Height of block in pixels (0 to full screen).
+            :param angle     - Angle of a color code in degrees (-359 - 360).  Not applicable to a regular signature (value will be 0).
+            :param index     - Tracking index of the block.  A block will keep this index until it is no longer visible. (0-255)
+            :param age       - Number of frames that a given block (index) has been tracked.  When it reaches 255, it remains at 255.
+            """
+            self.signature = signature
+            self.x = x
+            self.y = y
+            self.width = width
+            self.height = height
+            self.angle = angle
+            self.index = index
+            self.age = age
+
+        def print(self):
+            """Print the block's data to the console."""
+            print(self.toString())
+
+        def toString(self):
+            """Create a string from the block data.
+            :returns the string"""
+            if self.signature > Pixy2CCC.CCC_MAX_SIGNATURE:
+                # The block has a color code.
+                # Java version converts signature number to an octal string, but hexadecimal is easier to use.
+                out = 'CC block sig: 0x{:4X} ({} decimal) x: {} y: {} width: {} height: {} angle: {} index: {} age: {}'\
+                    .format(self.signature, self.signature, self.x, self.y, self.width, self.height, self.angle, self.index, self.age)
+            else:
+                # Regular block.  Angle is always zero, so no need to print.
+                out = 'CC block sig: {} x: {} y: {} width: {} height: {} index: {} age: {}'\
+                    .format(self.signature, self.x, self.y, self.width, self.height, self.index, self.age)
+            return out
+
+        # Define a bunch of "getter" functions that are kind of redundant for Python, since you can just access example_block.signature, etc.
+        # But for compatibility with the Java version, here they are:
+        def getSignature(self):
+            """:returns Block signature."""
+            return self.signature
+
+        def getX(self):
+            """:returns Block x value."""
+            return self.x
+
+        def getY(self):
+            """:returns Block y value."""
+            return self.y
+
+        def getWidth(self):
+            """:returns Block width."""
+            return self.width
+
+        def getHeight(self):
+            """:returns Block height."""
+            return self.height
+
+        def getAngle(self):
+            """:returns Block angle."""
+            return self.angle
+
+        def getIndex(self):
+            """:returns Block index."""
+            return self.index
+
+        def getAge(self):
+            """:returns Block age."""
+            return self.age
+
+    class BlockCacheView(object):
+        """Inner class that acts as a read-only sequence of the blocks in the Pixy2 response buffer.
+        Indexing returns a BlockView that decodes its fields from the buffer when they are read.
+        Iterating reuses a single BlockView (a "flyweight") that is moved along the buffer, so a
+        loop does not create an object per block.  Do not keep the iterated view past the loop body;
+        index the cache or call toBlock() if you need to hold on to a block."""
+        __slots__ = ('buffer', 'count', 'cursor')
+
+        def __init__(self, response_buffer):
+            """:param response_buffer - bytearray that Pixy2 responses are received into."""
+            self.buffer = memoryview(response_buffer).toreadonly()
+            self.count = 0
+            self.cursor = Pixy2CCC.BlockView(self.buffer, 0) # The flyweight used by __iter__().
+
+        def __len__(self):
+            return self.count
+
+        def __getitem__(self, i):
+            """Returns a new BlockView of block i.  Negative indices count from the end, as with a list."""
+            if i < 0:
+                i += self.count
+            if i < 0 or i >= self.count:
+                raise IndexError('block index out of range')
+            return Pixy2CCC.BlockView(self.buffer, i * Pixy2CCC.CCC_BLOCK_SIZE)
+
+        def __iter__(self):
+            cursor = self.cursor
+            for i in range(self.count):
+                cursor.offset = i * Pixy2CCC.CCC_BLOCK_SIZE
+                yield cursor
+
+    class BlockView(object):
+        """Inner class with the same interface as Block, but reading its fields from a block's
+        14 bytes in the response buffer each time they are accessed (little endian, as in getBlocks())."""
+        __slots__ = ('buffer', 'offset')
+
+        def __init__(self, buffer, offset):
+            """:param buffer - memoryview of the response buffer.
+            :param offset - byte offset of the block in the buffer."""
+            self.buffer = buffer
+            self.offset = offset
+
+        def _word(self, n):
+            """Decodes the unsigned 16-bit value at byte n of the block."""
+            i = self.offset + n
+            return (self.buffer[i+1] << 8) | self.buffer[i]
+
+        @property
+        def signature(self):
+            return self._word(0)
+
+        @property
+        def x(self):
+            return self._word(2)
+
+        @property
+        def y(self):
+            return self._word(4)
+
+        @property
+        def width(self):
+            return self._word(6)
+
+        @property
+        def height(self):
+            return self._word(8)
+
+        @property
+        def angle(self):
+            return self._word(10)
+
+        @property
+        def index(self):
+            return self.buffer[self.offset + 12]
+
+        @property
+        def age(self):
+            return self.buffer[self.offset + 13]
+
+        def toBlock(self):
+            """Copy the data out of the buffer.
+            :returns a Block that remains valid after the next request to Pixy2."""
+            return Pixy2CCC.Block(self.signature, self.x, self.y, self.width, self.height, self.angle, self.index, self.age)
+
+        def print(self):
+            """Print the block's data to the console."""
+            print(self.toString())
+
+        def toString(self):
+            """Create a string from the block data.
+            :returns the string"""
+            return Pixy2CCC.Block.toString(self)
+
+        # Getters to match the Block class.
+        def getSignature(self):
+            """:returns Block signature."""
+            return self._word(0)
+
+        def getX(self):
+            """:returns Block x value."""
+            return self._word(2)
+
+        def getY(self):
+            """:returns Block y value."""
+            return self._word(4)
+
+        def getWidth(self):
+            """:returns Block width."""
+            return self._word(6)
+
+        def getHeight(self):
+            """:returns Block height."""
+            return self._word(8)
+
+        def getAngle(self):
+            """:returns Block angle."""
+            return self._word(10)
+
+        def getIndex(self):
+            """:returns Block index."""
+            return self.buffer[self.offset + 12]
+
+        def getAge(self):
+            """:returns Block age."""
+            return self.buffer[self.offset + 13]
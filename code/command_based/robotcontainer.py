@@ -9,9 +9,13 @@ from constants.elevatorconstants import ElevatorConsts
 from commands.autos import Autos
 from commands.drivecommands import DriveCommands
 from commands.elevatorcommands import ElevatorCommands
+from commands.visioncommands import VisionCommands
 from constants.autoconstants import AutoConsts
 import subsystems.drivesubsystem
 import subsystems.elevatorsubsystem
+import subsystems.poseestimatorsubsystem
+import subsystems.visionsubsystem
+import trajectories
 
 class RobotContainer:
     """
@@ -26,6 +30,15 @@ class RobotContainer:
         # Robot's subsystems
         self.drive = subsystems.drivesubsystem.DriveSubsystem()
         self.elevator = subsystems.elevatorsubsystem.ElevatorSubsystem()
+        # The pose is only used to aim the emulated camera in simulation.  Use
+        # where the physics model has the robot, not where odometry thinks it is.
+        self.vision = subsystems.visionsubsystem.VisionSubsystem(lambda: self.drive.sim_model.pose)
+        # Corrects the drive's odometry with vision.  Made after the drive, so
+        # its periodic() runs after the drive's.
+        self.pose_estimator = subsystems.poseestimatorsubsystem.PoseEstimatorSubsystem(self.drive, self.vision)
+
+        # Load the autos' trajectories now, so autonomousInit() never waits on planning.
+        trajectories.preload()
 
         # Driver controller(s)
         self.xbox = commands2.button.CommandXboxController(UserInterface.XBOX_PORT)
@@ -80,6 +93,11 @@ class RobotContainer:
         """
         self.xbox.a().onTrue(DriveCommands.drive_goal(Positions.HOME, self.drive))
         self.xbox.b().onTrue(DriveCommands.drive_goal(Positions.FACE_NW, self.drive))
+        # Hold X to turn toward the vision target while still driving with the left stick.
+        self.xbox.x().whileTrue(VisionCommands.aim_at_target(
+            self.drive, self.vision,
+            lambda: -self.xbox.getLeftY() / UserInterface.DRIVE_SLOWER,
+            lambda: -self.xbox.getLeftX() / UserInterface.DRIVE_SLOWER))
         self.xbox.leftBumper().onTrue(ElevatorCommands.move_goal(ElevatorConsts.HOME, self.elevator))
         self.xbox.rightBumper().onTrue(ElevatorCommands.move_goal(ElevatorConsts.MID, self.elevator))
 
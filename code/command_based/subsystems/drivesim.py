@@ -0,0 +1,75 @@
+"""
+A physics model of MAKO's mecanum-style drive, for simulation.
+
+DriveSubsystem.simulationPeriodic() hands the model the motor outputs that
+MecanumDrive commanded, and the model works out how far each wheel has
+turned and which way the robot faces.  The subsystem then puts those into
+the simulated SparkMax encoders and gyro, so odometry, and the commands that
+use it, see the robot move as it would on the field.
+
+The model only depends on simulated time, never the wall clock, and always
+moves in fixed steps of DriveConsts.SIM_STEP seconds, however long the robot
+loop took.  So results don't depend on how fast the computer is, and
+"python -m robotpy test" runs autos much faster than real time.
+
+Each wheel's rim speed heads toward (motor output) * SIM_MAX_WHEEL_SPEED,
+reaching about 63% of the way there in SIM_TIME_CONSTANT seconds, which is
+roughly how a NEO behaves with the robot's weight on it.
+"""
+
+# Import standard Python modules.
+import math
+
+# Import WPILib and other robotics modules.
+import wpimath.geometry
+import wpimath.kinematics
+
+# Import our modules.
+from constants.driveconstants import DriveConsts
+
+class MecanumDriveModel():
+    def __init__(self, kinematics: wpimath.kinematics.MecanumDriveKinematics) -> None:
+        """
+        :param: kinematics The drive's kinematics, to turn wheel speeds into
+                robot motion.  Units are inches, like the rest of the drive.
+        """
+        self.kinematics = kinematics
+        self.step = DriveConsts.SIM_STEP
+        # Fraction of the way each wheel's speed moves toward its target in one step.
+        self.response = 1.0 - math.exp(-self.step / DriveConsts.SIM_TIME_CONSTANT)
+
+        # Wheel rim speeds (inches/second) and distances (inches), in the
+        # order front left, front right, rear left, rear right.
+        self.speeds = [0.0, 0.0, 0.0, 0.0]
+        self.distances = [0.0, 0.0, 0.0, 0.0]
+
+        # Where the robot really is, and how fast it is turning (radians/second, + = CCW).
+        self.pose = wpimath.geometry.Pose2d()
+        self.rotation_rate = 0.0
+
+        self.leftover = 0.0 # Time not yet stepped, carried to the next update().
+
+    def update(self, outputs, dt: float):
+        """
+        Advance the model by dt seconds, in fixed steps.
+        :param: outputs Motor outputs, -1 to 1, in the order front left, front
+                right, rear left, rear right, with + driving the robot forward.
+        :param: dt Seconds since the last update.
+        """
+        self.leftover += dt
+        while self.leftover >= self.step:
+            self._step(outputs)
+            self.leftover -= self.step
+
+    def _step(self, outputs):
+        """Advance the model by one step."""
+        step = self.step
+        for i in range(4):
+            target = outputs[i] * DriveConsts.SIM_MAX_WHEEL_SPEED
+            self.speeds[i] += (target - self.speeds[i]) * self.response
+            self.distances[i] += self.speeds[i] * step
+
+        # Move the robot along the arc the wheels drive it along.
+        chassis = self.kinematics.toChassisSpeeds(wpimath.kinematics.MecanumDriveWheelSpeeds(*self.speeds))
+        self.rotation_rate = chassis.omega
+        self.pose = self.pose.exp(wpimath.geometry.Twist2d(chassis.vx * step, chassis.vy * step, chassis.omega * step))
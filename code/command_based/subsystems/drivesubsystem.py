@@ -14,19 +14,47 @@ following order:
 
 # Import standard Python modules.
 import math
+import threading
 
 # Import WPILib and other robotics modules.
 import commands2
 import rev
 import wpilib
 import wpilib.drive
+import wpilib.simulation
 import wpimath.geometry
+import wpimath.interpolation
 import wpimath.kinematics
+import wpimath.system.plant
 from wpimath.controller import ProfiledPIDController
 from wpimath.trajectory import TrapezoidProfile
 
 # Import our modules.
+import canbudget
+import gyro
+import motorconfig
+import telemetry
 from constants.driveconstants import DriveConsts
+from subsystems.drivesim import MecanumDriveModel
+
+#==============================================================================
+# Sensor snapshot
+#==============================================================================
+
+class DriveSensors():
+    """
+    Everything the drive system measures, read once at the start of each cycle
+    by DriveSubsystem.read_sensors().  Each encoder read is a trip to the
+    SparkMax's latest CAN status, so rather than have odometry, commands, and
+    telemetry each read the sensors (and get slightly different values), they
+    all read this record.  The wheel positions and speeds objects are made
+    once and filled in again each cycle, so don't keep them past the cycle.
+    """
+    def __init__(self) -> None:
+        self.timestamp = 0.0                                       # FPGA time of the read, seconds
+        self.gyro_rotation = wpimath.geometry.Rotation2d()         # Gyro heading, + = CCW
+        self.distances = wpimath.kinematics.MecanumDriveWheelPositions() # Wheel rim distances, inches
+        self.speeds = wpimath.kinematics.MecanumDriveWheelSpeeds()       # Wheel rim speeds, inches/second
 
 #==============================================================================
 # The drive subsystem class
@@ -39,9 +67,10 @@ class DriveSubsystem(commands2.Subsystem):
         # ---------------------------------------------------------------------
         # The gyro is part of the drive system, since it helps keep the drive
         # moving the way we want.  Reset the gyro at boot in case the gyro has 
-        # been powered for a while, because it drifts.
+        # been powered for a while, because it drifts.  gyro.Gyro calibrates
+        # in the background (see gyro.py), so boot doesn't wait for it.
         # ---------------------------------------------------------------------
-        self.gyro = wpilib.ADXRS450_Gyro()
+        self.gyro = gyro.Gyro()
         self.gyro.reset()
 
         # ---------------------------------------------------------------------
@@ -59,15 +88,22 @@ class DriveSubsystem(commands2.Subsystem):
         config = rev.SparkMaxConfig()
         config.inverted(False)
         config.IdleMode(rev.SparkMax.IdleMode.kCoast)
+        # Tell the CAN budget what we read (see canbudget.py): each encoder's
+        # position and velocity every cycle.  With fast odometry, the position
+        # is needed faster than the SparkMax's usual 20 msec, or odometry would
+        # just see repeats.
+        position_period = DriveConsts.ENCODER_POSITION_PERIOD_MS if DriveConsts.FAST_ODOMETRY else 20
+        canbudget.request('drive', config, count=4, primaryEncoderPosition=position_period, primaryEncoderVelocity=20)
 
         # Configure left side as non-inverted.
-        self.drive_fl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_bl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        # Only saves to flash if the configuration changed (see motorconfig.py).
+        motorconfig.configure(self.drive_fl, config)
+        motorconfig.configure(self.drive_bl, config)
 
         # Invert and apply to the right side.
         config.inverted(True)
-        self.drive_fr.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_br.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        motorconfig.configure(self.drive_fr, config)
+        motorconfig.configure(self.drive_br, config)
 
         # Now that we have motors, we can set up an object that will handle mecanum drive.
         self.drivetrain = wpilib.drive.MecanumDrive(self.drive_fl, self.drive_bl, self.drive_fr, self.drive_br)
@@ -83,6 +119,10 @@ class DriveSubsystem(commands2.Subsystem):
         self.back_left_encoder.setPosition(0.0)
         self.back_right_encoder.setPosition(0.0)
 
+        # Take the first snapshot of the sensors, which odometry starts from.
+        self.sensors = DriveSensors()
+        self.read_sensors()
+
         # ---------------------------------------------------------------------
         # Set up odometry, that is figuring out how far we have driven. Example:
         # https://github.com/robotpy/examples/blob/main/MecanumBot/drivetrain.py
@@ -109,8 +149,27 @@ class DriveSubsystem(commands2.Subsystem):
         # An odometry object does the calculations to estimate how far the 
         # robot has moved. 
         self.odometry = wpimath.kinematics.MecanumDriveOdometry(
-            self.kinematics, self.gyro.getRotation2d(), 
-            self.get_current_distances(), initialPose=self.pose)
+            self.kinematics, self.sensors.gyro_rotation, 
+            self.sensors.distances, initialPose=self.pose)
+
+        # Recent poses and when they were measured.  Vision frames arrive
+        # a little after they are taken, so commands that use vision need to
+        # know where the robot was and which way it was facing at the time of
+        # the frame.  The buffer drops samples older than HISTORY_TIME.
+        self.pose_history = wpimath.interpolation.TimeInterpolatablePose2dBuffer(DriveConsts.HISTORY_TIME)
+
+        # With FAST_ODOMETRY, a Notifier updates odometry on its own thread
+        # every ODOMETRY_PERIOD seconds, much faster than the 20 msec robot
+        # loop, so quick strafes and turns are tracked better.  The lock keeps
+        # the robot loop from reading or resetting odometry in the middle of
+        # an update.  Otherwise, periodic() updates odometry.
+        self.odometry_lock = threading.Lock()
+        self.odometry_distances = wpimath.kinematics.MecanumDriveWheelPositions() # Only for the Notifier.
+        self.odometry_notifier = None
+        if DriveConsts.FAST_ODOMETRY:
+            self.odometry_notifier = wpilib.Notifier(self.update_odometry_fast)
+            self.odometry_notifier.setName('DriveOdometry')
+            self.odometry_notifier.startPeriodic(DriveConsts.ODOMETRY_PERIOD)
 
         # ---------------------------------------------------------------------
         # Create PID controllers for each of the three axes (x=forward, y=left,
@@ -142,6 +201,32 @@ class DriveSubsystem(commands2.Subsystem):
         self.rot_controller.setTolerance(DriveConsts.ROT_POS_TOL, DriveConsts.ROT_VEL_TOL)
         self.rot_controller.enableContinuousInput(-180, 180)
 
+        # ---------------------------------------------------------------------
+        # Telemetry (see telemetry.py).  The pose goes to NetworkTables as a
+        # struct, and is also shown as text on the default dashboard.
+        # ---------------------------------------------------------------------
+        self.telemetry = telemetry.Telemetry('Drive')
+        self.pose_signal = self.telemetry.add_pose('pose', period=0.02)
+        self.fr_distance_signal = self.telemetry.add_double('fr_distance', period=0.1, tolerance=0.01)
+        self.gyro_ready_signal = self.telemetry.add_bool('gyro_ready', period=0.5)
+        self.telemetry.add_dashboard_string('DB/String 0', 'Angle +=CCW: {:5.1f}', self.pose_signal, lambda pose: pose.rotation().degrees())
+        self.telemetry.add_dashboard_string('DB/String 1', 'x/forward (in): {:5.2f}', self.pose_signal, lambda pose: pose.X())
+        self.telemetry.add_dashboard_string('DB/String 2', 'y/left    (in): {:5.2f}', self.pose_signal, lambda pose: pose.Y())
+        self.telemetry.add_dashboard_string('DB/String 3', 'FR enc: {:5.2f}', self.fr_distance_signal, lambda inches: inches / DriveConsts.REV_TO_IN)
+
+        # ---------------------------------------------------------------------
+        # In simulation, a physics model (see drivesim.py) moves the simulated
+        # encoders and gyro according to what the motors are told to do.
+        # ---------------------------------------------------------------------
+        if wpilib.RobotBase.isSimulation():
+            self.sim_model = MecanumDriveModel(self.kinematics)
+            # Same order as the model: front left, front right, rear left, rear right.
+            self.sim_motors = [self.drive_fl, self.drive_fr, self.drive_bl, self.drive_br]
+            self.sim_encoders = [rev.SparkMaxSim(motor, wpimath.system.plant.DCMotor.NEO()).getRelativeEncoderSim()
+                                 for motor in self.sim_motors]
+            self.sim_gyro = wpilib.simulation.ADXRS450_GyroSim(self.gyro.device)
+            self.sim_time = wpilib.Timer.getFPGATimestamp()
+
 
     ###########################################################################
     # Methods in base classes that we override here                           #
@@ -156,20 +241,52 @@ class DriveSubsystem(commands2.Subsystem):
         any commands run, so this is a good place to get the gyro angle once
         (a small optimization).
         (https://docs.wpilib.org/en/stable/docs/software/commandbased/command-scheduler.html)
+        Everything below, and the commands that run after, use the sensor
+        snapshot taken here, rather than reading the sensors again.
         """
-        # Compute (estimate) robot position and store it.
-        self.pose = self.odometry.update(self.gyro.getRotation2d(), self.get_current_distances())
-
-        # Send the heading angle to the dashboard
-        # TODO: implement shuffleboard
-        wpilib.SmartDashboard.putString('DB/String 0', 'Angle +=CCW: {:5.1f}'.format(self.pose.rotation().degrees()))
-        wpilib.SmartDashboard.putString('DB/String 1', 'x/forward (in): {:5.2f}'.format(self.pose.X()))
-        wpilib.SmartDashboard.putString('DB/String 2', 'y/left    (in): {:5.2f}'.format(self.pose.Y()))
-        wpilib.SmartDashboard.putString('DB/String 3', 'FR enc: {:5.2f}'.format(self.front_right_encoder.getPosition()))
+        self.gyro.update()
+        self.read_sensors()
+
+        # Compute (estimate) robot position and store it.  With fast odometry,
+        # the Notifier has already done that; just get the latest.
+        if self.odometry_notifier is None:
+            self.pose = self.odometry.update(self.sensors.gyro_rotation, self.sensors.distances)
+            self.pose_history.addSample(self.sensors.timestamp, self.pose)
+        else:
+            with self.odometry_lock:
+                self.pose = self.odometry.getPose()
+
+        # Hand the pose and an encoder to telemetry, which sends them later.
+        self.pose_signal.set(self.pose)
+        self.fr_distance_signal.set(self.sensors.distances.frontRight)
+        self.gyro_ready_signal.set(self.gyro.is_ready())
 
     def simulationPeriodic(self):
-        """Called in simulation after periodic() to update simulation variables."""
-        pass
+        """
+        Called in simulation after periodic() to update simulation variables.
+        Steps the physics model with the motor outputs the drive commanded,
+        and puts the results into the simulated encoders and gyro for the
+        next periodic() to read.
+        """
+        now = wpilib.Timer.getFPGATimestamp()
+        dt = now - self.sim_time
+        self.sim_time = now
+
+        # The motors only move when the robot is enabled.  The right side
+        # motors are inverted, so + always drives the robot forward.
+        if wpilib.DriverStation.isEnabled():
+            outputs = [motor.get() for motor in self.sim_motors]
+        else:
+            outputs = [0.0, 0.0, 0.0, 0.0]
+        model = self.sim_model
+        model.update(outputs, dt)
+
+        for (encoder, distance, speed) in zip(self.sim_encoders, model.distances, model.speeds):
+            encoder.setPosition(distance / DriveConsts.REV_TO_IN)
+            encoder.setVelocity(speed / DriveConsts.RPM_TO_INCHES_S)
+        # The gyro is + clockwise, the model + counterclockwise.
+        self.sim_gyro.setAngle(-model.pose.rotation().degrees())
+        self.sim_gyro.setRate(-math.degrees(model.rotation_rate))
 
     # TODO: implement a sendable for telemetry
     # def initSendable(self, builder):
@@ -201,6 +318,12 @@ class DriveSubsystem(commands2.Subsystem):
            :param: rot_ccw positive to rotate the robot counterclockwise as 
                    viewed from above. 
         """
+        # Which way is "away from the driver" isn't known until the gyro has
+        # calibrated, so hold still until then, rather than drive off wrongly.
+        if not self.gyro.is_ready():
+            self.drivetrain.stopMotor()
+            return
+
         # Negate the reported heading by converting to degrees, negating, and
         # creating a new Rotation2d object.
         heading_degrees = self.pose.rotation().degrees()
@@ -211,6 +334,30 @@ class DriveSubsystem(commands2.Subsystem):
         # as does the rotation, which is why we negated above.
         self.drivetrain.driveCartesian(forward, -left, -rot_ccw, drive_heading)
 
+    def drive_robot_relative(self, forward: float, left: float, rot_ccw: float):
+        """Drive in a direction relative to the robot's front, regardless of
+           which way it is facing on the field.
+           :param: forward move toward the robot's front.
+           :param: left    move toward the robot's left side.
+           :param: rot_ccw positive to rotate the robot counterclockwise as 
+                   viewed from above. 
+        """
+        # Same sign corrections as drive_field_relative(), with no heading.
+        self.drivetrain.driveCartesian(forward, -left, -rot_ccw, wpimath.geometry.Rotation2d())
+
+    def drive_chassis_speeds(self, speeds: wpimath.kinematics.ChassisSpeeds):
+        """Drive at a velocity relative to the robot's front, in real units
+           rather than "gas pedal" values.
+           :param: speeds vx forward and vy left in inches/second, omega
+                   counterclockwise in radians/second.
+        """
+        # At full output, a wheel's rim moves at MAX_WHEEL_SPEED.  Turning
+        # moves each rim TURN_RADIUS inches per radian.
+        forward = speeds.vx / DriveConsts.MAX_WHEEL_SPEED
+        left = speeds.vy / DriveConsts.MAX_WHEEL_SPEED
+        rot_ccw = speeds.omega * DriveConsts.TURN_RADIUS / DriveConsts.MAX_WHEEL_SPEED
+        self.drive_robot_relative(forward, left, rot_ccw)
+
     def drive_to_goal(self):
         """
         Drive from present pose toward another pose on the field.
@@ -264,41 +411,76 @@ class DriveSubsystem(commands2.Subsystem):
         # temp = self.x_controller.atGoal() and self.y_controller.atGoal()
         return temp
 
+    def correct_pose(self, pose: wpimath.geometry.Pose2d):
+        """
+        Move odometry to a better estimate of where the robot was at the last
+        sensor snapshot (see poseestimatorsubsystem.py).  With fast odometry,
+        whatever the robot has moved since the snapshot is still counted,
+        since odometry picks up from the snapshot's encoder readings.
+        :param: pose The corrected pose as of self.sensors.timestamp.
+        """
+        sensors = self.sensors
+        with self.odometry_lock:
+            self.odometry.resetPosition(sensors.gyro_rotation, sensors.distances, pose)
+            # Move the recorded poses by the same correction, so they stay
+            # where they were relative to the robot, and get_pose_at() and
+            # get_heading_at() agree with the new odometry.
+            old_pose = self.pose_history.sample(sensors.timestamp)
+            if old_pose is None:
+                old_pose = self.pose
+            history = self.pose_history.getInternalBuffer()
+            self.pose_history.clear()
+            for (timestamp, past_pose) in history:
+                self.pose_history.addSample(timestamp, pose.transformBy(wpimath.geometry.Transform2d(old_pose, past_pose)))
+            self.pose_history.addSample(sensors.timestamp, pose)
+        self.pose = pose
+
 
     ###########################################################################
     # Helper methods                                                          #
     ###########################################################################
 
-    def get_current_distances(self)-> wpimath.kinematics.MecanumDriveWheelPositions:
+    def read_sensors(self):
         """
-        Returns the current distances measured by the drivetrain.
-        :returns: MecanumDriveWheelPositions with rim distances in meters.
+        Read the gyro and every encoder's position and velocity, once, into
+        self.sensors.  Called at the start of periodic(); everything else
+        should use self.sensors rather than reading the hardware.
         """
-        # Start with an empty positions object that will be returned.
-        pos = wpimath.kinematics.MecanumDriveWheelPositions()
+        sensors = self.sensors
+        sensors.timestamp = wpilib.Timer.getFPGATimestamp()
+        sensors.gyro_rotation = self.gyro.getRotation2d()
+
+        # Fill in the positions converting to wheel rim distance traveled in inches.
+        distances = sensors.distances
+        distances.frontLeft = motor_rev_to_inches(self.front_left_encoder.getPosition())
+        distances.frontRight = motor_rev_to_inches(self.front_right_encoder.getPosition())
+        distances.rearLeft = motor_rev_to_inches(self.back_left_encoder.getPosition())
+        distances.rearRight = motor_rev_to_inches(self.back_right_encoder.getPosition())
+
+        # Fill in the speeds converting to wheel rim speed in inches/second.
+        speeds = sensors.speeds
+        speeds.frontLeft = motor_rpm_to_inches_per_sec(self.front_left_encoder.getVelocity())
+        speeds.frontRight = motor_rpm_to_inches_per_sec(self.front_right_encoder.getVelocity())
+        speeds.rearLeft = motor_rpm_to_inches_per_sec(self.back_left_encoder.getVelocity())
+        speeds.rearRight = motor_rpm_to_inches_per_sec(self.back_right_encoder.getVelocity())
 
-        # Fill in the positions.
-        pos.frontLeft = motor_rev_to_inches(self.front_left_encoder.getPosition())
-        pos.frontRight = motor_rev_to_inches(self.front_right_encoder.getPosition())
-        pos.rearLeft = motor_rev_to_inches(self.back_left_encoder.getPosition())
-        pos.rearRight = motor_rev_to_inches(self.back_right_encoder.getPosition())
 
-        return pos
+    def get_current_distances(self)-> wpimath.kinematics.MecanumDriveWheelPositions:
+        """
+        Returns the distances measured by the drivetrain this cycle.
+        :returns: MecanumDriveWheelPositions with rim distances in inches,
+                  from the sensor snapshot (see read_sensors()).
+        """
+        return self.sensors.distances
 
 
     def get_current_speeds(self)-> wpimath.kinematics.MecanumDriveWheelSpeeds:
         """
-        Returns the current speeds measured by the drivetrain.
-        :returns: MecanumDriveWheelSpeeds with rim speeds in meters/second.
+        Returns the speeds measured by the drivetrain this cycle.
+        :returns: MecanumDriveWheelSpeeds with rim speeds in inches/second,
+                  from the sensor snapshot (see read_sensors()).
         """
-        # Fill in the positions converting to wheel rim speed traveled in inches/second.
-        front_left_speed  = motor_rpm_to_inches_per_sec(self.front_left_encoder.getVelocity())
-        front_right_speed = motor_rpm_to_inches_per_sec(self.front_right_encoder.getVelocity())
-        rear_left_speed   = motor_rpm_to_inches_per_sec(self.back_left_encoder.getVelocity())
-        rear_right_speed  = motor_rpm_to_inches_per_sec(self.back_right_encoder.getVelocity())
-
-        return wpimath.kinematics.MecanumDriveWheelSpeeds(
-            front_left_speed, front_right_speed, rear_left_speed, rear_right_speed)
+        return self.sensors.speeds
     
 
     def get_heading_continuous_degrees(self) -> float:
@@ -310,6 +492,45 @@ class DriveSubsystem(commands2.Subsystem):
         angle = self.pose.rotation().degrees()
         return wpimath.inputModulus(angle, -180, 180)
         
+    def get_pose_at(self, timestamp: float) -> wpimath.geometry.Pose2d:
+        """
+        Get the robot pose at a recent time, interpolating between the poses
+        recorded by odometry.
+        :param: timestamp FPGA time in seconds, within the last DriveConsts.HISTORY_TIME.
+        :returns: the pose at that time, or the present pose if there is no history.
+        """
+        with self.odometry_lock:
+            pose = self.pose_history.sample(timestamp)
+        if pose is None:
+            return self.pose
+        return pose
+
+    def get_heading_at(self, timestamp: float) -> wpimath.geometry.Rotation2d:
+        """
+        Get the robot heading at a recent time.  See get_pose_at().
+        :param: timestamp FPGA time in seconds, within the last DriveConsts.HISTORY_TIME.
+        :returns: the heading at that time, or the present heading if there is no history.
+        """
+        return self.get_pose_at(timestamp).rotation()
+
+    def update_odometry_fast(self):
+        """
+        Called by the odometry Notifier every DriveConsts.ODOMETRY_PERIOD on
+        its own thread.  Reads only what odometry needs, the gyro and encoder
+        positions, into its own record, since self.sensors belongs to the
+        robot loop.
+        """
+        timestamp = wpilib.Timer.getFPGATimestamp()
+        rotation = self.gyro.getRotation2d()
+        distances = self.odometry_distances
+        distances.frontLeft = motor_rev_to_inches(self.front_left_encoder.getPosition())
+        distances.frontRight = motor_rev_to_inches(self.front_right_encoder.getPosition())
+        distances.rearLeft = motor_rev_to_inches(self.back_left_encoder.getPosition())
+        distances.rearRight = motor_rev_to_inches(self.back_right_encoder.getPosition())
+        with self.odometry_lock:
+            pose = self.odometry.update(rotation, distances)
+            self.pose_history.addSample(timestamp, pose)
+
     def reset_pids(self):
         """
         Reset the state of PID controllers. Useful when starting a new command.
@@ -26,6 +26,9 @@ from wpimath.controller import ProfiledPIDController
 from wpimath.trajectory import TrapezoidProfile
 
 # Import our modules.
+import canbudget
+import motorconfig
+import telemetry
 from constants.elevatorconstants import ElevatorConsts
 
 #==============================================================================
@@ -50,10 +53,15 @@ class ElevatorSubsystem(commands2.Subsystem):
         config.IdleMode(rev.SparkMax.IdleMode.kBrake)
         # Feedback loop.
         config.closedLoop.pid(ElevatorConsts.K_P, 0.0, 0.0)
+        # Tell the CAN budget what we read (see canbudget.py): the encoder
+        # position and the bottom limit switch.  The position control loop
+        # runs on the SparkMax, so it doesn't need the bus.
+        canbudget.request('elevator', config, primaryEncoderPosition=20, limits=20)
 
 
         # Apply it to the motor.
-        self.motor.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        # Only saves to flash if the configuration changed (see motorconfig.py).
+        motorconfig.configure(self.motor, config)
 
         # A controller is how we adjust positions.
         self.controller = self.motor.getClosedLoopController()
@@ -71,6 +79,12 @@ class ElevatorSubsystem(commands2.Subsystem):
             self.encoder.setPosition(_inches_to_motor_rot(ElevatorConsts.HOME))
             self.initialized = True
 
+        # Telemetry (see telemetry.py).
+        self.telemetry = telemetry.Telemetry('Elevator')
+        self.height_signal = self.telemetry.add_double('height', period=0.1, tolerance=0.01)
+        self.initialized_signal = self.telemetry.add_bool('initialized', period=0.1)
+        self.telemetry.add_dashboard_string('DB/String 4', 'elev: {:5.2f}"', self.height_signal)
+
 
     ###########################################################################
     # Methods in base classes that we override here                           #
@@ -80,10 +94,9 @@ class ElevatorSubsystem(commands2.Subsystem):
         """
         This method runs once every 20 msec in all modes (including simulation).  
         """
-        # Send data to the dashboard
-        # TODO: implement shuffleboard
-        height = _motor_rot_to_inches(self.encoder.getPosition())
-        wpilib.SmartDashboard.putString('DB/String 4', 'elev: {:5.2f}"'.format(height))
+        # Hand data to telemetry, which sends it later.
+        self.height_signal.set(_motor_rot_to_inches(self.encoder.getPosition()))
+        self.initialized_signal.set(self.initialized)
 
     def simulationPeriodic(self):
         """Called in simulation after periodic() to update simulation variables."""
@@ -0,0 +1,180 @@
+"""
+Class to estimate where MAKO is on the field, from wheel odometry and vision,
+as a command-based Subsystem.  The class's method definitions are organized
+groups in the following order:
+
+* __init()__: The standard object initialization method.
+* Methods of Subsystem class that we are overriding
+* Methods that can be used in commands.
+* Helper methods used by the above.
+
+Odometry alone drifts: every bit of wheel slip adds to the error, and after
+a few meters of driving the pose can be off by inches.  Vision doesn't drift,
+but is noisy and arrives late.  A WPILib MecanumDrivePoseEstimator (a Kalman
+filter) combines the two, weighting each by its standard deviation.
+
+Each frame is applied at the time it was taken, not when it arrived: the
+estimator keeps a history of odometry, and corrects the pose as of the
+frame's timestamp, then replays the odometry since.  Frames that disagree
+too much with where the estimator thought the robot was are rejected, as are
+frames taken while turning fast or of targets too far away to measure well.
+
+The drive subsystem still runs its own (fast) odometry, which commands use.
+After each accepted frame, this subsystem moves the drive's odometry to the
+new estimate, so every command that uses drive.pose benefits.
+
+Pixy2 sees a target at a known place, VisionConsts.TARGET_POSITION, and
+measures its bearing and distance.  With the heading from the gyro, that
+gives the robot's position.  Another camera (for instance AprilTags) could
+call add_vision_measurement() with its own poses.
+"""
+
+# Import standard Python modules.
+import math
+
+# Import WPILib and other robotics modules.
+import commands2
+import wpimath.estimator
+import wpimath.geometry
+
+# Import our modules.
+import telemetry
+import subsystems.drivesubsystem
+import subsystems.visionsubsystem
+from constants.visionconstants import VisionConsts
+
+#==============================================================================
+# The pose estimator subsystem class
+#==============================================================================
+
+class PoseEstimatorSubsystem(commands2.Subsystem):
+    def __init__(self, drive: subsystems.drivesubsystem.DriveSubsystem,
+                 vision: subsystems.visionsubsystem.VisionSubsystem) -> None:
+        """
+        Create after the drive subsystem, so periodic() runs after the
+        drive's, with its new sensor snapshot.
+        :param: drive  The drive, for odometry and to correct.
+        :param: vision The vision subsystem to get frames from.
+        """
+        super().__init__() # Call the Subsystem class's (the "super" part) init.
+        self.drive = drive
+        self.vision = vision
+
+        # Same units as the drive: inches, with headings in radians.
+        sensors = drive.sensors
+        self.estimator = wpimath.estimator.MecanumDrivePoseEstimator(
+            drive.kinematics, sensors.gyro_rotation, sensors.distances, drive.pose,
+            (VisionConsts.ODOMETRY_STD_XY, VisionConsts.ODOMETRY_STD_XY, VisionConsts.ODOMETRY_STD_HEADING),
+            (VisionConsts.VISION_STD_MIN, VisionConsts.VISION_STD_MIN, VisionConsts.VISION_STD_HEADING))
+        self.pose = drive.pose
+
+        self.last_sequence = 0 # Sequence number of the last frame looked at.
+        self.rejects = 0       # Frames rejected in a row.
+
+        # Telemetry (see telemetry.py).
+        self.telemetry = telemetry.Telemetry('PoseEstimator')
+        self.vision_pose_signal = self.telemetry.add_pose('vision_pose', period=0.05)
+        self.accepted_signal = self.telemetry.add_double('accepted', period=0.25)
+        self.rejected_signal = self.telemetry.add_double('rejected', period=0.25)
+        self.accepted = 0
+        self.rejected = 0
+
+    ###########################################################################
+    # Methods in base classes that we override here                           #
+    ###########################################################################
+
+    def periodic(self):
+        """
+        Add the drive's sensor snapshot to the estimator, and the newest
+        vision frame, if there is one.
+        """
+        sensors = self.drive.sensors
+        self.estimator.updateWithTime(sensors.timestamp, sensors.gyro_rotation, sensors.distances)
+
+        frame = self.vision.get_latest()
+        if frame.sequence != self.last_sequence:
+            self.last_sequence = frame.sequence
+            if frame.has_target:
+                self.add_pixy_frame(frame)
+
+        self.pose = self.estimator.getEstimatedPosition()
+
+    ###########################################################################
+    # Methods to use in commands                                              #
+    ###########################################################################
+
+    def get_pose(self) -> wpimath.geometry.Pose2d:
+        """:returns: the estimated pose as of the drive's last sensor snapshot."""
+        return self.pose
+
+    def add_vision_measurement(self, pose: wpimath.geometry.Pose2d, timestamp: float,
+                               std_xy: float, std_heading: float = VisionConsts.VISION_STD_HEADING) -> bool:
+        """
+        Add a pose measured by a camera, unless it is an outlier.
+        :param: pose        Where the camera says the robot was.
+        :param: timestamp   FPGA time in seconds when the frame was taken.
+        :param: std_xy      Standard deviation of the position, inches.
+        :param: std_heading Standard deviation of the heading, radians.
+        :returns: True if it was used.
+        """
+        # Where the estimator thought the robot was when the frame was taken.
+        then = self.estimator.sampleAt(timestamp)
+        if then is None:
+            return False
+        error = then.translation().distance(pose.translation())
+        if error > max(VisionConsts.VISION_GATE_SIGMAS * std_xy, VisionConsts.VISION_GATE_MIN):
+            # Probably a reflection or a misread.  But if vision keeps
+            # disagreeing, odometry is more likely the one that is wrong, so
+            # accept frames until they agree again.
+            self.rejects += 1
+            if self.rejects <= VisionConsts.VISION_MAX_REJECTS:
+                self._count(False)
+                return False
+        else:
+            self.rejects = 0
+
+        self.estimator.addVisionMeasurement(pose, timestamp, (std_xy, std_xy, std_heading))
+        self.vision_pose_signal.set(pose)
+        self._count(True)
+
+        # Move the drive's odometry to match.  The estimate is as of the
+        # drive's last sensor snapshot, which is what the estimator was last
+        # updated with.
+        self.drive.correct_pose(self.estimator.getEstimatedPosition())
+        return True
+
+    ###########################################################################
+    # Helper methods                                                          #
+    ###########################################################################
+
+    def add_pixy_frame(self, frame: subsystems.visionsubsystem.VisionFrame):
+        """Work out the robot's position from a Pixy2 frame with a target, and add it."""
+        if not self.drive.gyro.is_ready():
+            return # No heading to go with the bearing.
+        if frame.distance > VisionConsts.VISION_MAX_DISTANCE:
+            return
+        if abs(self.drive.gyro.getRate()) > VisionConsts.VISION_MAX_TURN_RATE:
+            return
+        then = self.estimator.sampleAt(frame.timestamp)
+        if then is None:
+            return
+
+        # The target is frame.distance away along the heading plus the
+        # bearing, so the robot is that far back from the target.
+        heading = then.rotation()
+        direction = heading.degrees() + frame.bearing
+        offset = wpimath.geometry.Translation2d(frame.distance, wpimath.geometry.Rotation2d.fromDegrees(direction))
+        pose = wpimath.geometry.Pose2d(VisionConsts.TARGET_POSITION - offset, heading)
+
+        # Distance comes from the target's height in pixels, so a pixel of
+        # error matters more the farther away (smaller) the target is.
+        range_std = frame.distance ** 2 * VisionConsts.VISION_PIXEL_STD / (self.vision.focal_y * VisionConsts.TARGET_HEIGHT)
+        self.add_vision_measurement(pose, frame.timestamp, math.hypot(VisionConsts.VISION_STD_MIN, range_std))
+
+    def _count(self, accepted: bool):
+        if accepted:
+            self.accepted += 1
+            self.accepted_signal.set(self.accepted)
+        else:
+            self.rejected += 1
+            self.rejected_signal.set(self.rejected)
@@ -0,0 +1,155 @@
+"""
+Class to get targets from the Pixy2 camera as a command-based Subsystem.
+The class's method definitions are organized groups in the following order:
+
+* __init()__: The standard object initialization method.
+* Methods of Subsystem class that we are overriding
+* Methods that can be used in commands.
+* Helper methods used by the above.
+
+Talking to Pixy2 takes a few SPI transactions per frame, and getBlocks() can
+wait for a frame.  So that commands never wait on the camera, a background
+thread reads frames as they arrive and keeps the newest one as a VisionFrame
+snapshot.  Commands call get_latest() and check the sequence number to see
+if there is a new frame.
+
+In simulation, the camera is emulated (see pixy2api/links/simlink.py) and
+sees a target at VisionConsts.SIM_TARGET from the robot's pose.
+"""
+
+# Import standard Python modules.
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+# Import WPILib and other robotics modules.
+import commands2
+import wpilib
+
+# Import our modules.
+import pixy2api.pixy2
+from constants.visionconstants import VisionConsts
+
+#==============================================================================
+# A snapshot of one frame's target
+#==============================================================================
+
+@dataclass(frozen=True)
+class VisionFrame:
+    """The selected target from one Pixy2 frame.  Frozen, so it is safe to share between threads."""
+    sequence: int       # Increases by one for every frame read.
+    timestamp: float    # FPGA time in seconds when the frame was captured.
+    has_target: bool    # False if no block passed the target checks.
+    bearing: float = 0.0 # Degrees to the target, + = counterclockwise (left) of straight ahead.
+    distance: float = 0.0 # Estimated distance to the target in inches.
+    x: int = 0          # Block center and size in pixels.
+    y: int = 0
+    width: int = 0
+    height: int = 0
+
+#==============================================================================
+# The vision subsystem class
+#==============================================================================
+
+class VisionSubsystem(commands2.Subsystem):
+    def __init__(self, pose_supplier=None) -> None:
+        """
+        :param: pose_supplier A function returning the robot's Pose2d.  Only used in
+                simulation, to place the emulated target in the camera's view.
+        """
+        super().__init__() # Call the Subsystem class's (the "super" part) init.
+
+        # Focal lengths in pixels, for converting between pixels and angles.
+        self.focal_x = (VisionConsts.FRAME_WIDTH / 2) / math.tan(math.radians(VisionConsts.HORIZ_FOV / 2))
+        self.focal_y = (VisionConsts.FRAME_HEIGHT / 2) / math.tan(math.radians(VisionConsts.VERT_FOV / 2))
+
+        # ---------------------------------------------------------------------
+        # The camera, emulated in simulation.
+        # ---------------------------------------------------------------------
+        if wpilib.RobotBase.isSimulation():
+            self.pixy = pixy2api.pixy2.Pixy2(pixy2api.pixy2.Pixy2.LinkType.SIM)
+            self.pose_supplier = pose_supplier
+            self.pixy.link.setBlockSource(self._simulated_blocks)
+        else:
+            self.pixy = pixy2api.pixy2.Pixy2(pixy2api.pixy2.Pixy2.LinkType.SPI, VisionConsts.SPI_PORT)
+
+        # The newest frame.  Replacing the reference is atomic in Python, so
+        # readers always see a complete frame without needing a lock.
+        self.latest = VisionFrame(0, 0.0, False)
+
+        # Start reading frames in the background.  A daemon thread ends when
+        # the robot program does.
+        self.reader = threading.Thread(target=self._read_frames, name='Pixy2 reader', daemon=True)
+        self.reader.start()
+
+    ###########################################################################
+    # Methods to use in commands                                              #
+    ###########################################################################
+
+    def get_latest(self) -> VisionFrame:
+        """
+        Get the most recent frame without talking to the camera.
+        :returns: the newest VisionFrame.  Compare its sequence to one seen
+                  earlier to tell whether it is new.
+        """
+        return self.latest
+
+    ###########################################################################
+    # Helper methods                                                          #
+    ###########################################################################
+
+    def _read_frames(self):
+        """Body of the reader thread.  Never returns."""
+        # init() can take several seconds to find the camera, which is why it
+        # is here rather than in __init__().
+        while self.pixy.init() != pixy2api.pixy2.Pixy2.PIXY_RESULT_OK:
+            time.sleep(VisionConsts.ERROR_SLEEP)
+        ccc = self.pixy.getCCC()
+        sequence = 0
+
+        while True:
+            num_blocks = ccc.getBlocks(wait=False, sigmap=VisionConsts.SIGMAP,
+                                       maxBlocks=VisionConsts.MAX_BLOCKS, lazy=True)
+            if num_blocks == pixy2api.pixy2.Pixy2.PIXY_RESULT_BUSY:
+                time.sleep(VisionConsts.BUSY_SLEEP) # No new frame yet.
+                continue
+            if num_blocks < 0:
+                time.sleep(VisionConsts.ERROR_SLEEP)
+                continue
+
+            sequence += 1
+            timestamp = wpilib.Timer.getFPGATimestamp() - VisionConsts.LATENCY
+            self.latest = self._make_frame(sequence, timestamp, ccc.getBlockCache(), num_blocks)
+
+    def _make_frame(self, sequence, timestamp, blocks, num_blocks) -> VisionFrame:
+        """Pick the target from a frame's blocks.  Pixy2 sorts blocks largest
+           first, so the first one that is tall and thin enough is the target."""
+        for i in range(num_blocks):
+            block = blocks[i]
+            width = block.width
+            height = block.height
+            if width > 0 and height / width >= VisionConsts.MIN_ASPECT:
+                x = block.x
+                bearing = math.degrees(math.atan((VisionConsts.FRAME_WIDTH / 2 - x) / self.focal_x))
+                distance = VisionConsts.TARGET_HEIGHT * self.focal_y / height
+                return VisionFrame(sequence, timestamp, True, bearing, distance, x, block.y, width, height)
+        return VisionFrame(sequence, timestamp, False)
+
+    def _simulated_blocks(self):
+        """Block source for the emulated camera: what Pixy2 would see of a
+           target at VisionConsts.SIM_TARGET from the robot's present pose."""
+        if self.pose_supplier is None:
+            return None
+        pose = self.pose_supplier()
+        # Target position relative to the robot, +x forward and +y left.
+        relative = (VisionConsts.SIM_TARGET - pose.translation()).rotateBy(-pose.rotation())
+        if relative.X() <= 0.0:
+            return None # Behind the camera.
+        x = VisionConsts.FRAME_WIDTH / 2 - self.focal_x * relative.Y() / relative.X()
+        height = self.focal_y * VisionConsts.TARGET_HEIGHT / relative.norm()
+        width = height / (VisionConsts.MIN_ASPECT + 1.0)
+        if x < 0 or x >= VisionConsts.FRAME_WIDTH or height < 1:
+            return None # Out of view, or too far away to see.
+        height = min(height, VisionConsts.FRAME_HEIGHT)
+        return [(1, x, VisionConsts.FRAME_HEIGHT / 2, max(width, 1), height)]
@@ -0,0 +1,171 @@
+"""
+Sending subsystem data to the dashboard without slowing down the robot loop.
+
+Subsystems declare their signals once, in __init__(), and then just set()
+the newest value in periodic(), which only stores it.  Sending is done by
+publish(), which robot.py schedules with start() in its own time slot,
+separate from the robot loop:
+
+* Each signal has a typed NetworkTables publisher (double, boolean, or a
+  Pose2d struct that AdvantageScope and Glass can draw), made once.
+* A signal is sent at most once every period seconds, and only if its
+  value has changed (by more than the tolerance, for doubles).
+* The default driver station dashboard's 'DB/String N' slots want text.
+  That formatting is done even less often, by publish_dashboard(), and
+  only for signals that changed.
+
+Example, in a subsystem:
+    self.telemetry = telemetry.Telemetry('Elevator')
+    self.height_signal = self.telemetry.add_double('height', period=0.1)
+    self.telemetry.add_dashboard_string('DB/String 4', 'elev: {:5.2f}"', self.height_signal)
+    ...
+    self.height_signal.set(height) # In periodic()
+"""
+
+# Import WPILib and other robotics modules.
+import ntcore
+import wpilib
+import wpimath.geometry
+
+# Everything declared, across all the Telemetry tables, since the last
+# start().  start() hands these to the robot.
+_signals = []
+_dashboard_strings = []
+
+# How often publish() and publish_dashboard() run, in seconds.
+PUBLISH_PERIOD = 0.02
+DASHBOARD_PERIOD = 0.25
+
+#==============================================================================
+# Signals
+#==============================================================================
+
+class Signal():
+    """
+    One value to send.  Call set() as often as you like; publish() decides
+    when to send it.
+    """
+    def __init__(self, publisher, default, period: float) -> None:
+        self.publisher = publisher
+        self.value = default
+        self.period = period
+        self.version = 0             # Goes up by one every time the value changes.
+        self.sent_version = -1       # Version last sent to NetworkTables.
+        self.next_time = 0.0         # Earliest FPGA time to send again.
+
+    def set(self, value):
+        """Store the newest value.  Cheap enough to call every loop."""
+        if value != self.value:
+            self.value = value
+            self.version += 1
+
+    def publish(self, now: float):
+        """Send the value if it has changed and period has passed."""
+        if self.version != self.sent_version and now >= self.next_time:
+            self.publisher.set(self.value)
+            self.sent_version = self.version
+            self.next_time = now + self.period
+
+class DoubleSignal(Signal):
+    """A number.  Changes no bigger than tolerance don't count."""
+    def __init__(self, publisher, period: float, tolerance: float) -> None:
+        super().__init__(publisher, 0.0, period)
+        self.tolerance = tolerance
+
+    def set(self, value: float):
+        if abs(value - self.value) > self.tolerance:
+            self.value = value
+            self.version += 1
+
+#==============================================================================
+# A table of signals for one subsystem
+#==============================================================================
+
+class Telemetry():
+    def __init__(self, table_name: str) -> None:
+        """:param: table_name NetworkTables table, usually the subsystem's name."""
+        self.table = ntcore.NetworkTableInstance.getDefault().getTable(table_name)
+
+    def add_double(self, name: str, period: float = 0.1, tolerance: float = 0.0) -> DoubleSignal:
+        """
+        Declare a number to send.
+        :param: name      topic name in this table.
+        :param: period    send at most this often, in seconds.
+        :param: tolerance changes no bigger than this aren't sent.
+        """
+        signal = DoubleSignal(self.table.getDoubleTopic(name).publish(), period, tolerance)
+        _signals.append(signal)
+        return signal
+
+    def add_bool(self, name: str, period: float = 0.1) -> Signal:
+        """Declare a True/False value to send.  See add_double()."""
+        signal = Signal(self.table.getBooleanTopic(name).publish(), False, period)
+        _signals.append(signal)
+        return signal
+
+    def add_pose(self, name: str, period: float = 0.05) -> Signal:
+        """Declare a Pose2d to send, as a struct.  See add_double()."""
+        signal = Signal(self.table.getStructTopic(name, wpimath.geometry.Pose2d).publish(),
+                        wpimath.geometry.Pose2d(), period)
+        _signals.append(signal)
+        return signal
+
+    def add_dashboard_string(self, key: str, text_format: str, signal: Signal, convert=None):
+        """
+        Also show a signal as text on the default dashboard.
+        :param: key         SmartDashboard key, for instance 'DB/String 0'.
+        :param: text_format format string with one {} for the value.
+        :param: signal      the signal to show.
+        :param: convert     optional function to get the number to show from
+                            the value, for instance lambda pose: pose.X().
+        """
+        _dashboard_strings.append(DashboardString(key, text_format, signal, convert))
+
+class DashboardString():
+    """A legacy 'DB/String N' slot showing a signal, reformatted only when it changes."""
+    def __init__(self, key: str, text_format: str, signal: Signal, convert) -> None:
+        self.entry = wpilib.SmartDashboard.getEntry(key)
+        self.text_format = text_format
+        self.signal = signal
+        self.convert = convert
+        self.shown_version = -1
+
+    def publish(self):
+        if self.signal.version != self.shown_version:
+            value = self.signal.value
+            if self.convert is not None:
+                value = self.convert(value)
+            self.entry.setString(self.text_format.format(value))
+            self.shown_version = self.signal.version
+
+#==============================================================================
+# Sending
+#==============================================================================
+
+def publish(signals: list):
+    """Send the signals that are due.  start() schedules this."""
+    now = wpilib.Timer.getFPGATimestamp()
+    for signal in signals:
+        signal.publish(now)
+
+def publish_dashboard(dashboard_strings: list):
+    """Update the 'DB/String N' slots whose signals have changed.  start() schedules this."""
+    for dashboard_string in dashboard_strings:
+        dashboard_string.publish()
+
+def start(robot: wpilib.TimedRobot):
+    """
+    Schedule publish() and publish_dashboard() on the robot's timer, offset
+    from the robot loop so they don't run in the same time slot.  Call once,
+    from robotInit(), after the subsystems are made.
+
+    The robot takes the signals declared since the last start(), so when a
+    new robot is made in the same interpreter (in tests, for instance), it
+    doesn't keep sending the old one's.
+    """
+    signals = _signals.copy()
+    dashboard_strings = _dashboard_strings.copy()
+    _signals.clear()
+    _dashboard_strings.clear()
+    robot.addPeriodic(lambda: publish(signals), PUBLISH_PERIOD, 0.01)
+    robot.addPeriodic(lambda: publish_dashboard(dashboard_strings), DASHBOARD_PERIOD, 0.015)
@@ -0,0 +1,52 @@
+'''
+    Tests of the Pixy2 vision code: pixy2api is the same as pixyvision's, the
+    real SPI link can be set up, and AimAtTarget turns the robot toward the simulated target (see
+    pixy2api/links/simlink.py and VisionConsts.SIM_TARGET).
+'''
+
+import filecmp
+import math
+import os
+
+import pytest
+
+import pixy2api.pixy2
+import pixy2api.links.spilink
+from commands.visioncommands import VisionCommands
+from constants.visionconstants import VisionConsts
+
+def test_pixy2api_matches_pixyvision():
+    here = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pixy2api')
+    there = os.path.join(here, '..', '..', 'pixyvision', 'pixy2api')
+    if not os.path.isdir(there):
+        pytest.skip('pixyvision is not next to this project')
+    for folder in ('', 'links'):
+        names = [name for name in os.listdir(os.path.join(there, folder))
+                 if name.endswith('.py') and not (folder == '' and name == '__init__.py')]
+        (_, mismatch, errors) = filecmp.cmpfiles(os.path.join(there, folder), os.path.join(here, folder), names, shallow=False)
+        assert not mismatch and not errors, 'pixy2api differs from pixyvision: {}'.format(mismatch + errors)
+
+def test_spi_link_construction():
+    # What VisionSubsystem does on the robot.  Only sets up the port; there is no camera to talk to.
+    pixy = pixy2api.pixy2.Pixy2(pixy2api.pixy2.Pixy2.LinkType.SPI, VisionConsts.SPI_PORT)
+    assert isinstance(pixy.link, pixy2api.links.spilink.SPILink)
+
+def test_aim_at_target(control, robot):
+    with control.run_robot():
+        # Give the camera thread time to start and see the target.
+        control.step_timing(seconds=0.5, autonomous=False, enabled=False)
+        container = robot.container
+        assert container.vision.get_latest().has_target
+
+        control.step_timing(seconds=0.1, autonomous=False, enabled=True)
+        command = VisionCommands.aim_at_target(container.drive, container.vision)
+        command.schedule()
+        control.step_timing(seconds=4.0, autonomous=False, enabled=True)
+
+        # The robot starts at the origin facing +x, so the target is this far to the left.
+        pose = container.drive.sim_model.pose
+        target = VisionConsts.SIM_TARGET - pose.translation()
+        bearing = math.degrees(math.atan2(target.Y(), target.X())) - pose.rotation().degrees()
+        assert pose.rotation().degrees() > 5.0
+        assert abs(bearing) < 2 * VisionConsts.AIM_TOL
+        command.cancel()
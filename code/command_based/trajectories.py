@@ -0,0 +1,304 @@
+"""
+Planned paths for autonomous routines, made ahead of time and kept on disk.
+
+A HolonomicTrajectory says where the robot should be, which way it should
+face, and how fast it should be moving, at every moment of a path through
+some waypoints (usually poses from fieldconstants.Positions).  Since MAKO's
+drive can move in any direction while turning, the path the robot travels
+and the way it faces are planned separately:
+
+* The travel path is a WPILib spline trajectory through the waypoints'
+  positions, limited to DriveConsts.HORIZ_MAX_V and HORIZ_MAX_A.
+* The heading turns from each waypoint's rotation to the next one's along a
+  trapezoid profile limited to DriveConsts.ROT_MAX_V and ROT_MAX_A, starting
+  when the path reaches the waypoint.
+
+Planning takes a while, so trajectories are sampled every SAMPLE_PERIOD
+seconds and saved to small binary files in the deploy directory's
+trajectories/ folder, named by a hash of the waypoints and limits.  Change
+either, and the name changes, so a stale file is never used.  get() loads a
+file the first time a trajectory is asked for, and preload() does that for
+every path in AUTO_PATHS from robotInit(), so autonomousInit() never waits.
+
+Run "python trajectories.py" before deploying to make the files for
+AUTO_PATHS, so the robot doesn't even need to plan them at boot.
+
+File layout (all little endian):
+    Header, HEADER.size bytes:
+        4s  magic, b'TRAJ'
+        H   format version
+        H   sample size in bytes
+        d   SAMPLE_PERIOD, seconds
+        I   number of samples
+    Samples, one every SAMPLE_PERIOD seconds from time 0:
+        f   x, inches
+        f   y, inches
+        f   heading, degrees, + = CCW (not wrapped to +/-180)
+        f   x velocity, inches/second (field x, not robot forward)
+        f   y velocity, inches/second
+        f   rotation rate, degrees/second
+"""
+
+# Import standard Python modules.
+import array
+import hashlib
+import math
+import os
+import struct
+import sys
+
+# Import WPILib and other robotics modules.
+import wpilib
+import wpimath.geometry
+from wpimath.trajectory import TrajectoryConfig, TrajectoryGenerator, TrapezoidProfile
+
+# Import our modules.
+from constants.driveconstants import DriveConsts
+from constants.fieldconstants import Positions
+
+MAGIC = b'TRAJ'
+VERSION = 1
+HEADER = struct.Struct('<4sHHdI')
+SAMPLE = struct.Struct('<6f')
+FIELDS = 6 # Numbers per sample.
+
+SAMPLE_PERIOD = 0.01 # seconds
+
+# The paths our autos drive, so preload() can get them ready.  See commands/autos.py.
+AUTO_PATHS = (
+    (Positions.HOME, Positions.AWAY),
+    (Positions.AWAY, Positions.SIDE),
+)
+
+# Trajectories loaded so far, by cache key.
+_loaded = {}
+
+#==============================================================================
+# The trajectory class
+#==============================================================================
+
+class HolonomicTrajectory():
+    """
+    A path sampled every period seconds.  Use sample() to get the robot's
+    planned state at any time.
+    """
+    def __init__(self, period: float, samples: array.array) -> None:
+        """
+        :param: period  seconds between samples.
+        :param: samples array of FIELDS numbers per sample, see the file layout above.
+        """
+        self.period = period
+        self.samples = samples
+        self.count = len(samples) // FIELDS
+        self.duration = (self.count - 1) * period
+
+    def sample(self, t: float):
+        """
+        Get the planned state at a time, in between samples if need be.
+        :param: t seconds since the start.  Before the start gives the start,
+                and after the end gives the end (with zero velocity).
+        :returns: (x, y, heading, vx, vy, omega) in inches, degrees, and per second.
+        """
+        if t >= self.duration:
+            i = (self.count - 1) * FIELDS
+            s = self.samples
+            return (s[i], s[i + 1], s[i + 2], 0.0, 0.0, 0.0)
+        position = max(t, 0.0) / self.period
+        index = int(position)
+        f = position - index
+        s = self.samples
+        i = index * FIELDS
+        j = i + FIELDS
+        return tuple(s[i + k] + (s[j + k] - s[i + k]) * f for k in range(FIELDS))
+
+    def start_pose(self) -> wpimath.geometry.Pose2d:
+        """:returns: the pose at the start."""
+        return _pose(self.samples, 0)
+
+    def end_pose(self) -> wpimath.geometry.Pose2d:
+        """:returns: the pose at the end."""
+        return _pose(self.samples, (self.count - 1) * FIELDS)
+
+def _pose(samples, i) -> wpimath.geometry.Pose2d:
+    return wpimath.geometry.Pose2d(samples[i], samples[i + 1], wpimath.geometry.Rotation2d.fromDegrees(samples[i + 2]))
+
+#==============================================================================
+# Getting trajectories
+#==============================================================================
+
+def get(waypoints, max_velocity: float = DriveConsts.HORIZ_MAX_V,
+        max_acceleration: float = DriveConsts.HORIZ_MAX_A) -> HolonomicTrajectory:
+    """
+    Get the trajectory through some waypoints: already loaded, from its file,
+    or planned now (and saved) if there is no file.
+    :param: waypoints Pose2ds to go through, in order.  Each one's rotation is
+            the way the robot should face there.
+    :param: max_velocity     inches/second.
+    :param: max_acceleration inches/second/second.
+    """
+    key = cache_key(waypoints, max_velocity, max_acceleration)
+    trajectory = _loaded.get(key)
+    if trajectory is None:
+        path = cache_path(key)
+        try:
+            trajectory = load(path)
+        except (OSError, ValueError):
+            trajectory = generate(waypoints, max_velocity, max_acceleration)
+            try:
+                save(trajectory, path)
+            except OSError as e:
+                print('Could not save trajectory {}: {}'.format(path, e))
+        _loaded[key] = trajectory
+    return trajectory
+
+def preload():
+    """Get every trajectory in AUTO_PATHS ready.  Call from robotInit()."""
+    for waypoints in AUTO_PATHS:
+        get(waypoints)
+
+def cache_key(waypoints, max_velocity: float, max_acceleration: float) -> str:
+    """:returns: a short hash of everything that determines a trajectory."""
+    numbers = [VERSION, SAMPLE_PERIOD, max_velocity, max_acceleration,
+               DriveConsts.ROT_MAX_V, DriveConsts.ROT_MAX_A]
+    for pose in waypoints:
+        numbers.extend((pose.X(), pose.Y(), pose.rotation().degrees()))
+    data = struct.pack('<{}d'.format(len(numbers)), *numbers)
+    return hashlib.sha1(data).hexdigest()[:16]
+
+def cache_path(key: str) -> str:
+    """:returns: the file for a cache key, in the deploy directory."""
+    return os.path.join(wpilib.getDeployDirectory(), 'trajectories', key + '.traj')
+
+#==============================================================================
+# Files
+#==============================================================================
+
+def save(trajectory: HolonomicTrajectory, path: str):
+    """Write a trajectory to a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SAMPLE.size, trajectory.period, trajectory.count))
+        f.write(trajectory.samples.tobytes())
+
+def load(path: str) -> HolonomicTrajectory:
+    """
+    Read a trajectory from a file.
+    :raises: OSError if it can't be read, ValueError if it isn't a trajectory file.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError('{}: not a trajectory file'.format(path))
+    (magic, version, sample_size, period, count) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or sample_size != SAMPLE.size or count < 1:
+        raise ValueError('{}: not a version {} trajectory file'.format(path, VERSION))
+    if len(data) != HEADER.size + count * SAMPLE.size:
+        raise ValueError('{}: wrong length'.format(path))
+    samples = array.array('f')
+    samples.frombytes(data[HEADER.size:])
+    if sys.byteorder != 'little':
+        samples.byteswap()
+    return HolonomicTrajectory(period, samples)
+
+#==============================================================================
+# Planning
+#==============================================================================
+
+def generate(waypoints, max_velocity: float = DriveConsts.HORIZ_MAX_V,
+             max_acceleration: float = DriveConsts.HORIZ_MAX_A) -> HolonomicTrajectory:
+    """
+    Plan a trajectory through waypoints.  Slow; use get() instead, which keeps the result.
+    See get() for the parameters.
+    """
+    # Travel path.  Spline poses face the direction of travel, not the way the
+    # robot faces, so make poses that point from each waypoint toward the next.
+    # Waypoints at the same place (just turning there) only count once.
+    points = [waypoints[0].translation()]
+    stops = [0] # Index in points of each waypoint.
+    for pose in waypoints[1:]:
+        if pose.translation().distance(points[-1]) > 1e-6:
+            points.append(pose.translation())
+        stops.append(len(points) - 1)
+
+    if len(points) > 1:
+        spline_poses = []
+        for (i, point) in enumerate(points):
+            before = points[max(i - 1, 0)]
+            after = points[min(i + 1, len(points) - 1)]
+            direction = wpimath.geometry.Rotation2d(after.X() - before.X(), after.Y() - before.Y())
+            spline_poses.append(wpimath.geometry.Pose2d(point, direction))
+        travel = TrajectoryGenerator.generateTrajectory(spline_poses, TrajectoryConfig(max_velocity, max_acceleration))
+        travel_time = travel.totalTime()
+        # When the path gets to each point, scanning forward.
+        point_times = [0.0]
+        t = 0.0
+        for point in points[1:-1]:
+            best = (math.inf, t)
+            while t < travel_time:
+                distance = travel.sample(t).pose.translation().distance(point)
+                if distance > best[0] + 1.0:
+                    break # Passed it.
+                best = min(best, (distance, t))
+                t += SAMPLE_PERIOD
+            point_times.append(best[1])
+            t = best[1]
+        point_times.append(travel_time)
+    else:
+        travel = None
+        travel_time = 0.0
+        point_times = [0.0]
+
+    # Heading.  Turn from each waypoint's rotation to the next, the short way
+    # around, starting when the path gets to the waypoint (or when the
+    # previous turn finishes, if that is later).
+    constraints = TrapezoidProfile.Constraints(DriveConsts.ROT_MAX_V, DriveConsts.ROT_MAX_A)
+    turns = [] # (start time, start heading, profile, end heading, turn time)
+    heading = waypoints[0].rotation().degrees()
+    start = 0.0
+    for (i, pose) in enumerate(waypoints[1:]):
+        start = max(start, point_times[stops[i]])
+        change = wpimath.inputModulus(pose.rotation().degrees() - heading, -180, 180)
+        profile = TrapezoidProfile(constraints)
+        profile.calculate(0.0, TrapezoidProfile.State(0.0, 0.0), TrapezoidProfile.State(change, 0.0))
+        turns.append((start, heading, profile, change, profile.totalTime()))
+        heading += change
+        start += profile.totalTime()
+    duration = max(travel_time, start)
+
+    # Sample everything.
+    count = int(math.ceil(duration / SAMPLE_PERIOD)) + 1
+    samples = array.array('f', bytes(count * SAMPLE.size))
+    turn = 0
+    for n in range(count):
+        t = min(n * SAMPLE_PERIOD, duration)
+        if travel is not None:
+            state = travel.sample(t)
+            direction = state.pose.rotation()
+            (x, y) = (state.pose.X(), state.pose.Y())
+            (vx, vy) = (state.velocity * direction.cos(), state.velocity * direction.sin())
+        else:
+            (x, y) = (points[0].X(), points[0].Y())
+            (vx, vy) = (0.0, 0.0)
+
+        while turn < len(turns) - 1 and t >= turns[turn + 1][0]:
+            turn += 1
+        if turns:
+            (turn_start, turn_heading, profile, change, turn_time) = turns[turn]
+            into = min(max(t - turn_start, 0.0), turn_time)
+            state = profile.calculate(into, TrapezoidProfile.State(0.0, 0.0), TrapezoidProfile.State(change, 0.0))
+            heading = turn_heading + state.position
+            omega = state.velocity if 0.0 < t - turn_start < turn_time else 0.0
+        else:
+            (heading, omega) = (waypoints[0].rotation().degrees(), 0.0)
+
+        i = n * FIELDS
+        samples[i:i + FIELDS] = array.array('f', (x, y, heading, vx, vy, omega))
+    return HolonomicTrajectory(SAMPLE_PERIOD, samples)
+
+if __name__ == '__main__':
+    # Make the files for AUTO_PATHS, to deploy with the robot code.
+    for waypoints in AUTO_PATHS:
+        key = cache_key(waypoints, DriveConsts.HORIZ_MAX_V, DriveConsts.HORIZ_MAX_A)
+        trajectory = generate(waypoints)
+        save(trajectory, cache_path(key))
+        print('{}: {:5.2f} seconds, {} samples'.format(cache_path(key), trajectory.duration, trajectory.count))
@@ -3,7 +3,9 @@ import commands2
 import wpilib
 
 
+import canbudget
 import robotcontainer
+import telemetry
 
 """
 MAKO robot using the commands2 framework.  Based largely on the robotpy examples
@@ -19,6 +21,12 @@ class CommandRobot(commands2.TimedCommandRobot): # Inheriting from TimedCommandR
         # Instantiate the robot container, which is where we declare most of the robot.
         self.container = robotcontainer.RobotContainer()
 
+        # Send the subsystems' telemetry in its own time slot, not in the robot loop.
+        telemetry.start(self)
+
+        # Print the CAN bus budget, and keep an eye on it.
+        canbudget.start(self)
+
     def disabledInit(self) -> None:
         pass
     
@@ -26,8 +26,31 @@ from wpimath.controller import ProfiledPIDController
 from wpimath.trajectory import TrapezoidProfile
 
 # Import our modules.
+import canbudget
+import gyro
+import motorconfig
+import telemetry
 from constants.driveconstants import DriveConsts
 
+#==============================================================================
+# Sensor snapshot
+#==============================================================================
+
+class DriveSensors():
+    """
+    Everything the drive system measures, read once at the start of each cycle
+    by DriveSubsystem.read_sensors().  Each encoder read is a trip to the
+    SparkMax's latest CAN status, so rather than have odometry, commands, and
+    telemetry each read the sensors (and get slightly different values), they
+    all read this record.  The wheel positions and speeds objects are made
+    once and filled in again each cycle, so don't keep them past the cycle.
+    """
+    def __init__(self) -> None:
+        self.timestamp = 0.0                                       # FPGA time of the read, seconds
+        self.gyro_rotation = wpimath.geometry.Rotation2d()         # Gyro heading, + = CCW
+        self.distances = wpimath.kinematics.MecanumDriveWheelPositions() # Wheel rim distances, inches
+        self.speeds = wpimath.kinematics.MecanumDriveWheelSpeeds()       # Wheel rim speeds, inches/second
+
 #==============================================================================
 # The drive subsystem class
 #==============================================================================
@@ -39,9 +62,10 @@ class DriveSubsystem(commands2.Subsystem):
         # ---------------------------------------------------------------------
         # The gyro is part of the drive system, since it helps keep the drive
         # moving the way we want.  Reset the gyro at boot in case the gyro has 
-        # been powered for a while, because it drifts.
+        # been powered for a while, because it drifts.  gyro.Gyro calibrates
+        # in the background (see gyro.py), so boot doesn't wait for it.
         # ---------------------------------------------------------------------
-        self.gyro = wpilib.ADXRS450_Gyro()
+        self.gyro = gyro.Gyro()
         self.gyro.reset()
 
         # ---------------------------------------------------------------------
@@ -59,15 +83,19 @@ class DriveSubsystem(commands2.Subsystem):
         config = rev.SparkMaxConfig()
         config.inverted(False)
         config.IdleMode(rev.SparkMax.IdleMode.kCoast)
+        # Tell the CAN budget what we read (see canbudget.py): each encoder's
+        # position and velocity every cycle.
+        canbudget.request('drive', config, count=4, primaryEncoderPosition=20, primaryEncoderVelocity=20)
 
         # Configure left side as non-inverted.
-        self.drive_fl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_bl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        # Only saves to flash if the configuration changed (see motorconfig.py).
+        motorconfig.configure(self.drive_fl, config)
+        motorconfig.configure(self.drive_bl, config)
 
         # Invert and apply to the right side.
         config.inverted(True)
-        self.drive_fr.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_br.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        motorconfig.configure(self.drive_fr, config)
+        motorconfig.configure(self.drive_br, config)
 
         # Now that we have motors, we can set up an object that will handle mecanum drive.
         self.drivetrain = wpilib.drive.MecanumDrive(self.drive_fl, self.drive_bl, self.drive_fr, self.drive_br)
@@ -83,6 +111,10 @@ class DriveSubsystem(commands2.Subsystem):
         self.back_left_encoder.setPosition(0.0)
         self.back_right_encoder.setPosition(0.0)
 
+        # Take the first snapshot of the sensors, which odometry starts from.
+        self.sensors = DriveSensors()
+        self.read_sensors()
+
         # ---------------------------------------------------------------------
         # Set up odometry, that is figuring out how far we have driven. Example:
         # https://github.com/robotpy/examples/blob/main/MecanumBot/drivetrain.py
@@ -109,8 +141,8 @@ class DriveSubsystem(commands2.Subsystem):
         # An odometry object does the calculations to estimate how far the 
         # robot has moved. 
         self.odometry = wpimath.kinematics.MecanumDriveOdometry(
-            self.kinematics, self.gyro.getRotation2d(), 
-            self.get_current_distances(), initialPose=self.pose)
+            self.kinematics, self.sensors.gyro_rotation, 
+            self.sensors.distances, initialPose=self.pose)
 
         # ---------------------------------------------------------------------
         # Create PID controllers for each of the three axes (x=forward, y=left,
@@ -142,6 +174,19 @@ class DriveSubsystem(commands2.Subsystem):
         self.rot_controller.setTolerance(DriveConsts.ROT_POS_TOL, DriveConsts.ROT_VEL_TOL)
         self.rot_controller.enableContinuousInput(-180, 180)
 
+        # ---------------------------------------------------------------------
+        # Telemetry (see telemetry.py).  The pose goes to NetworkTables as a
+        # struct, and is also shown as text on the default dashboard.
+        # ---------------------------------------------------------------------
+        self.telemetry = telemetry.Telemetry('Drive')
+        self.pose_signal = self.telemetry.add_pose('pose', period=0.02)
+        self.fr_distance_signal = self.telemetry.add_double('fr_distance', period=0.1, tolerance=0.01)
+        self.gyro_ready_signal = self.telemetry.add_bool('gyro_ready', period=0.5)
+        self.telemetry.add_dashboard_string('DB/String 0', 'Angle +=CCW: {:5.1f}', self.pose_signal, lambda pose: pose.rotation().degrees())
+        self.telemetry.add_dashboard_string('DB/String 1', 'x/forward (in): {:5.2f}', self.pose_signal, lambda pose: pose.X())
+        self.telemetry.add_dashboard_string('DB/String 2', 'y/left    (in): {:5.2f}', self.pose_signal, lambda pose: pose.Y())
+        self.telemetry.add_dashboard_string('DB/String 3', 'FR enc: {:5.2f}', self.fr_distance_signal, lambda inches: inches / DriveConsts.REV_TO_IN)
+
 
     ###########################################################################
     # Methods in base classes that we override here                           #
@@ -156,16 +201,19 @@ class DriveSubsystem(commands2.Subsystem):
         any commands run, so this is a good place to get the gyro angle once
         (a small optimization).
         (https://docs.wpilib.org/en/stable/docs/software/commandbased/command-scheduler.html)
+        Everything below, and the commands that run after, use the sensor
+        snapshot taken here, rather than reading the sensors again.
         """
+        self.gyro.update()
+        self.read_sensors()
+
         # Compute (estimate) robot position and store it.
-        self.pose = self.odometry.update(self.gyro.getRotation2d(), self.get_current_distances())
+        self.pose = self.odometry.update(self.sensors.gyro_rotation, self.sensors.distances)
 
-        # Send the heading angle to the dashboard
-        # TODO: implement shuffleboard
-        wpilib.SmartDashboard.putString('DB/String 0', 'Angle +=CCW: {:5.1f}'.format(self.pose.rotation().degrees()))
-        wpilib.SmartDashboard.putString('DB/String 1', 'x/forward (in): {:5.2f}'.format(self.pose.X()))
-        wpilib.SmartDashboard.putString('DB/String 2', 'y/left    (in): {:5.2f}'.format(self.pose.Y()))
-        wpilib.SmartDashboard.putString('DB/String 3', 'FR enc: {:5.2f}'.format(self.front_right_encoder.getPosition()))
+        # Hand the pose and an encoder to telemetry, which sends them later.
+        self.pose_signal.set(self.pose)
+        self.fr_distance_signal.set(self.sensors.distances.frontRight)
+        self.gyro_ready_signal.set(self.gyro.is_ready())
 
     def simulationPeriodic(self):
         """Called in simulation after periodic() to update simulation variables."""
@@ -201,6 +249,12 @@ class DriveSubsystem(commands2.Subsystem):
            :param: rot_ccw positive to rotate the robot counterclockwise as 
                    viewed from above. 
         """
+        # Which way is "away from the driver" isn't known until the gyro has
+        # calibrated, so hold still until then, rather than drive off wrongly.
+        if not self.gyro.is_ready():
+            self.drivetrain.stopMotor()
+            return
+
         # Negate the reported heading by converting to degrees, negating, and
         # creating a new Rotation2d object.
         heading_degrees = self.pose.rotation().degrees()
@@ -269,36 +323,47 @@ class DriveSubsystem(commands2.Subsystem):
     # Helper methods                                                          #
     ###########################################################################
 
-    def get_current_distances(self)-> wpimath.kinematics.MecanumDriveWheelPositions:
+    def read_sensors(self):
         """
-        Returns the current distances measured by the drivetrain.
-        :returns: MecanumDriveWheelPositions with rim distances in meters.
+        Read the gyro and every encoder's position and velocity, once, into
+        self.sensors.  Called at the start of periodic(); everything else
+        should use self.sensors rather than reading the hardware.
         """
-        # Start with an empty positions object that will be returned.
-        pos = wpimath.kinematics.MecanumDriveWheelPositions()
+        sensors = self.sensors
+        sensors.timestamp = wpilib.Timer.getFPGATimestamp()
+        sensors.gyro_rotation = self.gyro.getRotation2d()
+
+        # Fill in the positions converting to wheel rim distance traveled in inches.
+        distances = sensors.distances
+        distances.frontLeft = motor_rev_to_inches(self.front_left_encoder.getPosition())
+        distances.frontRight = motor_rev_to_inches(self.front_right_encoder.getPosition())
+        distances.rearLeft = motor_rev_to_inches(self.back_left_encoder.getPosition())
+        distances.rearRight = motor_rev_to_inches(self.back_right_encoder.getPosition())
 
-        # Fill in the positions.
-        pos.frontLeft = motor_rev_to_inches(self.front_left_encoder.getPosition())
-        pos.frontRight = motor_rev_to_inches(self.front_right_encoder.getPosition())
-        pos.rearLeft = motor_rev_to_inches(self.back_left_encoder.getPosition())
-        pos.rearRight = motor_rev_to_inches(self.back_right_encoder.getPosition())
+        # Fill in the speeds converting to wheel rim speed in inches/second.
+        speeds = sensors.speeds
+        speeds.frontLeft = motor_rpm_to_inches_per_sec(self.front_left_encoder.getVelocity())
+        speeds.frontRight = motor_rpm_to_inches_per_sec(self.front_right_encoder.getVelocity())
+        speeds.rearLeft = motor_rpm_to_inches_per_sec(self.back_left_encoder.getVelocity())
+        speeds.rearRight = motor_rpm_to_inches_per_sec(self.back_right_encoder.getVelocity())
 
-        return pos
+
+    def get_current_distances(self)-> wpimath.kinematics.MecanumDriveWheelPositions:
+        """
+        Returns the distances measured by the drivetrain this cycle.
+        :returns: MecanumDriveWheelPositions with rim distances in inches,
+                  from the sensor snapshot (see read_sensors()).
+        """
+        return self.sensors.distances
 
 
     def get_current_speeds(self)-> wpimath.kinematics.MecanumDriveWheelSpeeds:
         """
-        Returns the current speeds measured by the drivetrain.
-        :returns: MecanumDriveWheelSpeeds with rim speeds in meters/second.
+        Returns the speeds measured by the drivetrain this cycle.
+        :returns: MecanumDriveWheelSpeeds with rim speeds in inches/second,
+                  from the sensor snapshot (see read_sensors()).
         """
-        # Fill in the positions converting to wheel rim speed traveled in inches/second.
-        front_left_speed  = motor_rpm_to_inches_per_sec(self.front_left_encoder.getVelocity())
-        front_right_speed = motor_rpm_to_inches_per_sec(self.front_right_encoder.getVelocity())
-        rear_left_speed   = motor_rpm_to_inches_per_sec(self.back_left_encoder.getVelocity())
-        rear_right_speed  = motor_rpm_to_inches_per_sec(self.back_right_encoder.getVelocity())
-
-        return wpimath.kinematics.MecanumDriveWheelSpeeds(
-            front_left_speed, front_right_speed, rear_left_speed, rear_right_speed)
+        return self.sensors.speeds
     
 
     def get_heading_continuous_degrees(self) -> float:
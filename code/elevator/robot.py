@@ -7,6 +7,8 @@ import wpilib
 import wpilib.drive
 import wpimath.geometry
 import rev
+import canbudget
+import motorconfig
 
 class MAKORobot(wpilib.TimedRobot):
     # Defining constants to use across the class. (they aren't actually constant, but the convention is
@@ -52,16 +54,26 @@ class MAKORobot(wpilib.TimedRobot):
         config = rev.SparkMaxConfig()
         config.inverted(False)
         config.IdleMode(rev.SparkMax.IdleMode.kCoast)
-
-        # Configure left side and elevator as non-inverted.
-        self.drive_fl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_bl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.elevator.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        # We don't read anything from the drive motors (see canbudget.py).
+        canbudget.request('drive', config, count=4)
+
+        # Configure left side as non-inverted.
+        # Only saves to flash if the configuration changed (see motorconfig.py).
+        motorconfig.configure(self.drive_fl, config)
+        motorconfig.configure(self.drive_bl, config)
+
+        # The elevator is also non-inverted, but we read its encoder and bottom
+        # limit switch, so it gets its own configuration.
+        elevator_config = rev.SparkMaxConfig()
+        elevator_config.inverted(False)
+        elevator_config.IdleMode(rev.SparkMax.IdleMode.kCoast)
+        canbudget.request('elevator', elevator_config, primaryEncoderPosition=20, primaryEncoderVelocity=20, limits=20)
+        motorconfig.configure(self.elevator, elevator_config)
 
         # Invert and apply to the right side.
         config.inverted(True)
-        self.drive_fr.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_br.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        motorconfig.configure(self.drive_fr, config)
+        motorconfig.configure(self.drive_br, config)
 
         # Now that we have motors, we can set up an object that will handle mecanum drive.
         # From the documentation, North, East, and Down are the three axes.
@@ -74,6 +86,9 @@ class MAKORobot(wpilib.TimedRobot):
         self.elev_bottom_switch = self.elevator.getReverseLimitSwitch(rev.SparkMaxLimitSwitch.Type.kNormallyOpen)
         self.elevator_control_state = self.ELEV_MANUAL
 
+        # Print the CAN bus budget, and keep an eye on it.
+        canbudget.start(self)
+
     def disabledInit(self):
         """This function gets called once when the robot is disabled.
            In the past, we have not used this function, but it could occasionally
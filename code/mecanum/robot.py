@@ -7,6 +7,8 @@ import wpimath.geometry
 import wpilib
 import wpilib.drive
 import rev
+import canbudget
+import motorconfig
 
 class MAKORobot(wpilib.TimedRobot):
     def robotInit(self):
@@ -43,21 +45,27 @@ class MAKORobot(wpilib.TimedRobot):
         config = rev.SparkMaxConfig()
         config.inverted(False)
         config.IdleMode(rev.SparkMax.IdleMode.kCoast)
+        # We don't read anything from the drive motors (see canbudget.py).
+        canbudget.request('drive', config, count=4)
 
         # Configure left side and elevator as non-inverted.
-        self.drive_fl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_bl.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        # Only saves to flash if the configuration changed (see motorconfig.py).
+        motorconfig.configure(self.drive_fl, config)
+        motorconfig.configure(self.drive_bl, config)
 
         # Invert and apply to the right side.
         config.inverted(True)
-        self.drive_fr.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
-        self.drive_br.configure(config, rev.ResetMode.kResetSafeParameters, rev.PersistMode.kPersistParameters)
+        motorconfig.configure(self.drive_fr, config)
+        motorconfig.configure(self.drive_br, config)
 
         # Now that we have motors, we can set up an object that will handle mecanum drive.
         # From the documentation, North, East, and Down are the three axes.
         # Positive X is forward, Positive Y is right, Positive Z is down.  Clockwise rotation around Z (as viewed from ___) is positive.
         self.drivetrain = wpilib.drive.MecanumDrive(self.drive_fl, self.drive_bl, self.drive_fr, self.drive_br)
 
+        # Print the CAN bus budget, and keep an eye on it.
+        canbudget.start(self)
+
     def disabledInit(self):
         """This function gets called once when the robot is disabled.
            In the past, we have not used this function, but it could occasionally
@@ -29,9 +29,9 @@ class SPILink(pixy2api.links.link.Link):
         # Use the value to open the port and configure it.
         self.spi = wpilib.SPI(spi_port)
         self.spi.setClockRate(SPILink.PIXY_SPI_CLOCKRATE)
-        self.spi.setMSBFirst()
-        self.spi.setSampleDataOnTrailingEdge()
-        self.spi.setClockActiveLow()
+        # Pixy2 uses SPI mode 3: clock idles high, data sampled on the trailing (rising) edge,
+        # most significant bit first (which wpilib.SPI always uses).
+        self.spi.setMode(wpilib.SPI.Mode.kMode3)
         self.spi.setChipSelectActiveLow()
 
     # def open(self, link_arg):
@@ -31,6 +31,7 @@ import enum, time
 import wpilib
 import pixy2api.pixy2ccc
 import pixy2api.links.spilink
+import pixy2api.links.simlink
 
 # Next steps:
 # Test color connected components with more than one object.
@@ -81,6 +82,7 @@ class Pixy2(object):
         SPI = 0
         I2C = 1
         UART = 2
+        SIM = 3   # An emulated Pixy2 for simulation, see links/simlink.py.
 
     def __init__(self, link_type, link_sel = 0):
         """Constructs Pixy2 object with link type and selection of which of that type.
@@ -91,10 +93,13 @@ class Pixy2(object):
                                  For MXP, configure Pixy2 to use "Arduino ICSP SPI" (which doesn't use a chip select).  Leave the CS pin disconnected.
                             I2C: 0 (or anything else) for the on-board I2C, 1 for the MXP connector.
                             UART: 0 for onboard, 1-3 for USB, 4 for MXP connector.
+                            SIM:  ignored.
         Call init() after creation and before anything else to start communication with Pixy2.
         """
         if link_type == Pixy2.LinkType.SPI:
             self.link = pixy2api.links.spilink.SPILink(link_sel)
+        elif link_type == Pixy2.LinkType.SIM:
+            self.link = pixy2api.links.simlink.SimLink(link_sel)
         # elif link_type == Pixy2.LinkType.I2C:
         #     self.link = links.I2CLink(link_arg)
         # else:
@@ -6,6 +6,9 @@
 import time
 import wpilib
 import pixy2api.pixy2
+import vision_exposure
+import vision_publisher
+import vision_recorder
 
 class MAKORobot(wpilib.TimedRobot):
     def robotInit(self):
@@ -19,6 +22,12 @@ class MAKORobot(wpilib.TimedRobot):
         self.pixy = pixy2api.pixy2.Pixy2(pixy2api.pixy2.Pixy2.LinkType.SPI, 4)
         self.pixy.init() # Need to call init() to start communication with the Pixy2.
         print('FPS: {}'.format(self.pixy.getFPS()))
+        # Adjusts camera brightness and the lamp from the frames we request, instead of setting them in PixyMon.
+        self.exposure = vision_exposure.ExposureController(self.pixy)
+        # Sends blocks and the selected target to NetworkTables as structs for dashboards and other programs.
+        self.publisher = vision_publisher.VisionPublisher('Pixy', min_aspect=2.0)
+        # Records every frame to a file for reviewing after the match (see vision_analysis.py).
+        self.recorder = vision_recorder.VisionRecorder()
         #print('lamp white: {}'.format(self.pixy.setLamp(1,0)))
         # print('led rgb: {}'.format(self.pixy.setLED(red=0,green=255,blue=0)))
         # print('lamp on rgb: {}'.format(self.pixy.setLamp(0,1)))
@@ -28,7 +37,7 @@ class MAKORobot(wpilib.TimedRobot):
            In the past, we have not used this function, but it could occasionally
            be useful.  In this case, we reset some SmartDashboard values.
         """
-        pass
+        self.recorder.flush() # So the recording is complete on disk between matches.
 
     def disabledPeriodic(self):
         """Another function we have not used in the past.  Adding for completeness."""
@@ -50,20 +59,31 @@ class MAKORobot(wpilib.TimedRobot):
     def teleopPeriodic(self):
         """This function is called periodically during teleop."""
 
-        # The timer's hasPeriodPassed() method returns true if the time has passed, and updates
+        # See if Pixy has found any color connected components with signature 1, up to 10.
+        # Ask every loop so the exposure controller sees every frame.
+        # lazy=True means blocks are only decoded from Pixy's response when we look at them.
+        num_blocks = self.pixy.getCCC().getBlocks(wait=False, sigmap=0x01, maxBlocks=10, lazy=True)
+        frame_time = wpilib.Timer.getFPGATimestamp()
+        # Only sends when there is a new, different frame.
+        self.publisher.publish(num_blocks, self.pixy.getCCC().getBlockCache(), frame_time)
+        self.recorder.record_frame(num_blocks, self.pixy.getCCC().getBlockCache(), frame_time)
+
+        # Human-readable version for the Basic tab of the driver station dashboard, once per second.
+        # The timer's advanceIfElapsed() method returns true if the time has passed, and updates
         # the timer's internal "start time".  This period is 1.0 seconds.
-        if self.print_timer.hasPeriodPassed(1.0):
-            # See if Pixy has found any color connected components with signature 1, up to 10.
-            num_blocks = self.pixy.getCCC().getBlocks(wait=False, sigmap=0x01, maxBlocks=10)
+        if self.print_timer.advanceIfElapsed(1.0):
             wpilib.SmartDashboard.putString('DB/String 0', 'num blocks: {}'.format(num_blocks))
             if num_blocks > 0:
                 blocks = self.pixy.getCCC().getBlockCache()
                 wpilib.SmartDashboard.putString('DB/String 1', 'posx,y  sizex,y [asp] idx')
 
                 # Split the list of blocks by their aspect ratio.  They are already sorted largest area to smallest by Pixy.
+                # Index the cache rather than iterating over it: iteration reuses one view object, so
+                # it can't be stored in a list.
                 accepted_blocks = []
                 rejected_blocks = []
-                for block in blocks:
+                for i in range(num_blocks):
+                    block = blocks[i]
                     if block.getHeight() / block.getWidth() >= 2.0:
                         accepted_blocks.append(block)
                     else:
@@ -82,6 +102,9 @@ class MAKORobot(wpilib.TimedRobot):
             for i in range(num_blocks+2, 10):
                 wpilib.SmartDashboard.putString('DB/String {}'.format(i), '')
 
+        # Last, because a brightness or lamp command overwrites the blocks in Pixy's response buffer.
+        self.exposure.update(num_blocks, self.pixy.getCCC().getBlockCache())
+
 # The following little bit of code allows us to run the robot program.
 # In Python, the special variable __name__ contains the name of the module that it is in,
 # or since this file is 'robot.py', it would ordinarily be 'robot'.  The exception
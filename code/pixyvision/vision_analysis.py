@@ -0,0 +1,155 @@
+# !/usr/bin/env python3
+"""
+    Analysis of Pixy2 vision recordings made by vision_recorder.py.
+
+    load() maps a recording into memory as a NumPy structured array, one element per frame,
+    so a whole match is available with no parsing.  analyze() then computes, for the match:
+        * Frame timing: frame rate and the jitter in time between frames.
+        * Per-signature detection rate: the fraction of frames with at least one block of that signature.
+        * Tracks: Pixy2 gives each object it follows a tracking index, kept from frame to frame.
+          A track is a run of consecutive frames with the same index.  Lifetimes are reported in
+          frames and seconds, along with the frame-to-frame movement of the block's center
+          (for a target that isn't moving, this is the position jitter).
+
+    From a command prompt, to print a summary of one or more recordings:
+        python vision_analysis.py vision_logs/*.pxr
+
+    This runs on a desktop computer, not the robot, and needs NumPy there ("pip install numpy").
+"""
+
+import sys
+import numpy as np
+import vision_recorder
+
+# One block, as Pixy2 sends it.
+BLOCK_DTYPE = np.dtype([('signature', '<u2'), ('x', '<u2'), ('y', '<u2'),
+                        ('width', '<u2'), ('height', '<u2'), ('angle', '<i2'),
+                        ('index', 'u1'), ('age', 'u1')])
+
+def record_dtype(max_blocks):
+    """:returns the dtype of one record in a file holding max_blocks blocks per frame."""
+    return np.dtype([('timestamp', '<f8'), ('frame', '<u4'), ('count', 'u1'), ('pad', 'V3'),
+                     ('blocks', BLOCK_DTYPE, (max_blocks,))])
+
+def load(path):
+    """
+    Map a recording into memory.  Nothing is read until the array is used.
+    A partly written last record (if the robot lost power) is ignored.
+    :param path: file written by VisionRecorder.
+    :returns structured array of records, with fields timestamp, frame, count, and blocks.
+             blocks has shape (frames, max_blocks); only the first count blocks of each frame are valid.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(vision_recorder.HEADER_SIZE)
+        f.seek(0, 2)
+        size = f.tell()
+    if len(header) < vision_recorder.HEADER_SIZE:
+        raise ValueError('{}: too short to be a vision recording'.format(path))
+    magic, version, max_blocks, record_size, _ = vision_recorder.HEADER.unpack(header)
+    if magic != vision_recorder.MAGIC or version != vision_recorder.VERSION:
+        raise ValueError('{}: not a version {} vision recording'.format(path, vision_recorder.VERSION))
+    dtype = record_dtype(max_blocks)
+    if dtype.itemsize != record_size:
+        raise ValueError('{}: record size {} does not match {} blocks'.format(path, record_size, max_blocks))
+
+    frames = (size - vision_recorder.HEADER_SIZE) // record_size
+    if frames == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=vision_recorder.HEADER_SIZE, shape=(frames,))
+
+def analyze(records):
+    """
+    Compute the statistics for one recording.
+    :param records: array from load().
+    :returns a dictionary:
+        'frames':       number of frames
+        'duration':     seconds from first to last frame
+        'frame_rate':   mean frames per second
+        'interval_std', 'interval_max': standard deviation and maximum of the time between frames, in seconds
+        'signatures':   {signature: {'detection_rate', 'tracks', 'lifetime_frames', 'lifetime_seconds',
+                                     'jitter_x', 'jitter_y'}}
+                        lifetime_* are the mean track lifetimes, jitter_* the RMS change in the block's
+                        center from one frame to the next within a track, in pixels.
+    """
+    n = len(records)
+    timestamps = np.asarray(records['timestamp'])
+    stats = {'frames': n, 'duration': 0.0, 'frame_rate': 0.0,
+             'interval_std': 0.0, 'interval_max': 0.0, 'signatures': {}}
+    if n == 0:
+        return stats
+    if n > 1:
+        intervals = np.diff(timestamps)
+        stats['duration'] = float(timestamps[-1] - timestamps[0])
+        stats['frame_rate'] = (n - 1) / stats['duration'] if stats['duration'] > 0 else 0.0
+        stats['interval_std'] = float(intervals.std())
+        stats['interval_max'] = float(intervals.max())
+
+    # Flatten the valid blocks into one array, in frame order, remembering each one's frame.
+    blocks = np.asarray(records['blocks'])
+    valid = np.arange(blocks.shape[1]) < np.asarray(records['count'])[:, None]
+    frame_of = np.nonzero(valid)[0]
+    flat = blocks[valid]
+    if len(flat) == 0:
+        return stats
+
+    # Detection rate: frames with at least one block of the signature.  Frame and signature
+    # pairs are deduplicated, since a frame can have several blocks of one signature.
+    sigs, sig_of = np.unique(flat['signature'], return_inverse=True)
+    seen = np.zeros((n, len(sigs)), dtype=bool)
+    seen[frame_of, sig_of] = True
+    detection_rate = seen.mean(axis=0)
+
+    # Tracks: sort by tracking index, then frame.  A track starts wherever the index
+    # changes or a frame is skipped.
+    order = np.lexsort((frame_of, flat['index']))
+    t_frame = frame_of[order]
+    t_index = flat['index'][order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (t_index[1:] != t_index[:-1]) | (t_frame[1:] != t_frame[:-1] + 1)
+    track_of = np.cumsum(starts) - 1
+    first = np.nonzero(starts)[0]
+    last = np.append(first[1:], len(order)) - 1
+    lifetime_frames = last - first + 1
+    lifetime_seconds = timestamps[t_frame[last]] - timestamps[t_frame[first]]
+    track_sig = sig_of[order][first] # Signature of each track, as an index into sigs.
+
+    # Movement from one frame to the next within a track.
+    x = flat['x'][order].astype(float)
+    y = flat['y'][order].astype(float)
+    step = ~starts[1:] # True where consecutive entries are in the same track.
+    step_sig = track_sig[track_of[1:][step]]
+    dx2 = np.diff(x)[step] ** 2
+    dy2 = np.diff(y)[step] ** 2
+    steps = np.bincount(step_sig, minlength=len(sigs))
+    jitter_x = np.sqrt(np.bincount(step_sig, dx2, minlength=len(sigs)) / np.maximum(steps, 1))
+    jitter_y = np.sqrt(np.bincount(step_sig, dy2, minlength=len(sigs)) / np.maximum(steps, 1))
+
+    tracks = np.bincount(track_sig, minlength=len(sigs))
+    mean_frames = np.bincount(track_sig, lifetime_frames, minlength=len(sigs)) / tracks
+    mean_seconds = np.bincount(track_sig, lifetime_seconds, minlength=len(sigs)) / tracks
+
+    for i, sig in enumerate(sigs):
+        stats['signatures'][int(sig)] = {
+            'detection_rate': float(detection_rate[i]),
+            'tracks': int(tracks[i]),
+            'lifetime_frames': float(mean_frames[i]),
+            'lifetime_seconds': float(mean_seconds[i]),
+            'jitter_x': float(jitter_x[i]),
+            'jitter_y': float(jitter_y[i]),
+        }
+    return stats
+
+def summary(path):
+    """:returns a printable summary of the recording at path."""
+    stats = analyze(load(path))
+    lines = ['{}: {} frames over {:.1f} s, {:.1f} fps, interval std {:.1f} ms, max {:.1f} ms'.format(
+        path, stats['frames'], stats['duration'], stats['frame_rate'],
+        stats['interval_std'] * 1000, stats['interval_max'] * 1000)]
+    for sig, s in sorted(stats['signatures'].items()):
+        lines.append('  sig {:5d}: detected {:5.1%}  {:4d} tracks  lifetime {:6.1f} frames {:5.2f} s  jitter x {:4.1f} y {:4.1f} px'.format(
+            sig, s['detection_rate'], s['tracks'], s['lifetime_frames'], s['lifetime_seconds'], s['jitter_x'], s['jitter_y']))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        print(summary(path))
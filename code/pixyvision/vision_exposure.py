@@ -0,0 +1,183 @@
+"""
+    Closed-loop brightness control for the Pixy2 camera.
+
+    Class ExposureController watches the results of the color connected components (CCC)
+    frames that the robot is already requesting, and nudges the camera brightness (and
+    the white lamp) to keep the targets detected.  Until now, brightness was set by hand
+    in PixyMon, which has to be redone every time the lighting changes.
+
+    The controller does not talk to Pixy2 on every frame.  It collects statistics over a
+    window of frames and only sends a command after UPDATE_PERIOD seconds, and only if
+    the detection score is outside a hysteresis band.  Because the SPI link is not shared
+    safely between threads, call update() from the same code that calls getBlocks().
+"""
+
+import wpilib
+import pixy2api.pixy2
+
+
+class ExposureController():
+    """Adjusts Pixy2 brightness and lamp state from the statistics of recent CCC frames."""
+
+    # Brightness limits and step size (Pixy2 brightness is 0-255).
+    BRIGHTNESS_MIN = 20
+    BRIGHTNESS_MAX = 240
+    BRIGHTNESS_STEP = 10
+
+    # Number of frames in the statistics window, and minimum time between commands to Pixy2, in seconds.
+    WINDOW_FRAMES = 30
+    UPDATE_PERIOD = 1.0
+
+    # Hysteresis band on the score (0-1).  Start adjusting when the score drops below SCORE_LOW,
+    # and stop once it climbs above SCORE_HIGH.
+    SCORE_LOW = 0.75
+    SCORE_HIGH = 0.9
+
+    # Score penalties.  More than EXPECTED_BLOCKS blocks per frame usually means the image is
+    # overexposed and background is matching the signature.  Area jitter means the target is
+    # near the edge of the signature's color range.
+    EXPECTED_BLOCKS = 2
+    EXTRA_BLOCK_PENALTY = 0.05
+    AREA_JITTER_PENALTY = 0.5
+
+    def __init__(self, pixy, brightness=128, lamp_on=False):
+        """
+        :param pixy: a Pixy2 object that has already had init() called.
+        :param brightness: starting brightness, 0-255.  Sent to Pixy2 right away.
+        :param lamp_on: starting state of the white lamp.  Sent to Pixy2 right away.
+        """
+        self.pixy = pixy
+        self.brightness = int(brightness)
+        self.lamp_on = lamp_on
+
+        # Fixed-size ring buffers of per-frame statistics, and the index of the next slot to fill.
+        self.detected = [False] * ExposureController.WINDOW_FRAMES
+        self.counts = [0] * ExposureController.WINDOW_FRAMES
+        self.areas = [0] * ExposureController.WINDOW_FRAMES
+        self.frame_index = 0
+        self.num_frames = 0 # Frames collected since the last evaluation, up to WINDOW_FRAMES.
+
+        # Search state: which way the last brightness step went, and the score before it.
+        self.direction = 1
+        self.last_score = None
+        self.adjusting = False
+        self.score = 1.0
+
+        self.last_update_time = wpilib.Timer.getFPGATimestamp()
+        self.pixy.setCameraBrightness(self.brightness)
+        self.pixy.setLamp(1 if self.lamp_on else 0, 0)
+
+    def update(self, num_blocks, blocks=None):
+        """
+        Call after every getBlocks() with its return value and the block cache.
+        Since this may send a command to Pixy2, which reuses the response buffer, finish
+        using a lazy block cache before calling this method.
+        :param num_blocks: return value from getBlocks(): number of blocks or a Pixy2 error code.
+        :param blocks: the block cache from getBlockCache(), largest block first.
+        :returns True if a command was sent to Pixy2.
+        """
+        if num_blocks == pixy2api.pixy2.Pixy2.PIXY_RESULT_BUSY:
+            return False # No new frame, so nothing to learn from.
+
+        # Record this frame.  Errors count as frames where nothing was detected.
+        i = self.frame_index
+        if num_blocks > 0 and blocks is not None:
+            largest = blocks[0]
+            self.detected[i] = True
+            self.counts[i] = num_blocks
+            self.areas[i] = largest.width * largest.height
+        else:
+            self.detected[i] = False
+            self.counts[i] = 0
+            self.areas[i] = 0
+        self.frame_index = (i + 1) % ExposureController.WINDOW_FRAMES
+        if self.num_frames < ExposureController.WINDOW_FRAMES:
+            self.num_frames += 1
+
+        # Rate-limit evaluation, and wait for a full window of frames.
+        now = wpilib.Timer.getFPGATimestamp()
+        if now - self.last_update_time < ExposureController.UPDATE_PERIOD or self.num_frames < ExposureController.WINDOW_FRAMES:
+            return False
+        self.last_update_time = now
+        self.num_frames = 0 # Start a new window, so the next evaluation sees the effect of this one's change.
+        return self.evaluate()
+
+    def evaluate(self):
+        """Compute the score of the present window and step brightness or the lamp if needed.
+        :returns True if a command was sent to Pixy2."""
+        self.score = self.compute_score()
+
+        # Hysteresis: only start adjusting below the low threshold, and keep going until above the high one.
+        if self.adjusting and self.score >= ExposureController.SCORE_HIGH:
+            self.adjusting = False
+        elif not self.adjusting and self.score < ExposureController.SCORE_LOW:
+            self.adjusting = True
+            self.last_score = None
+        if not self.adjusting:
+            return False
+
+        # Hill climb: keep stepping the same way while the score improves, otherwise reverse.
+        # Too many blocks is a clear sign of overexposure, so go darker regardless.
+        if self.mean_count() > ExposureController.EXPECTED_BLOCKS:
+            self.direction = -1
+        elif self.last_score is not None and self.score < self.last_score:
+            self.direction = -self.direction
+        self.last_score = self.score
+
+        brightness = self.brightness + self.direction * ExposureController.BRIGHTNESS_STEP
+        if brightness > ExposureController.BRIGHTNESS_MAX:
+            # As bright as we want to go.  Light the scene instead, and start over from the middle.
+            if not self.lamp_on:
+                return self.set_lamp(True)
+            brightness = ExposureController.BRIGHTNESS_MAX
+            self.direction = -1
+        elif brightness < ExposureController.BRIGHTNESS_MIN:
+            # As dark as we want to go.  Turn off the lamp if it is on.
+            if self.lamp_on:
+                return self.set_lamp(False)
+            brightness = ExposureController.BRIGHTNESS_MIN
+            self.direction = 1
+        return self.set_brightness(brightness)
+
+    def compute_score(self):
+        """Score the window from 0 (nothing useful) to 1 (target seen steadily in every frame).
+        :returns the score."""
+        n = ExposureController.WINDOW_FRAMES
+        seen = [self.areas[i] for i in range(n) if self.detected[i]]
+        if not seen:
+            return 0.0
+        detection_rate = len(seen) / n
+
+        # Area jitter as the coefficient of variation (standard deviation / mean) of the largest block's area.
+        mean_area = sum(seen) / len(seen)
+        variance = sum((a - mean_area) ** 2 for a in seen) / len(seen)
+        area_jitter = (variance ** 0.5) / mean_area if mean_area > 0 else 1.0
+
+        extra_blocks = max(0.0, self.mean_count() - ExposureController.EXPECTED_BLOCKS)
+        score = detection_rate - ExposureController.AREA_JITTER_PENALTY * area_jitter \
+                - ExposureController.EXTRA_BLOCK_PENALTY * extra_blocks
+        return max(0.0, min(1.0, score))
+
+    def mean_count(self):
+        """:returns the mean number of blocks per frame over the window."""
+        return sum(self.counts) / ExposureController.WINDOW_FRAMES
+
+    def set_brightness(self, brightness):
+        """Send a new brightness to Pixy2.
+        :returns True if the command succeeded."""
+        res = self.pixy.setCameraBrightness(brightness)
+        if res < 0:
+            return False
+        self.brightness = brightness
+        return True
+
+    def set_lamp(self, on):
+        """Turn the white lamp on or off, leaving the RGB LED off.  Resets brightness to the middle of
+        its range, since the lamp changes the scene a lot.
+        :returns True if the command succeeded."""
+        res = self.pixy.setLamp(1 if on else 0, 0)
+        if res < 0:
+            return False
+        self.lamp_on = on
+        self.last_score = None
+        return self.set_brightness((ExposureController.BRIGHTNESS_MIN + ExposureController.BRIGHTNESS_MAX) // 2)
@@ -0,0 +1,116 @@
+"""
+    Publishing Pixy2 color connected components (CCC) results to NetworkTables.
+
+    Class VisionPublisher sends the blocks and the selected target as WPILib structs
+    through typed NetworkTables publishers, rather than as formatted 'DB/String N'
+    text.  Dashboards (AdvantageScope, Glass) and coprocessors can decode them
+    directly, and nothing is sent unless the frame has changed.
+
+    The published topics are, under the table name given to VisionPublisher:
+        blocks - PixyBlock[] with every block in the frame, largest first.
+        target - PixyTarget with the selected block, and valid = False if there is none.
+    Both are stamped with the time the frame was received.
+"""
+
+import dataclasses
+import ntcore
+import wpilib
+import wpiutil.wpistruct
+import pixy2api.pixy2
+import pixy2api.pixy2ccc
+
+###############################################
+# Struct definitions, see wpiutil.wpistruct.make_wpistruct().
+###############################################
+
+@wpiutil.wpistruct.make_wpistruct(name='PixyBlock')
+@dataclasses.dataclass
+class PixyBlock:
+    """One CCC block, with the same fields as Pixy2CCC.Block."""
+    signature: wpiutil.wpistruct.uint16
+    x: wpiutil.wpistruct.uint16
+    y: wpiutil.wpistruct.uint16
+    width: wpiutil.wpistruct.uint16
+    height: wpiutil.wpistruct.uint16
+    angle: wpiutil.wpistruct.int16
+    index: wpiutil.wpistruct.uint8
+    age: wpiutil.wpistruct.uint8
+
+@wpiutil.wpistruct.make_wpistruct(name='PixyTarget')
+@dataclasses.dataclass
+class PixyTarget:
+    """The block chosen as the target, with the FPGA time (seconds) of the frame it came from."""
+    timestamp: wpiutil.wpistruct.double
+    valid: bool
+    signature: wpiutil.wpistruct.uint16
+    x: wpiutil.wpistruct.uint16
+    y: wpiutil.wpistruct.uint16
+    width: wpiutil.wpistruct.uint16
+    height: wpiutil.wpistruct.uint16
+    index: wpiutil.wpistruct.uint8
+
+###############################################
+
+class VisionPublisher():
+    """Publishes CCC frames to NetworkTables as structs, only when the frame changes."""
+
+    def __init__(self, table_name='Pixy', min_aspect=2.0):
+        """
+        :param table_name: NetworkTables table to publish under.
+        :param min_aspect: the target is the largest block with height/width of at least this.
+        """
+        self.min_aspect = min_aspect
+        table = ntcore.NetworkTableInstance.getDefault().getTable(table_name)
+        self.blocks_pub = table.getStructArrayTopic('blocks', PixyBlock).publish()
+        self.target_pub = table.getStructTopic('target', PixyTarget).publish()
+
+        # A copy of the last published frame, to detect changes.
+        self.last_frame = None
+        self.last_count = -1
+
+    def publish(self, num_blocks, blocks, timestamp=None):
+        """
+        Call after every getBlocks() with its return value and the block cache.
+        :param num_blocks: return value from getBlocks(): number of blocks or a Pixy2 error code.
+        :param blocks: the block cache from getBlockCache(), either a list of Blocks or a BlockCacheView.
+        :param timestamp: FPGA time in seconds that the frame was received.  Defaults to now.
+        :returns True if anything was published.
+        """
+        if num_blocks == pixy2api.pixy2.Pixy2.PIXY_RESULT_BUSY:
+            return False # No new frame.
+        if blocks is None:
+            blocks = []
+        if num_blocks < 0:
+            num_blocks = 0 # Treat errors as a frame with nothing in it.
+
+        # Skip identical frames.  For a lazy BlockCacheView, compare the response bytes themselves
+        # (this copies nothing); for a list of Blocks, compare their fields.
+        if isinstance(blocks, pixy2api.pixy2ccc.Pixy2CCC.BlockCacheView):
+            frame = blocks.buffer[:num_blocks * pixy2api.pixy2ccc.Pixy2CCC.CCC_BLOCK_SIZE]
+        else:
+            frame = [(b.signature, b.x, b.y, b.width, b.height, b.angle, b.index, b.age) for b in blocks[:num_blocks]]
+        if num_blocks == self.last_count and frame == self.last_frame:
+            return False
+        self.last_frame = bytearray(frame) if isinstance(frame, memoryview) else frame
+        self.last_count = num_blocks
+
+        if timestamp is None:
+            timestamp = wpilib.Timer.getFPGATimestamp()
+        nt_time = int(timestamp * 1000000) # NetworkTables uses microseconds.
+
+        block_structs = []
+        target = None
+        for i in range(num_blocks):
+            b = blocks[i]
+            angle = b.angle
+            if angle >= 0x8000:
+                angle -= 0x10000 # Pixy2 sends a signed angle; Pixy2CCC decodes it as unsigned.
+            block_structs.append(PixyBlock(b.signature, b.x, b.y, b.width, b.height, angle, b.index, b.age))
+            if target is None and b.width > 0 and b.height / b.width >= self.min_aspect:
+                target = PixyTarget(timestamp, True, b.signature, b.x, b.y, b.width, b.height, b.index)
+        if target is None:
+            target = PixyTarget(timestamp, False, 0, 0, 0, 0, 0, 0)
+
+        self.blocks_pub.set(block_structs, nt_time)
+        self.target_pub.set(target, nt_time)
+        return True
@@ -0,0 +1,106 @@
+"""
+    Recording decoded Pixy2 color connected components (CCC) frames to a file.
+
+    Class VisionRecorder writes one fixed-size record per frame, so a whole match can
+    later be loaded as NumPy arrays with no parsing (see vision_analysis.py).  The
+    block bytes are copied straight from Pixy2's response, which already uses the
+    layout below.
+
+    File layout (all little endian):
+        Header, HEADER_SIZE bytes:
+            4s  magic, b'PXYR'
+            H   format version
+            H   maximum blocks per record
+            I   record size in bytes
+            I   reserved (0)
+        Records, one per frame:
+            d   FPGA timestamp in seconds
+            I   frame number (counts every frame recorded)
+            B   number of blocks in this record
+            3x  padding
+            MAX_BLOCKS blocks, unused ones zero-filled, each:
+                H signature, H x, H y, H width, H height, h angle, B index, B age
+"""
+
+import os
+import struct
+import time
+import wpilib
+import pixy2api.pixy2ccc
+
+MAGIC = b'PXYR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+HEADER_SIZE = HEADER.size
+RECORD_HEADER = struct.Struct('<dIB3x')
+BLOCK_SIZE = pixy2api.pixy2ccc.Pixy2CCC.CCC_BLOCK_SIZE
+MAX_BLOCKS = 10
+
+###############################################
+
+class VisionRecorder():
+    """Appends one fixed-size record per CCC frame to a file."""
+
+    def __init__(self, path=None, max_blocks=MAX_BLOCKS):
+        """
+        :param path: file to write.  Defaults to a new, time-stamped file in vision_logs/
+                     under the robot program's operating directory (/home/lvuser on the roboRIO).
+        :param max_blocks: blocks stored per frame.  Extra blocks (the smallest ones) are dropped.
+        """
+        if path is None:
+            folder = os.path.join(wpilib.getOperatingDirectory(), 'vision_logs')
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, time.strftime('vision_%Y%m%d_%H%M%S.pxr'))
+        self.path = path
+        self.max_blocks = max_blocks
+        self.record_size = RECORD_HEADER.size + max_blocks * BLOCK_SIZE
+        self.record = bytearray(self.record_size) # Reused for every frame.
+        self.zeros = memoryview(bytes(self.record_size)) # For zeroing unused blocks without allocating.
+        self.frame = 0
+
+        # Buffered, so most frames don't touch the file system.
+        self.file = open(path, 'wb', buffering=64 * 1024)
+        self.file.write(HEADER.pack(MAGIC, VERSION, max_blocks, self.record_size, 0))
+
+    def record_frame(self, num_blocks, blocks, timestamp=None):
+        """
+        Call after every getBlocks() with its return value and the block cache.
+        Busy results and errors are not frames, so they are not recorded.
+        :param num_blocks: return value from getBlocks(): number of blocks or a Pixy2 error code.
+        :param blocks: the block cache from getBlockCache(), either a list of Blocks or a BlockCacheView.
+        :param timestamp: FPGA time in seconds that the frame was received.  Defaults to now.
+        :returns True if the frame was recorded.
+        """
+        if num_blocks < 0 or self.file is None:
+            return False
+        if timestamp is None:
+            timestamp = wpilib.Timer.getFPGATimestamp()
+        count = min(num_blocks, self.max_blocks)
+        record = self.record
+        RECORD_HEADER.pack_into(record, 0, timestamp, self.frame, count)
+
+        start = RECORD_HEADER.size
+        end = start + count * BLOCK_SIZE
+        if isinstance(blocks, pixy2api.pixy2ccc.Pixy2CCC.BlockCacheView):
+            record[start:end] = blocks.buffer[:count * BLOCK_SIZE] # Already in the file's layout.
+        else:
+            for i in range(count):
+                b = blocks[i]
+                struct.pack_into('<HHHHHHBB', record, start + i * BLOCK_SIZE,
+                                 b.signature, b.x, b.y, b.width, b.height, b.angle & 0xFFFF, b.index, b.age)
+        record[end:] = self.zeros[end:] # Zero the unused blocks.
+
+        self.file.write(record)
+        self.frame += 1
+        return True
+
+    def flush(self):
+        """Push buffered records to the file, for instance when the robot is disabled."""
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        """Flush and close the file.  Further frames are ignored."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,131 @@
+# !/usr/bin/env python3
+"""
+    Comparing color classifiers on recorded sessions, without the robot.
+
+    Each classifier in CANDIDATES is run over every sample of each log (from color_log.ColorRecorder),
+    with its own ColorSampler playing the log back.  (color_sim.py runs them on simulated samples instead.)
+    For each, the report gives:
+        accuracy:     fraction of labeled samples where the classifier's color matched the label.
+        us/sample:    CPU time per sample in microseconds, for the classifier's own work.
+        resets:       password resets while the labeled color was still a valid part of the password,
+                      i.e. resets caused by misreading (password checkers only).
+        passwords:    number of times the password was completed (password checkers only).
+
+    From a command prompt:
+        python color_benchmark.py color_logs/*.clr
+    To try a new classifier, add a class like the ones below to CANDIDATES.
+"""
+
+import contextlib
+import io
+import sys
+import time
+import color_log
+import color_sampler
+import color_util
+
+###############################################
+# Candidates.  Each one is made with the sampler to use, and has:
+#   step(): process the next sample, returning the ColorID it thinks the sample is.
+#   false_resets, passwords: counts, or None if they don't apply.
+###############################################
+
+class HandlerCandidate():
+    name = 'Color_Handler'
+
+    def __init__(self, sampler):
+        self.handler = color_util.Color_Handler(sampler)
+        self.false_resets = None
+        self.passwords = None
+
+    def step(self):
+        self.handler.get_and_match()
+        return self.handler.matched_id
+
+class Password2Candidate():
+    name = 'Color_Password2'
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+        self.password = color_util.Color_Password2(sampler=sampler)
+        self.false_resets = 0
+        self.passwords = 0
+
+    def step(self):
+        index = self.password.pwd_index
+        (complete, detected, matched) = self.password.check()
+        ids = self.password.pwd_ids
+        if 0 < index < len(ids) and self.password.pwd_index == 0:
+            # A reset in the middle of the password.  It was false if the operator was still showing
+            # the color just found or the next one.
+            label = self.sampler.source.label
+            if label in (ids[index - 1], ids[index]):
+                self.false_resets += 1
+        if index < len(ids) and self.password.pwd_index == len(ids):
+            self.passwords += 1
+        return self.password.matched_id
+
+class FilterCandidate():
+    name = 'ColorFilter'
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+        self.classifier = color_util.default_classifier()
+        self.color_filter = color_util.ColorFilter(radii=self.classifier.radius_list)
+        self.false_resets = None
+        self.passwords = None
+
+    def step(self):
+        sample = self.sampler.get_latest()
+        (color_id, distance) = self.classifier.classify(sample, reject=False)
+        self.color_filter.update(sample.timestamp, color_id, distance)
+        stable = self.color_filter.stable_id
+        return color_util.ColorID.OTHER if stable is None else stable
+
+CANDIDATES = [HandlerCandidate, Password2Candidate, FilterCandidate]
+
+###############################################
+
+def run(source, candidate_class):
+    """
+    Run one candidate over every sample from a source.
+    :param source: a source with labels and an end, such as a color_log.ReplaySource or color_sim.SimColorSource.
+    :returns dictionary with 'accuracy', 'us_per_sample', 'false_resets', 'passwords', 'samples'.
+    """
+    sampler = color_sampler.ColorSampler(source, max_age=0.0) # Every read gets the next sample.
+    candidate = candidate_class(sampler)
+    correct = 0
+    labeled = 0
+    elapsed = 0.0
+    count = 0
+    # The password classes print diagnostics, which would swamp the report and the timing.
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not source.done:
+            start = time.perf_counter()
+            color_id = candidate.step()
+            elapsed += time.perf_counter() - start
+            count += 1
+            if source.label != color_log.NO_LABEL:
+                labeled += 1
+                correct += color_id == source.label
+    return {'accuracy': correct / labeled if labeled else None,
+            'us_per_sample': elapsed / count * 1e6,
+            'false_resets': candidate.false_resets,
+            'passwords': candidate.passwords,
+            'samples': count}
+
+def report(paths, candidates=CANDIDATES):
+    """:returns a printable table of every candidate on every log."""
+    lines = []
+    for path in paths:
+        lines.append(path)
+        for candidate_class in candidates:
+            r = run(color_log.ReplaySource(path), candidate_class)
+            accuracy = '  n/a ' if r['accuracy'] is None else '{:6.1%}'.format(r['accuracy'])
+            resets = '' if r['false_resets'] is None else '  false resets {:3d}  passwords {:3d}'.format(r['false_resets'], r['passwords'])
+            lines.append('  {:16s} accuracy {}  {:6.1f} us/sample{}'.format(
+                candidate_class.name, accuracy, r['us_per_sample'], resets))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    print(report(sys.argv[1:]))
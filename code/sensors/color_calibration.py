@@ -0,0 +1,124 @@
+"""
+    Calibrating the color targets, so they match the venue's lighting and our actual targets.
+
+    Class ColorCalibrator records samples while the operator holds each target in front of the
+    sensor, then finds each target's center and acceptance radius, and saves them to
+    color_util.CALIBRATION_FILE.  color_util.default_classifier() loads that file at startup.
+
+    Samples are clustered with k-means, one cluster per target, starting from the median of each
+    target's samples.  Samples taken while a target was moving into or out of view end up in
+    another target's cluster, so they don't drag the center or inflate the radius.
+
+    In robot.py, test mode runs the calibration; see testPeriodic().
+"""
+
+import datetime
+import json
+import numpy as np
+import wpilib
+import color_sampler
+import color_util
+
+def kmeans(points, centers, iterations=20):
+    """
+    Cluster points with k-means, all points at once with NumPy.
+    :param points: array of shape (n, 3).
+    :param centers: array of shape (k, 3), the starting centers.
+    :param iterations: most passes to make; stops sooner if the centers stop moving.
+    :returns (centers, labels) - the final centers, and each point's cluster index.
+    """
+    centers = np.array(centers, dtype=float)
+    k = len(centers)
+    labels = np.zeros(len(points), dtype=int)
+    for _ in range(iterations):
+        # Squared distance from every point to every center, shape (n, k).
+        dist2 = ((points[:, None, :] - centers[None, :, :])**2).sum(axis=2)
+        labels = dist2.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, points[:, axis], minlength=k) for axis in range(3)], axis=1)
+        # An empty cluster keeps its old center.
+        new_centers = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+    return (centers, labels)
+
+###############################################
+
+class ColorCalibrator():
+    """Records samples for each target and computes calibrated targets from them."""
+
+    def __init__(self, sampler=None):
+        """:param sampler: ColorSampler to get samples from.  Defaults to the shared one."""
+        self.sampler = sampler if sampler is not None else color_sampler.get_sampler()
+        self.samples = {} # ColorID: list of (red, green, blue)
+        self.recording_id = None
+        self.sample_cursor = 0
+
+    def record(self, color_id):
+        """
+        Call every loop while the target with color_id is in front of the sensor.  Samples from
+        before the first call for a target (while it was being put in place) are skipped.
+        """
+        if color_id != self.recording_id:
+            self.recording_id = color_id
+            self.sample_cursor = self.sampler.get_cursor()
+        (samples, self.sample_cursor) = self.sampler.get_since(self.sample_cursor)
+        self.samples.setdefault(color_id, []).extend((s.red, s.green, s.blue) for s in samples)
+
+    def pause(self):
+        """Call when not recording, so the next record() starts fresh."""
+        self.recording_id = None
+
+    def sample_count(self, color_id):
+        """:returns the number of samples recorded for a target."""
+        return len(self.samples.get(color_id, ()))
+
+    def compute(self, quantile=0.95, margin=1.5):
+        """
+        Cluster the samples and find each recorded target's center and radius.
+        :param quantile: fraction of a target's samples that should be inside its radius, before the margin.
+        :param margin: the radius is this times the distance that includes quantile of the samples.
+        :returns {ColorID: (wpilib.Color, radius, sigma, number of samples in the cluster)}.
+                 sigma is the standard deviation of the samples in each of red, green, and blue.
+        """
+        ids = [color_id for color_id in sorted(self.samples) if self.samples[color_id]]
+        if not ids:
+            return {}
+        points = np.concatenate([np.array(self.samples[color_id]) for color_id in ids])
+        owner = np.concatenate([np.full(len(self.samples[color_id]), i) for (i, color_id) in enumerate(ids)])
+        start = np.array([np.median(np.array(self.samples[color_id]), axis=0) for color_id in ids])
+        (centers, labels) = kmeans(points, start)
+
+        result = {}
+        for (i, color_id) in enumerate(ids):
+            # Only this target's samples that landed in its own cluster count.
+            mine = points[(owner == i) & (labels == i)]
+            if len(mine) == 0:
+                continue
+            dist = np.sqrt(((mine - centers[i])**2).sum(axis=1))
+            radius = margin * float(np.quantile(dist, quantile))
+            sigma = float(np.sqrt((dist**2).mean() / 3)) # Spread per component, for confidences.
+            (red, green, blue) = centers[i]
+            result[color_id] = (wpilib.Color(red, green, blue), radius, sigma, len(mine))
+        return result
+
+    def save(self, path=color_util.CALIBRATION_FILE, **kwargs):
+        """
+        Compute the calibration and write it where color_util.load_calibration() looks for it.
+        Targets that weren't recorded are left out, so they keep their default values.  If nothing
+        was recorded, the file isn't written, so an earlier calibration stays.
+        :param kwargs: passed on to compute().
+        :returns the result of compute().
+        """
+        result = self.compute(**kwargs)
+        if not result:
+            return result
+        targets = {}
+        for (color_id, (color, radius, sigma, count)) in result.items():
+            targets[color_util.COLOR_NAMES[color_id]] = {
+                'red': color.red, 'green': color.green, 'blue': color.blue,
+                'radius': radius, 'sigma': sigma, 'samples': count}
+        with open(path, 'w') as f:
+            json.dump({'created': datetime.datetime.now().isoformat(timespec='seconds'), 'targets': targets}, f, indent=4)
+        return result
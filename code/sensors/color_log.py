@@ -0,0 +1,124 @@
+"""
+    Recording color sensor samples to a file, and playing them back.
+
+    Class ColorRecorder appends every sample from a ColorSampler to a compact binary log, along with
+    a label: the ColorID of the target that was in front of the sensor, if the operator said so.
+    Class ReplaySource is a sampler source that plays a log back, so classifiers can be tried on real
+    data without the robot (see color_benchmark.py).
+
+    File layout (all little endian):
+        Header, HEADER_SIZE bytes:
+            4s  magic, b'CLRS'
+            H   format version
+            H   record size in bytes
+        Records, one per sample:
+            d   FPGA timestamp in seconds
+            I   raw red
+            I   raw green
+            I   raw blue
+            I   IR
+            H   proximity
+            b   label: a ColorID, or NO_LABEL
+            x   padding
+"""
+
+import os
+import struct
+import time
+import wpilib
+import color_sampler
+
+MAGIC = b'CLRS'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+HEADER_SIZE = HEADER.size
+RECORD = struct.Struct('<dIIIIHbx')
+NO_LABEL = -2 # ColorID.OTHER (-1) is a real label: the background.
+
+###############################################
+
+class ColorRecorder():
+    """Appends samples from a ColorSampler to a file."""
+
+    def __init__(self, sampler=None, path=None):
+        """
+        :param sampler: ColorSampler to record.  Defaults to the shared one.
+        :param path: file to write.  Defaults to a new, time-stamped file in color_logs/
+                     under the robot program's operating directory (/home/lvuser on the roboRIO).
+        """
+        self.sampler = sampler if sampler is not None else color_sampler.get_sampler()
+        if path is None:
+            folder = os.path.join(wpilib.getOperatingDirectory(), 'color_logs')
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, time.strftime('colors_%Y%m%d_%H%M%S.clr'))
+        self.path = path
+        self.file = open(path, 'wb', buffering=16 * 1024)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.sample_cursor = self.sampler.get_cursor()
+
+    def record(self, label=NO_LABEL):
+        """
+        Call every loop.  Writes the samples taken since the last call.
+        :param label: ColorID of what is in front of the sensor, or NO_LABEL if unknown.
+        :returns the number of samples written.
+        """
+        (samples, self.sample_cursor) = self.sampler.get_since(self.sample_cursor)
+        for s in samples:
+            self.file.write(RECORD.pack(s.timestamp, s.raw_red, s.raw_green, s.raw_blue, s.ir, s.proximity, label))
+        return len(samples)
+
+    def flush(self):
+        """Push buffered samples to the file, for instance when the robot is disabled."""
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+###############################################
+
+def read_log(path):
+    """
+    Read a whole log.
+    :param path: file written by ColorRecorder.
+    :returns (samples, labels) - lists of ColorSamples and their labels.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    (magic, version, record_size) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError('{}: not a version {} color log'.format(path, VERSION))
+    end = HEADER_SIZE + (len(data) - HEADER_SIZE) // RECORD.size * RECORD.size # Ignore a partial last record.
+    samples = []
+    labels = []
+    for (timestamp, red, green, blue, ir, proximity, label) in RECORD.iter_unpack(data[HEADER_SIZE:end]):
+        samples.append(color_sampler.make_sample(timestamp, red, green, blue, ir, proximity))
+        labels.append(label)
+    return (samples, labels)
+
+class ReplaySource():
+    """
+    A sampler source that plays back a log, one sample per read(), with the recorded timestamps.
+    The samples are decoded when the source is created, so read() costs almost nothing.
+    After the last sample, read() keeps returning it and done becomes True.
+    """
+
+    def __init__(self, path):
+        (self.samples, self.labels) = read_log(path)
+        if not self.samples:
+            raise ValueError('{}: no samples'.format(path))
+        self.position = 0
+        self.label = NO_LABEL # Label of the sample read last.
+        self.done = False
+        # Typical time between samples, for ColorSampler's background thread.
+        intervals = sorted(b.timestamp - a.timestamp for (a, b) in zip(self.samples, self.samples[1:]))
+        self.period = intervals[len(intervals) // 2] if intervals else 0.025
+
+    def read(self):
+        """:returns the next ColorSample."""
+        i = self.position
+        if i + 1 >= len(self.samples):
+            self.done = True
+        else:
+            self.position += 1
+        self.label = self.labels[i]
+        return self.samples[i]
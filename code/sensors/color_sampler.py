@@ -0,0 +1,234 @@
+"""
+    A single owner for the REV color sensor, shared by everything that uses colors.
+
+    Each class in color_util.py used to create its own ColorSensorV3 and read it whenever it
+    wanted a color, so two of them meant two I2C transactions per loop on the same bus.
+    Now one ColorSampler owns the sensor.  Any number of users call get_latest(), and the sensor
+    is read at most once per robot loop; other callers in the same loop get the same sample.
+
+    Use get_sampler() to get the shared sampler rather than making your own.
+
+    Normally the sampler reads the sensor when asked, in the robot loop, so a slow I2C transaction
+    delays the loop.  After start(), a background thread reads the sensor at its measurement rate
+    instead, and get_latest() never touches the bus.  Every sample goes into a ring buffer, and
+    get_since() returns all the samples since a user's last call, so a color that is only seen
+    between two 20 ms loops isn't missed.
+
+    A sample has every channel the sensor measures: color, IR, and proximity.  They are all read
+    in one I2C transaction, so checking proximity (for instance, only classifying colors when
+    something is close) costs nothing extra.
+
+    Samples come from a "source", which is the only thing that talks to the hardware:
+    SensorSource reads a real ColorSensorV3, color_log.ReplaySource plays back a recording, and
+    color_sim.SimColorSource makes up samples for simulation and testing.
+"""
+
+import struct
+import threading
+import time
+from dataclasses import dataclass
+import wpilib
+from rev import ColorSensorV3
+
+@dataclass(frozen=True)
+class ColorSample:
+    """
+    One reading of the color sensor.  Frozen, so one sample can be handed to many users safely.
+    red, green, and blue are normalized to add up to 1, like wpilib.Color, so a sample can be
+    used anywhere a color is (ColorClassifier.classify(), for instance).
+    """
+    timestamp: float # FPGA time in seconds when the sample was read.
+    red: float
+    green: float
+    blue: float
+    raw_red: int = 0 # Sensor counts before normalizing.  Brightness depends on distance and lighting.
+    raw_green: int = 0
+    raw_blue: int = 0
+    ir: int = 0
+    proximity: int = 0 # 0 (nothing near) to 2047 (touching).  0 if the source doesn't read it.
+
+def make_sample(timestamp, raw_red, raw_green, raw_blue, ir, proximity=0):
+    """Create a ColorSample from raw counts, normalizing the color the same way ColorSensorV3.getColor() does."""
+    total = raw_red + raw_green + raw_blue
+    if total == 0:
+        return ColorSample(timestamp, 0.0, 0.0, 0.0, raw_red, raw_green, raw_blue, ir, proximity)
+    return ColorSample(timestamp, raw_red / total, raw_green / total, raw_blue / total,
+                       raw_red, raw_green, raw_blue, ir, proximity)
+
+###############################################
+
+class SensorSource():
+    """
+    Reads samples from a REV Robotics ColorSensorV3 (https://www.revrobotics.com/rev-31-1557/).
+
+    The ColorSensorV3 object configures the sensor, but its getters each make their own I2C transaction:
+    getRawColor() for color and IR, then getProximity() would be a second one.  The sensor's output
+    registers are consecutive, so read() gets all of them in one burst read instead.
+    """
+
+    ADDRESS = 0x52          # The sensor's I2C address.
+    FIRST_REGISTER = 0x08   # Proximity (2 bytes), then IR, green, blue, red (3 bytes each).
+    # Little endian: proximity, then each 3-byte value as a 2-byte low part and a 1-byte high part.
+    REGISTERS = struct.Struct('<HHBHBHBHB')
+
+    # Seconds per measurement for each rate setting.
+    PERIODS = {
+        ColorSensorV3.ColorMeasurementRate.k25ms: 0.025,
+        ColorSensorV3.ColorMeasurementRate.k50ms: 0.05,
+        ColorSensorV3.ColorMeasurementRate.k100ms: 0.1,
+        ColorSensorV3.ColorMeasurementRate.k200ms: 0.2,
+        ColorSensorV3.ColorMeasurementRate.k500ms: 0.5,
+        ColorSensorV3.ColorMeasurementRate.k1000ms: 1.0,
+        ColorSensorV3.ColorMeasurementRate.k2000ms: 2.0,
+    }
+
+    def __init__(self, port=wpilib.I2C.Port.kOnboard,
+                 resolution=ColorSensorV3.ColorResolution.k16bit,
+                 rate=ColorSensorV3.ColorMeasurementRate.k25ms):
+        """
+        :param port: I2C port the sensor is plugged into.
+        :param resolution: ADC resolution.  Conversions take longer at higher resolution; 16 bits is
+                           the highest that fits in 25 ms (see the APDS-9151 datasheet).
+        :param rate: how often the sensor makes a new measurement.  The sensor's default is 100 ms,
+                     which would give the same reading for five robot loops in a row.
+        """
+        self.sensor = ColorSensorV3(port)
+        self.sensor.configureColorSensor(resolution, rate)
+        self.period = SensorSource.PERIODS[rate] # Seconds between new measurements.
+        self.i2c = wpilib.I2C(port, SensorSource.ADDRESS)
+        self.data = bytearray(SensorSource.REGISTERS.size) # Reused for every read.
+
+    def read(self):
+        """Read every channel in one I2C transaction.
+        :returns a ColorSample, or None if the transaction failed."""
+        if self.i2c.read(SensorSource.FIRST_REGISTER, self.data):
+            return None # Aborted, for instance if the sensor is unplugged.
+        timestamp = wpilib.Timer.getFPGATimestamp()
+        (proximity, ir_low, ir_high, green_low, green_high, blue_low, blue_high, red_low, red_high) = \
+            SensorSource.REGISTERS.unpack(self.data)
+        # Proximity is 11 bits.  Colors are up to 20 bits, but are masked to 18 like ColorSensorV3 does.
+        return make_sample(timestamp,
+                           (red_low | red_high << 16) & 0x03FFFF,
+                           (green_low | green_high << 16) & 0x03FFFF,
+                           (blue_low | blue_high << 16) & 0x03FFFF,
+                           (ir_low | ir_high << 16) & 0x03FFFF,
+                           proximity & 0x07FF)
+
+###############################################
+
+class ColorSampler():
+    """Owns the color sensor source and hands the same samples to all of its users."""
+
+    def __init__(self, source=None, max_age=0.01, buffer_size=64):
+        """
+        :param source: where samples come from.  Defaults to a SensorSource on the onboard I2C port.
+                       A source has a read() method returning a ColorSample (or None if the read failed),
+                       and a period attribute, the seconds between new measurements.
+        :param max_age: seconds a sample is reused before reading again, when the background thread
+                        isn't running.  The default is half of the 20 ms robot loop, so there is one
+                        read per loop however many users there are.
+        :param buffer_size: number of recent samples kept for get_since().
+        """
+        self.source = source if source is not None else SensorSource()
+        self.max_age = max_age
+        self.latest = None
+        self.read_time = 0.0 # FPGA time of the last on-demand read.
+
+        # Ring buffer of recent samples.  count is the total number ever added, so
+        # sample number n is in buffer[n % buffer_size].
+        self.buffer = [None] * buffer_size
+        self.count = 0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """Start reading the sensor in a background thread, at the source's measurement rate."""
+        if self.thread is None:
+            self._add(self.source.read()) # So get_latest() has a sample right away.
+            self.running = True
+            # A daemon thread ends when the robot program does.
+            self.thread = threading.Thread(target=self._read_samples, name='Color sampler', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop the background thread.  get_latest() goes back to reading when asked."""
+        if self.thread is not None:
+            self.running = False
+            self.thread.join()
+            self.thread = None
+
+    def get_latest(self):
+        """
+        Get the newest sample.  Without the background thread, the sensor is read only if
+        the cached sample is older than max_age.
+        :returns a ColorSample, or None if no read has succeeded yet.
+        """
+        if self.thread is None:
+            # Compare with when it was read, not the sample's timestamp, which a replayed or
+            # simulated source may give from its own clock.
+            now = wpilib.Timer.getFPGATimestamp()
+            if self.latest is None or now - self.read_time >= self.max_age:
+                self.read_time = now
+                self._add(self.source.read())
+        return self.latest
+
+    def get_cursor(self):
+        """:returns a cursor for get_since() that skips the samples taken so far."""
+        return self.count
+
+    def get_since(self, cursor):
+        """
+        Get every sample added since the cursor.
+        :param cursor: from get_cursor() or the previous call.
+        :returns (samples, cursor) - a list of ColorSamples, oldest first, and the cursor for the next call.
+                 If more than buffer_size samples were added, only the newest buffer_size are returned.
+        """
+        if self.thread is None:
+            self.get_latest() # Read, if it is time to.
+        with self.lock:
+            count = self.count
+            size = len(self.buffer)
+            start = max(cursor, count - size)
+            samples = [self.buffer[n % size] for n in range(start, count)]
+        return (samples, count)
+
+    def _add(self, sample):
+        """Put a sample in the ring buffer.  A failed read (None) is skipped."""
+        if sample is None:
+            return
+        with self.lock:
+            self.buffer[self.count % len(self.buffer)] = sample
+            self.count += 1
+            self.latest = sample
+
+    def _read_samples(self):
+        """Body of the background thread: read once per measurement period until stopped."""
+        next_time = time.monotonic()
+        while self.running:
+            self._add(self.source.read())
+            next_time += self.source.period
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic() # Fell behind; don't try to catch up.
+
+###############################################
+# The shared sampler.
+###############################################
+
+_sampler = None
+
+def get_sampler():
+    """Returns the ColorSampler shared by all users of the color sensor, creating it the first time."""
+    global _sampler
+    if _sampler is None:
+        _sampler = ColorSampler()
+    return _sampler
+
+def set_sampler(sampler):
+    """Make sampler the shared one, for instance one with a simulated source.
+       Call it before anything calls get_sampler()."""
+    global _sampler
+    _sampler = sampler
@@ -0,0 +1,152 @@
+# !/usr/bin/env python3
+"""
+    A simulated color sensor, so the color code can run in simulation and be tested without the robot.
+
+    Class SimColorSource is a sampler source (see color_sampler.py) that follows a script: a list of
+    SimSteps, each showing one color for a while, optionally blending in from the previous color
+    the way a real sensor sees two colors at once while a target moves.  Noise is added to every
+    sample.  Each sample is labeled with the ColorID being shown (color_log.NO_LABEL while blending),
+    so color_benchmark.py can score classifiers on it.
+
+    By default the source runs on its own clock, one period per read(), so it runs as fast as the
+    code reading it: millions of samples take seconds.  With realtime=True it follows the robot's
+    clock instead, for robot.py in simulation.
+
+    From a command prompt, to stress test the classifiers with random passwords:
+        python color_sim.py [number of samples]
+"""
+
+import itertools
+import sys
+from dataclasses import dataclass
+import numpy as np
+import wpilib
+import color_benchmark
+import color_log
+import color_sampler
+import color_util
+
+@dataclass(frozen=True)
+class SimStep:
+    """One step of a SimColorSource script."""
+    color: wpilib.Color    # Color shown.  Usually one of color_util.TARGETS.
+    duration: float        # Seconds, including the blend.
+    blend: float = 0.0     # Seconds at the start of the step to blend from the previous step's color.
+    proximity: int = 1000  # Proximity reading, 0 (far) to 2047 (touching).
+
+###############################################
+
+class SimColorSource():
+    """A sampler source that plays a scripted sequence of colors, with noise and blends."""
+
+    NOISE_BLOCK = 4096 # Noise values are made in blocks, which is much faster than one at a time.
+
+    def __init__(self, script, noise=0.01, brightness=2000, period=0.025, repeat=False, realtime=False, seed=None):
+        """
+        :param script: list of SimSteps, or of tuples of SimStep's arguments.
+        :param noise: standard deviation of the noise on each raw channel, as a fraction of brightness.
+        :param brightness: total raw counts of red, green, and blue.
+        :param period: seconds between samples.
+        :param repeat: start the script over at the end.  Otherwise the last step goes on forever, and
+                       done becomes True.
+        :param realtime: follow the FPGA clock instead of advancing by period on each read().
+        :param seed: random seed, for repeatable noise.
+        """
+        self.steps = [step if isinstance(step, SimStep) else SimStep(*step) for step in script]
+        self.ends = list(itertools.accumulate(step.duration for step in self.steps)) # End time of each step.
+        self.step_labels = [color_util.get_color_id(step.color) for step in self.steps]
+        self.noise = noise
+        self.brightness = brightness
+        self.period = period
+        self.repeat = repeat
+        self.realtime = realtime
+        self.rng = np.random.default_rng(seed)
+        self.noise_block = np.empty((0, 3))
+        self.noise_position = 0
+
+        self.time = 0.0          # Script time, when not realtime.
+        self.start_time = None   # FPGA time of the first read, when realtime.
+        self.cycle_start = 0.0   # Script time that the present repeat started.
+        self.step = 0
+        self.label = color_log.NO_LABEL
+        self.done = False
+
+    def read(self):
+        """:returns the next ColorSample."""
+        if self.realtime:
+            timestamp = wpilib.Timer.getFPGATimestamp()
+            if self.start_time is None:
+                self.start_time = timestamp
+            t = timestamp - self.start_time
+        else:
+            timestamp = t = self.time
+            self.time += self.period
+
+        # Find the step.  Time only goes forward, so search from the present step.
+        local = t - self.cycle_start
+        if local >= self.ends[-1]:
+            if self.repeat:
+                self.cycle_start += self.ends[-1] * (local // self.ends[-1])
+                local = t - self.cycle_start
+                self.step = 0
+            else:
+                self.done = True
+                local = self.ends[-1]
+        while self.step < len(self.steps) - 1 and self.ends[self.step] <= local:
+            self.step += 1
+
+        step = self.steps[self.step]
+        color = (step.color.red, step.color.green, step.color.blue)
+        self.label = self.step_labels[self.step]
+        into = local - (self.ends[self.step] - step.duration)
+        if into < step.blend and (self.step > 0 or self.repeat):
+            previous = self.steps[self.step - 1].color
+            f = into / step.blend
+            color = (previous.red * (1 - f) + color[0] * f,
+                     previous.green * (1 - f) + color[1] * f,
+                     previous.blue * (1 - f) + color[2] * f)
+            self.label = color_log.NO_LABEL # A blend isn't really either color.
+
+        if self.noise_position >= len(self.noise_block):
+            self.noise_block = self.rng.normal(0.0, self.noise * self.brightness, (SimColorSource.NOISE_BLOCK, 3))
+            self.noise_position = 0
+        (n_red, n_green, n_blue) = self.noise_block[self.noise_position]
+        self.noise_position += 1
+        return color_sampler.make_sample(timestamp,
+                                         max(int(color[0] * self.brightness + n_red), 0),
+                                         max(int(color[1] * self.brightness + n_green), 0),
+                                         max(int(color[2] * self.brightness + n_blue), 0),
+                                         int(self.brightness * 0.2), step.proximity)
+
+###############################################
+
+def password_script(samples, period=0.025, seed=None):
+    """
+    A script for stress testing: the default password (blue, purple, yellow) shown over and over
+    on the lab bench, with random timing, blends, and wrong colors mixed in.
+    :param samples: about how many samples the script should last.
+    :returns list of SimSteps.
+    """
+    rng = np.random.default_rng(seed)
+    password = [color_util.BLUE_TARGET, color_util.PURPLE_TARGET, color_util.YELLOW_TARGET]
+    wrong = [color_util.PINK_TARGET]
+    script = []
+    total = 0.0
+    while total < samples * period:
+        colors = [color_util.BENCH_TARGET] + password
+        if rng.random() < 0.2:
+            colors.insert(rng.integers(1, len(colors)), wrong[0]) # This attempt should fail.
+        for color in colors:
+            duration = rng.uniform(0.15, 0.6)
+            script.append(SimStep(color, duration, blend=rng.uniform(0.0, 0.06)))
+            total += duration
+    return script
+
+if __name__ == '__main__':
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    script = password_script(samples, seed=1)
+    for candidate_class in color_benchmark.CANDIDATES:
+        source = SimColorSource(script, seed=2)
+        r = color_benchmark.run(source, candidate_class)
+        print('{:16s} {} samples  accuracy {:6.1%}  {:6.1f} us/sample  false resets {}  passwords {}'.format(
+            candidate_class.name, r['samples'], r['accuracy'], r['us_per_sample'], r['false_resets'], r['passwords']))
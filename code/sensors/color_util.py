@@ -3,15 +3,26 @@
     Class Color_Handler performs simple matching.
     Class Color_Password performs a password function that you activate by showing it colors.
     Class Color_Password2 builds on the above with an arbitrary length password defined at initialization.
+    Class Color_Codes recognizes any of several color codes, such as operator "gestures", at once.
+    Class ColorClassifier matches colors to the targets with a precomputed lookup table.
+    Class ColorSequenceMatcher finds registered sequences of colors in a stream of color IDs.
+    Class ColorFilter turns noisy per-sample matches into stable color changes.
 
-    Note that you should only instantiate a single one of these classes at a time to avoid
-    contentions talking to the physical color sensor.
+    The classes get their colors from the shared ColorSampler in color_sampler.py, so several of
+    them can be used at once without contention for the physical color sensor.
+
+    The targets below were measured on one lab bench.  If color_calibration.py has saved a
+    calibration (CALIBRATION_FILE), the shared classifier uses its targets and acceptance radii instead.
 """
 
 import enum
+import json
+import math
+import os
+from dataclasses import dataclass
+import numpy as np
 import wpilib
-from rev.color import ColorSensorV3
-from rev.color import ColorMatch
+import color_sampler
 
 # Define a set of target colors to match against by their normalized RGB values.
 # Note that by convention, names in ALL CAPS are meant to be constants.  In Python,
@@ -22,6 +33,38 @@ PINK_TARGET = wpilib.Color(0.427, 0.374, 0.199)
 YELLOW_TARGET = wpilib.Color(0.326, 0.583, 0.092)
 BENCH_TARGET = wpilib.Color(0.270, 0.495, 0.235) # Rod's lab bench tan anti-static mat.
 
+class ColorID(enum.IntEnum):
+    """
+    Integer IDs for the target colors, returned by ColorClassifier.  Because this is an IntEnum
+    rather than an Enum, the IDs can be used as indexes, as in TARGETS[ColorID.PINK].
+    """
+    OTHER = -1  # Not close enough to any target.
+    BLUE = 0
+    PURPLE = 1
+    PINK = 2
+    YELLOW = 3
+    BENCH = 4
+
+# All the targets, in ColorID order, and their names.
+TARGETS = (BLUE_TARGET, PURPLE_TARGET, PINK_TARGET, YELLOW_TARGET, BENCH_TARGET)
+COLOR_NAMES = ('blue', 'purple', 'pink', 'yellow', 'bench')
+
+# Where color_calibration.py saves measured targets.  The operating directory (/home/lvuser on
+# the roboRIO) isn't replaced when code is deployed, so a calibration lasts until the next one.
+CALIBRATION_FILE = os.path.join(wpilib.getOperatingDirectory(), 'color_targets.json')
+
+# Typical standard deviation of a reading from its target, for each of red, green, and blue,
+# used for confidence when there is no calibration.
+DEFAULT_SIGMA = 0.02
+# Smallest sigma used.  A cluster of identical samples calibrates to 0, which would divide by zero.
+MIN_SIGMA = 0.001
+
+@dataclass(frozen=True)
+class ColorEvent:
+    """A change to a new stable color, from ColorFilter."""
+    timestamp: float # When the new color started winning the vote, in seconds.
+    color_id: int    # ColorID of the new color.
+
 ###############################################
 # Some helper functions for the module.
 ###############################################
@@ -30,7 +73,12 @@ def is_equal_color(a, b):
     return ((a.red == b.red) and (a.green == b.green) and (a.blue == b.blue))
 
 def get_color_string(color):
-    """Returns a string describing one of our target colors, but not the lab bench."""
+    """
+    Returns a string describing one of our target colors, but not the lab bench.
+    :param color: a ColorID (preferred, no float comparisons), or one of the target wpilib.Colors.
+    """
+    if isinstance(color, int):
+        return 'other' if color in (ColorID.OTHER, ColorID.BENCH) else COLOR_NAMES[color]
     if is_equal_color(color, BLUE_TARGET):
         match_string = 'blue'
     elif is_equal_color(color, PURPLE_TARGET):
@@ -43,40 +91,411 @@ def get_color_string(color):
         match_string = 'other'
     return match_string
 
+def get_color_id(color):
+    """Returns the ColorID of one of the target wpilib.Colors, or ColorID.OTHER.  Meant for setting
+       things up, such as converting a password; use a ColorClassifier for sensor readings."""
+    for (color_id, target) in enumerate(TARGETS):
+        if is_equal_color(color, target):
+            return ColorID(color_id)
+    return ColorID.OTHER
+
+def load_calibration(path=CALIBRATION_FILE):
+    """
+    Read targets saved by color_calibration.py.
+    :param path: the calibration file.
+    :returns (targets, radii, sigmas) - a tuple of wpilib.Colors in ColorID order, a list of acceptance
+             radii, and a list of the spread (standard deviation) of each target's samples.
+             Targets missing from the file keep their values above, accept any distance, and have
+             the default spread.  If there is no file, returns (TARGETS, None, DEFAULT_SIGMA).
+    """
+    if not os.path.exists(path):
+        return (TARGETS, None, DEFAULT_SIGMA)
+    with open(path) as f:
+        calibration = json.load(f)['targets']
+    targets = list(TARGETS)
+    radii = [float('inf')] * len(TARGETS)
+    sigmas = [DEFAULT_SIGMA] * len(TARGETS)
+    for (color_id, name) in enumerate(COLOR_NAMES):
+        if name in calibration:
+            entry = calibration[name]
+            targets[color_id] = wpilib.Color(entry['red'], entry['green'], entry['blue'])
+            radii[color_id] = entry['radius']
+            sigmas[color_id] = entry.get('sigma', DEFAULT_SIGMA)
+    return (tuple(targets), radii, sigmas)
+
+_default_classifier = None
+
+def default_classifier():
+    """Returns the ColorClassifier shared by all the classes here, so the table is only built once.
+       It uses the saved calibration if there is one, otherwise TARGETS.  Pass its radius_list to
+       ColorFilter, so the filter uses the calibrated radii too."""
+    global _default_classifier
+    if _default_classifier is None:
+        (targets, radii, sigmas) = load_calibration()
+        if radii is not None:
+            print('Using color calibration from {}.'.format(CALIBRATION_FILE))
+        _default_classifier = ColorClassifier(targets, max_distance=radii, sigma=sigmas)
+    return _default_classifier
+
 ###############################################
 # Classes below here.
 ###############################################
 
+class ColorClassifier():
+    """
+    Finds the closest target to a color with a lookup table instead of comparing it to every target.
+
+    The normalized RGB cube (each of red, green, blue from 0 to 1) is divided into bins x bins x bins
+    cells.  When the classifier is created, the closest target to the center of each cell is stored
+    in a table.  Classifying a color is then just finding its cell and indexing the table, then
+    working out the exact distance to that one target.  (The distance from the cell's center could
+    be off by up to half a cell's diagonal, about 0.014 for 64 bins, which is more than a tight
+    calibrated radius, so it would reject colors right on the target.)
+
+    When more than the closest target is needed, match() and match_batch() compute the exact
+    distances to every target at once, giving the margin to the runner-up and a confidence.
+    """
+
+    def __init__(self, targets=TARGETS, max_distance=None, bins=64, sigma=DEFAULT_SIGMA):
+        """
+        :param targets: sequence of wpilib.Colors to match.  A color's ID is its index in the sequence.
+        :param max_distance: colors farther than this from the closest target are ColorID.OTHER.
+                             Either one distance, or a sequence with one per target.  None accepts everything.
+        :param bins: number of cells along each side of the RGB cube.  The tables have bins**3 entries.
+        :param sigma: standard deviation of readings around each target, per color component.  Either one
+                      value, or a sequence with one per target.  Only used for match() confidence.
+                      Values below MIN_SIGMA are raised to it.
+        """
+        self.target_colors = tuple(targets)
+        self.targets = np.array([(t.red, t.green, t.blue) for t in targets], dtype=np.float32)
+        self.radii = np.broadcast_to(np.asarray(np.inf if max_distance is None else max_distance, dtype=np.float32),
+                                     (len(self.targets),))
+        self.sigmas = np.broadcast_to(np.maximum(np.asarray(sigma, dtype=np.float32), MIN_SIGMA), (len(self.targets),))
+        self.bins = bins
+        self.last_bin = bins - 1
+
+        # Centers of the cells along one side, shaped to broadcast over the red, green, and blue axes.
+        centers = (np.arange(bins, dtype=np.float32) + 0.5) / bins
+        red = centers[:, None, None]
+        green = centers[None, :, None]
+        blue = centers[None, None, :]
+
+        # Find the closest target to each cell, one target at a time so memory stays small.
+        best_dist = np.full((bins, bins, bins), np.inf, dtype=np.float32)
+        best_id = np.zeros((bins, bins, bins), dtype=np.int8)
+        for (i, (r, g, b)) in enumerate(self.targets):
+            dist = np.sqrt((red - r)**2 + (green - g)**2 + (blue - b)**2)
+            closer = dist < best_dist
+            best_dist[closer] = dist[closer]
+            best_id[closer] = i
+
+        # Flat table, indexed by (red_bin * bins + green_bin) * bins + blue_bin.
+        self.ids = best_id.ravel()
+        # Plain Python numbers for classify_rgb(), which is faster with them than with NumPy scalars.
+        self.target_rgb = [tuple(float(c) for c in target) for target in self.targets]
+        self.radius_list = [float(radius) for radius in self.radii]
+
+    def classify(self, color, reject=True):
+        """
+        Find the closest target.
+        :param color: anything with red, green, and blue attributes from 0 to 1: a wpilib.Color, or a sensor sample.
+        :param reject: if False, always return the closest target's ID, for a ColorFilter to decide on.
+        :returns: (color_id, distance) - the target's index (ColorID.OTHER if rejected) and its distance from the color.
+        """
+        return self.classify_rgb(color.red, color.green, color.blue, reject)
+
+    def classify_rgb(self, red, green, blue, reject=True):
+        """Same as classify(), but with the color's components as separate arguments."""
+        bins = self.bins
+        last = self.last_bin
+        index = (min(int(red * bins), last) * bins + min(int(green * bins), last)) * bins + min(int(blue * bins), last)
+        color_id = int(self.ids[index])
+        (r, g, b) = self.target_rgb[color_id]
+        distance = math.sqrt((red - r)**2 + (green - g)**2 + (blue - b)**2)
+        if reject and distance > self.radius_list[color_id]:
+            return (ColorID.OTHER, distance)
+        return (color_id, distance)
+
+    def accept(self, color_id, distance):
+        """Returns color_id, or ColorID.OTHER if distance is beyond that target's radius."""
+        if color_id == ColorID.OTHER or distance > self.radius_list[color_id]:
+            return ColorID.OTHER
+        return color_id
+
+    def match(self, color):
+        """
+        Compare a color to every target.  Slower than classify(), but exact, and it says how sure it is.
+        :param color: anything with red, green, and blue attributes from 0 to 1.
+        :returns: (color_id, distance, margin, confidence) - the closest target's ID (ColorID.OTHER if rejected),
+                  its distance, how much farther the runner-up is (infinite with only one target), and the
+                  probability that the color really is the closest target.
+        """
+        (ids, distances, margins, confidences) = self.match_batch(((color.red, color.green, color.blue),))
+        return (int(ids[0]), float(distances[0]), float(margins[0]), float(confidences[0]))
+
+    def match_batch(self, colors):
+        """
+        Compare many colors to every target in one NumPy computation.
+        :param colors: array-like of shape (n, 3), the red, green, and blue of each color.
+        :returns: (ids, distances, margins, confidences) - arrays of length n, as in match().
+
+        The confidence assumes readings of each target are scattered around it with standard
+        deviation sigma in each component (a Gaussian), and that all targets are equally likely.
+        Then the chance that a reading came from target i is proportional to
+        sigma_i**-3 * exp(-distance_i**2 / (2 * sigma_i**2)).  With the sigmas from calibration, the
+        confidences match how often the closest target is right.
+        """
+        rgb = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+        rows = np.arange(len(rgb))
+        dist = np.sqrt(((rgb[:, None, :] - self.targets[None, :, :])**2).sum(axis=2)) # Shape (n, targets).
+
+        if len(self.targets) < 2:
+            # No runner-up, so nothing to be confused with.
+            best = np.zeros(len(rgb), dtype=np.intp)
+            best_dist = dist[:, 0]
+            margins = np.full(len(rgb), np.inf, dtype=np.float32)
+        else:
+            # The closest two targets of each row.  argpartition puts the smallest first.
+            closest = np.argpartition(dist, 1, axis=1)
+            best = closest[:, 0]
+            best_dist = dist[rows, best]
+            margins = dist[rows, closest[:, 1]] - best_dist
+
+        # Probabilities, done in logs and shifted by each row's largest so exp() can't underflow to all zeros.
+        log_likelihood = -0.5 * (dist / self.sigmas)**2 - 3 * np.log(self.sigmas)
+        log_likelihood -= log_likelihood.max(axis=1, keepdims=True)
+        likelihood = np.exp(log_likelihood)
+        confidences = likelihood[rows, best] / likelihood.sum(axis=1)
+
+        ids = best.astype(np.int8)
+        ids[best_dist > self.radii[best]] = ColorID.OTHER
+        return (ids, best_dist, margins, confidences)
+
+    def get_target(self, color_id):
+        """:returns the target wpilib.Color for a ColorID, or None for ColorID.OTHER."""
+        return None if color_id == ColorID.OTHER else self.target_colors[color_id]
+
+###############################################
+
+class ColorSequenceMatcher():
+    """
+    Recognizes any number of color sequences ("patterns") in a stream of color IDs, Aho-Corasick style.
+
+    Only changes of color matter: feeding the same color several times in a row is the same as
+    feeding it once, so a pattern can't have the same color twice in a row.  Any color that doesn't
+    continue a pattern, including ColorID.OTHER and the background, breaks it, as in Color_Password2.
+
+    All the patterns are combined into one state machine, built once by build().  Its states are
+    the prefixes of the patterns; the state after each color is the longest prefix that the recent
+    colors end with.  So when one pattern fails part way, the matcher is already in the right place
+    in any other pattern that overlaps it (with blue-purple-pink and purple-pink-yellow, the
+    colors blue, purple, pink, yellow find both), and each color takes one table lookup.
+    """
+
+    def __init__(self):
+        self.patterns = {}    # name: tuple of ColorIDs
+        self.transitions = None # transitions[state][symbol] is the next state.  None until built.
+        self.outputs = None   # outputs[state] is a tuple of the pattern names ending at that state.
+        self.state = 0
+        self.last_id = None
+
+    def add_pattern(self, name, colors):
+        """
+        Register a pattern.  The matcher is rebuilt on the next update().
+        :param name: what update() returns when the pattern is seen.
+        :param colors: sequence of ColorIDs, or of target wpilib.Colors.
+        """
+        ids = tuple(c if isinstance(c, int) else get_color_id(c) for c in colors)
+        if len(ids) == 0:
+            raise ValueError('Pattern {} is empty.'.format(name))
+        for (a, b) in zip(ids, ids[1:]):
+            if a == b:
+                raise ValueError('Pattern {} repeats a color; only color changes are matched.'.format(name))
+        self.patterns[name] = ids
+        self.transitions = None
+
+    def build(self):
+        """Combine the patterns into the state machine.  Called automatically when needed."""
+        symbols = len(TARGETS) + 1 # A symbol is a ColorID + 1, so OTHER is 0.
+
+        # A trie of the patterns: state 0 is the empty prefix.
+        goto = [{}]
+        outputs = [[]]
+        for (name, ids) in self.patterns.items():
+            state = 0
+            for color_id in ids:
+                symbol = color_id + 1
+                if symbol not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][symbol] = len(goto) - 1
+                state = goto[state][symbol]
+            outputs[state].append(name)
+
+        # Fill in the missing transitions breadth first, so each state's failure state (its longest
+        # proper suffix that is also a prefix) is finished before the state itself.
+        transitions = [[0] * symbols for _ in goto]
+        failure = [0] * len(goto)
+        queue = []
+        for symbol in range(symbols):
+            if symbol in goto[0]:
+                transitions[0][symbol] = goto[0][symbol]
+                queue.append(goto[0][symbol])
+        for state in queue: # queue grows as the loop runs.
+            outputs[state] = outputs[state] + outputs[failure[state]]
+            for symbol in range(symbols):
+                if symbol in goto[state]:
+                    child = goto[state][symbol]
+                    failure[child] = transitions[failure[state]][symbol]
+                    transitions[state][symbol] = child
+                    queue.append(child)
+                else:
+                    transitions[state][symbol] = transitions[failure[state]][symbol]
+
+        self.transitions = transitions
+        self.outputs = [tuple(names) for names in outputs]
+        self.reset()
+
+    def reset(self):
+        """Forget the colors seen so far."""
+        self.state = 0
+        self.last_id = None
+
+    def update(self, color_id):
+        """
+        Feed the next color.
+        :param color_id: ColorID of the color seen.
+        :returns tuple of the names of the patterns that this color completes, usually empty.
+        """
+        if color_id == self.last_id:
+            return ()
+        if self.transitions is None:
+            self.build()
+        self.last_id = color_id
+        self.state = self.transitions[self.state][color_id + 1]
+        return self.outputs[self.state]
+
+###############################################
+
+class ColorFilter():
+    """
+    Filters classified samples so that brief misreadings don't count as color changes.
+
+    When the sensor moves from one color to another, it sees a blend of the two for a few samples,
+    which can match a third color (Rod's blue and lab bench can read as purple).  Three things
+    keep such samples from becoming color changes:
+        * Hysteresis: a sample only votes for a new color if it is within enter_distance of it,
+          but votes to stay on the present color out to exit_distance.  Other samples vote for
+          ColorID.OTHER.  With calibrated radii, each target has its own distances instead.
+        * Majority vote: a color must have more than half of the votes in the last window samples.
+        * Dwell: the color must keep its majority for min_dwell seconds.
+    update() returns a ColorEvent when the stable color changes.
+    """
+
+    def __init__(self, window=5, min_dwell=0.05, enter_distance=0.08, exit_distance=0.12, radii=None, exit_scale=1.5):
+        """
+        :param window: number of recent samples that vote.  With 25 ms samples, 5 is 1/8 of a second.
+        :param min_dwell: seconds a new color must hold the majority before it is reported.
+        :param enter_distance: largest distance from a target to vote for changing to it.
+        :param exit_distance: largest distance from the present color's target to vote for staying.
+        :param radii: each target's calibrated radius, such as ColorClassifier.radius_list, or None.  A target
+                      with a finite radius uses it as its enter distance, and exit_scale times it as its exit
+                      distance, instead of enter_distance and exit_distance.
+        :param exit_scale: see radii.
+        """
+        self.votes = [None] * window # Ring buffer of the recent votes, as symbols (ColorID + 1).
+        self.next_vote = 0
+        self.counts = [0] * (len(TARGETS) + 1) # Number of votes in the window for each symbol.
+        self.min_dwell = min_dwell
+        self.enter_distances = [enter_distance] * len(TARGETS) # Indexed by ColorID.
+        self.exit_distances = [exit_distance] * len(TARGETS)
+        if radii is not None:
+            for (color_id, radius) in enumerate(radii):
+                if math.isfinite(radius):
+                    self.enter_distances[color_id] = radius
+                    self.exit_distances[color_id] = exit_scale * radius
+        self.stable_id = None        # ColorID of the stable color, None until there is one.
+        self.candidate = None        # Symbol with the majority, or None.
+        self.candidate_since = 0.0   # When the candidate got the majority.
+
+    def update(self, timestamp, color_id, distance):
+        """
+        Add one classified sample.
+        :param timestamp: time of the sample in seconds.
+        :param color_id: ColorID of the closest target, from ColorClassifier.classify() with reject=False,
+                         so the distances here decide what is close enough.  ColorID.OTHER votes for OTHER.
+        :param distance: distance to that target, from ColorClassifier.
+        :returns a ColorEvent if the stable color changed, otherwise None.
+        """
+        # Decide what the sample votes for.
+        if color_id == ColorID.OTHER:
+            vote = ColorID.OTHER + 1
+        elif color_id == self.stable_id and distance <= self.exit_distances[color_id]:
+            vote = color_id + 1
+        elif distance <= self.enter_distances[color_id]:
+            vote = color_id + 1
+        else:
+            vote = ColorID.OTHER + 1
+
+        # Replace the oldest vote.
+        old = self.votes[self.next_vote]
+        if old is not None:
+            self.counts[old] -= 1
+        self.votes[self.next_vote] = vote
+        self.counts[vote] += 1
+        self.next_vote = (self.next_vote + 1) % len(self.votes)
+
+        # Only the symbol just voted for can have gained a majority; the previous winner can only lose it.
+        window = len(self.votes)
+        if self.counts[vote] * 2 > window:
+            winner = vote
+        elif self.candidate is not None and self.counts[self.candidate] * 2 > window:
+            winner = self.candidate
+        else:
+            winner = None
+        if winner != self.candidate:
+            self.candidate = winner
+            self.candidate_since = timestamp
+
+        if self.candidate is not None and self.candidate - 1 != self.stable_id \
+                and timestamp - self.candidate_since >= self.min_dwell:
+            self.stable_id = self.candidate - 1
+            return ColorEvent(self.candidate_since, self.stable_id)
+        return None
+
+###############################################
+
 class Color_Handler():
     """A class that gets colors, matches them, and checks for patterns."""
 
-    def __init__(self):
-        """The __init__() method gets called when an object of a class is created."""
-
-        # REV Robotics color sensor creation and configuration, including a color matching object.
-        # Product is: https://www.revrobotics.com/rev-31-1557/.  This page has a link to the Java/C++ APIs.
-        # Presently (2020-05-04), the RobotPy documentation is limited.
-        self.colorSensor = ColorSensorV3(wpilib.I2C.Port.kOnboard)
-
-        # A ColorMatch object has methods to check for matching colors.
-        self.colormatcher = ColorMatch()
-        # Add our target values to colormatcher
-        self.colormatcher.addColorMatch(BLUE_TARGET)
-        self.colormatcher.addColorMatch(PURPLE_TARGET)
-        self.colormatcher.addColorMatch(PINK_TARGET)
-        self.colormatcher.addColorMatch(YELLOW_TARGET)
-        self.colormatcher.addColorMatch(BENCH_TARGET)
+    def __init__(self, sampler=None):
+        """
+        The __init__() method gets called when an object of a class is created.
+        :param sampler: ColorSampler to get colors from.  Defaults to the shared one.
+        """
+
+        # The REV Robotics color sensor is owned by a ColorSampler (see color_sampler.py), which reads it
+        # at most once per loop, however many objects use it.
+        self.sampler = sampler if sampler is not None else color_sampler.get_sampler()
+
+        # A ColorClassifier finds the closest target color with one table lookup.
+        self.classifier = default_classifier()
+        self.matched_id = ColorID.OTHER # ID of the latest match, for get_color_string().
+        self.confidence = 0.0 # Probability that the latest match is right, from 0 to 1.
 
     def get_and_match(self):
         """
         Take a color reading and match it to our list of targets.
         Return the detected color values and its closest match in a tuple.
+        After the call, self.confidence holds how likely the match is to be right.
         return value: (detected_color, closest_color)
         """
-        detected_color = self.colorSensor.getColor() # color is an object with three fields for the different colors
-        confidence = 0.0 # "confidence" is a dummy variable for Python.  The C function "matchClosestColor()"
-                         # modifies confidence to return a value for the current computation, but Python can't modify parameters like that.
-        matched_color = self.colormatcher.matchClosestColor(detected_color, confidence)
+        detected_color = self.sampler.get_latest() # A ColorSample, with the same red, green, and blue fields as a color
+        if detected_color is None:
+            return (None, None) # The sensor hasn't been read successfully yet.
+        # match() compares to every target, so it can also say how sure it is of the match.
+        (self.matched_id, distance, margin, self.confidence) = self.classifier.match(detected_color)
+        matched_color = self.classifier.get_target(self.matched_id) # The matched target as a color, or None if no target was close enough.
         return (detected_color, matched_color) # Note we are returning a tuple, with two values.
 
 ###############################################
@@ -103,22 +522,26 @@ class Color_Password():
         SECOND_COLOR = 2      # Second color detected.
         PASSWORD_COMPLETE = 3 # All three colors have been seen in order.
 
-    def __init__(self):
-        """The __init__() method gets called when an object of a class is created."""
-
-        # REV Robotics color sensor creation and configuration, including a color matching object.
-        # Product is: https://www.revrobotics.com/rev-31-1557/.  This page has a link to the Java/C++ APIs.
-        # Presently (2020-05-04), the RobotPy documentation is limited.
-        self.colorSensor = ColorSensorV3(wpilib.I2C.Port.kOnboard)
-
-        # A ColorMatch object has methods to check for matching colors.
-        self.colormatcher = ColorMatch()
-        # Add our target values to colormatcher
-        self.colormatcher.addColorMatch(BLUE_TARGET)
-        self.colormatcher.addColorMatch(PURPLE_TARGET)
-        self.colormatcher.addColorMatch(PINK_TARGET)
-        self.colormatcher.addColorMatch(YELLOW_TARGET)
-        self.colormatcher.addColorMatch(BENCH_TARGET)
+    def __init__(self, sampler=None, color_filter=None):
+        """
+        The __init__() method gets called when an object of a class is created.
+        :param sampler: ColorSampler to get colors from.  Defaults to the shared one.
+        :param color_filter: ColorFilter to use.  Defaults to one with the calibrated radii, if any.
+        """
+
+        # The REV Robotics color sensor is owned by a ColorSampler (see color_sampler.py), which reads it
+        # at most once per loop, however many objects use it.
+        self.sampler = sampler if sampler is not None else color_sampler.get_sampler()
+
+        # A ColorClassifier finds the closest target color with one table lookup.
+        self.classifier = default_classifier()
+        # Only stable color changes move the password along, so the blends seen between two colors don't reset it.
+        self.color_filter = color_filter if color_filter is not None else ColorFilter(radii=self.classifier.radius_list)
+        self.matched_id = ColorID.OTHER # ID of the latest match, for get_color_string().
+        self.detected_color = None # Latest sample and its match, returned when there are no new samples.
+        self.matched_color = None
+        # Start with the newest sample already taken, if there is one.
+        self.sample_cursor = max(self.sampler.get_cursor() - 1, 0)
 
         # A state variable to keep track of how much of the password has been entered.
         # The state could be represented many ways:
@@ -136,53 +559,75 @@ class Color_Password():
         a state machine that keeps track of how much of the password has been entered.  The password
         must be entered by switching directly between colors.  If the sensor detects a background
         color between the valid colors, it will reset to the initial "waiting" state.
-        This can be a problem because if there are two colors visible to the sensor, it might match
-        a third color.  (Rod's blue and lab bench can read as purple.)
+        When there are two colors visible to the sensor, it might match a third color (Rod's blue and
+        lab bench can read as purple), so samples go through a ColorFilter, and only the stable color
+        changes it reports move the state machine.
 
         :return: (password_complete, detected_color, matched_color) - a tuple with a boolean and a two color objects
                   password_complete: True if all 3 colors were seen in order.
                   detected_color: the actual RGB values seen by the sensor at the moment.
                   matched_color: the closest color matched.
         """
+        # Run every sample since the last call through the state machine, so that a color seen only
+        # briefly, between two calls, still counts.
+        (samples, self.sample_cursor) = self.sampler.get_since(self.sample_cursor)
+        password_complete = False
+        for detected_color in samples:
+            if self._update(detected_color):
+                password_complete = True
+        if not samples:
+            password_complete = self.pwd_state == self.PWDStates.PASSWORD_COMPLETE # Nothing new, so no change.
+        return (password_complete, self.detected_color, self.matched_color) # We are returning a tuple, with three values.
+
+    def _update(self, detected_color):
+        """
+        Advance the state machine with one sample.
+        :param detected_color: a ColorSample.
+        :return: True if the password is complete.
+        """
         password_complete = False # Initialize this temporary value.  Only change it if the password has been found.
-        detected_color = self.colorSensor.getColor() # color is an object with three fields for the different colors
-        confidence = 0.0 # "confidence" is a dummy variable for Python.  The C function "matchClosestColor()"
-                         # modifies confidence to return a value for the current computation, but Python can't modify parameters like that.
-        matched_color = self.colormatcher.matchClosestColor(detected_color, confidence)
+        (nearest_id, distance) = self.classifier.classify(detected_color, reject=False) # The filter decides what is close enough.
+        self.matched_id = self.classifier.accept(nearest_id, distance)
+        self.detected_color = detected_color
+        self.matched_color = self.classifier.get_target(self.matched_id) # The matched target as a color, or None if no target was close enough.
+        event = self.color_filter.update(detected_color.timestamp, nearest_id, distance)
+        if event is None:
+            return self.pwd_state == self.PWDStates.PASSWORD_COMPLETE # The stable color hasn't changed.
+        color_id = event.color_id
 
         # Do something different depending on what state the password detection process is in. The options are
         # generally: reset to WAITING, stay in same state, and progress to the next one.
         if self.pwd_state == self.PWDStates.WAITING:
             # From waiting, only the first color of the password matters.
-            if is_equal_color(matched_color, BLUE_TARGET):
+            if color_id == ColorID.BLUE:
                 self.pwd_state = self.PWDStates.FIRST_COLOR
                 print('Blue found.') # Print for diagnostics.
 
         elif self.pwd_state == self.PWDStates.FIRST_COLOR:
-            if is_equal_color(matched_color, PURPLE_TARGET):
+            if color_id == ColorID.PURPLE:
                 # Found the second color of the password.
                 self.pwd_state = self.PWDStates.SECOND_COLOR
                 print('Purple found.')  # Print for diagnostics.
-            elif not is_equal_color(matched_color, BLUE_TARGET):
+            elif not color_id == ColorID.BLUE:
                 # If the color were still blue, we would stay in the FIRST_COLOR state,
                 # but it isn't, so reset to waiting.
                 self.pwd_state = self.PWDStates.WAITING
                 print('Found was not blue or purple: {:5.3f}, {:5.3f}, {:5.3f}; resetting.'.format(detected_color.red, detected_color.green, detected_color.blue))  # Print for diagnostics.
 
         elif self.pwd_state == self.PWDStates.SECOND_COLOR:
-            if is_equal_color(matched_color, YELLOW_TARGET):
+            if color_id == ColorID.YELLOW:
                 # Found the third and final color of the password.
                 self.pwd_state = self.PWDStates.PASSWORD_COMPLETE
                 password_complete = True # Change the return value to signal password has been found.
                 print('Yellow found; password found.')  # Print for diagnostics.
-            elif not is_equal_color(matched_color, PURPLE_TARGET):
+            elif not color_id == ColorID.PURPLE:
                 # If the color were still yellow, we would stay in the SECOND_COLOR state,
                 # but it isn't, so reset to waiting.
                 self.pwd_state = self.PWDStates.WAITING
                 print('Found was not purple or yellow: {:5.3f}, {:5.3f}, {:5.3f}; resetting.'.format(detected_color.red, detected_color.green, detected_color.blue))  # Print for diagnostics.
 
         elif self.pwd_state == self.PWDStates.PASSWORD_COMPLETE:
-            if is_equal_color(matched_color, YELLOW_TARGET):
+            if color_id == ColorID.YELLOW:
                 # Still seeing yellow, password is still complete; signal that.
                 password_complete = True
             else:
@@ -195,7 +640,7 @@ class Color_Password():
             print('Color_Password.check(): invalid state:', self.pwd_state) # Print an error message (there are other ways to handle errors).
             self.pwd_state = self.PWDStates.WAITING  # Reset to the initial state.
 
-        return (password_complete, detected_color, matched_color) # We are returning a tuple, with three values.
+        return password_complete
 
 ###############################################
 
@@ -208,18 +653,22 @@ class Color_Password2():
     After initialization, call the check() method from robot.py's telop_periodic().
     """
 
-    def __init__(self, pwd=[BLUE_TARGET, PURPLE_TARGET, YELLOW_TARGET]):
+    def __init__(self, pwd=[BLUE_TARGET, PURPLE_TARGET, YELLOW_TARGET], sampler=None, color_filter=None):
         """
         Use an optional parameter to initialize the password list.  The default value,
         given above, is used if no parameter is supplied.
 
         :param pwd: list of wpilib.Color objects for the password. Must have at least 2 elements.
+        :param sampler: ColorSampler to get colors from.  Defaults to the shared one.
+        :param color_filter: ColorFilter to use.  Defaults to one with the calibrated radii, if any.
         """
         # Validate the supplied password.
         if len(pwd) == 0 or len(pwd) == 1:
             self.pwd_list = [BLUE_TARGET, PURPLE_TARGET, YELLOW_TARGET] # Use the default if the list is too short.
         else:
             self.pwd_list = pwd # Otherwise save the parameter into a member variable.
+        # Compare IDs rather than colors while checking; it is faster and avoids comparing floats.
+        self.pwd_ids = [get_color_id(color) for color in self.pwd_list]
 
         # A state variable to keep track of how much of the password has been entered.
         # Because the password is kept in a list, it is convenient to use an index into the list.
@@ -227,19 +676,19 @@ class Color_Password2():
         # the password has not been found.
         self.pwd_index = 0
 
-        # REV Robotics color sensor creation and configuration, including a color matching object.
-        # Product is: https://www.revrobotics.com/rev-31-1557/.  This page has a link to the Java/C++ APIs.
-        # Presently (2020-05-04), the RobotPy documentation is limited.
-        self.colorSensor = ColorSensorV3(wpilib.I2C.Port.kOnboard)
+        # The REV Robotics color sensor is owned by a ColorSampler (see color_sampler.py), which reads it
+        # at most once per loop, however many objects use it.
+        self.sampler = sampler if sampler is not None else color_sampler.get_sampler()
 
-        # A ColorMatch object has methods to check for matching colors.
-        self.colormatcher = ColorMatch()
-        # Add our target values to colormatcher
-        self.colormatcher.addColorMatch(BLUE_TARGET)
-        self.colormatcher.addColorMatch(PURPLE_TARGET)
-        self.colormatcher.addColorMatch(PINK_TARGET)
-        self.colormatcher.addColorMatch(YELLOW_TARGET)
-        self.colormatcher.addColorMatch(BENCH_TARGET)
+        # A ColorClassifier finds the closest target color with one table lookup.
+        self.classifier = default_classifier()
+        # Only stable color changes move the password along, so the blends seen between two colors don't reset it.
+        self.color_filter = color_filter if color_filter is not None else ColorFilter(radii=self.classifier.radius_list)
+        self.matched_id = ColorID.OTHER # ID of the latest match, for get_color_string().
+        self.detected_color = None # Latest sample and its match, returned when there are no new samples.
+        self.matched_color = None
+        # Start with the newest sample already taken, if there is one.
+        self.sample_cursor = max(self.sampler.get_cursor() - 1, 0)
 
     def check(self):
         """
@@ -247,31 +696,53 @@ class Color_Password2():
         a state machine that keeps track of how much of the password has been entered.  The password
         must be entered by switching directly between colors.  If the sensor detects a background
         color between the valid colors, it will reset to the initial "waiting" state.
-        This can be a problem because if there are two colors visible to the sensor, it might match
-        a third color.  (Rod's blue and lab bench can read as purple.)
+        When there are two colors visible to the sensor, it might match a third color (Rod's blue and
+        lab bench can read as purple), so samples go through a ColorFilter, and only the stable color
+        changes it reports move the state machine.
 
         :return: (password_complete, detected_color, matched_color) - a tuple with a boolean and a two color objects
                   password_complete: True if all 3 colors were seen in order.
                   detected_color: the actual RGB values seen by the sensor at the moment.
                   matched_color: the closest color matched.
         """
+        # Run every sample since the last call through the state machine, so that a color seen only
+        # briefly, between two calls, still counts.
+        (samples, self.sample_cursor) = self.sampler.get_since(self.sample_cursor)
+        password_complete = False
+        for detected_color in samples:
+            if self._update(detected_color):
+                password_complete = True
+        if not samples:
+            password_complete = self.pwd_index == len(self.pwd_list) # Nothing new, so no change.
+        return (password_complete, self.detected_color, self.matched_color) # We are returning a tuple, with three values.
+
+    def _update(self, detected_color):
+        """
+        Advance the state machine with one sample.
+        :param detected_color: a ColorSample.
+        :return: True if the password is complete.
+        """
         password_complete = False # Initialize this temporary value.  Only change it if the password has been found.
-        detected_color = self.colorSensor.getColor() # color is an object with three fields for the different colors
-        confidence = 0.0 # "confidence" is a dummy variable for Python.  The C function "matchClosestColor()"
-                         # modifies confidence to return a value for the current computation, but Python can't modify parameters like that.
-        matched_color = self.colormatcher.matchClosestColor(detected_color, confidence)
+        (nearest_id, distance) = self.classifier.classify(detected_color, reject=False) # The filter decides what is close enough.
+        self.matched_id = self.classifier.accept(nearest_id, distance)
+        self.detected_color = detected_color
+        self.matched_color = self.classifier.get_target(self.matched_id) # The matched target as a color, or None if no target was close enough.
+        event = self.color_filter.update(detected_color.timestamp, nearest_id, distance)
+        if event is None:
+            return self.pwd_index == len(self.pwd_list) # The stable color hasn't changed.
+        color_id = event.color_id
 
         # Do something different depending on what state the password detection process is in. The options are
         # generally: reset to WAITING, stay in same state, and progress to the next one.
         if self.pwd_index == 0:
             # Handle the initial state differently than the rest.
-            if is_equal_color(matched_color, self.pwd_list[self.pwd_index]):
+            if color_id == self.pwd_ids[self.pwd_index]:
                 print('Color {} found.'.format(self.pwd_index))
                 self.pwd_index += 1 # Increment index so that next time we will check for the next color.
 
         elif self.pwd_index == len(self.pwd_list):
             # Also handle the "found" case differently, because we cannot index beyond the end of the list.
-            if is_equal_color(matched_color, self.pwd_list[self.pwd_index-1]):
+            if color_id == self.pwd_ids[self.pwd_index-1]:
                 password_complete = True
             else:
                 self.pwd_index = 0 # A new color that isn't the end has been observed; reset the password checker.
@@ -285,17 +756,64 @@ class Color_Password2():
 
         else:
             # Handle the rest of the cases, somewhere in the middle of the password.
-            if is_equal_color(matched_color, self.pwd_list[self.pwd_index]):
+            if color_id == self.pwd_ids[self.pwd_index]:
                 print('Color {} found.'.format(self.pwd_index))
                 self.pwd_index += 1 # Increment index so that next time we will check for the next color.
                 if self.pwd_index == len(self.pwd_list):
                     password_complete = True # Signal we found the last one.
                     print('Password found.')
-            elif not is_equal_color(matched_color, self.pwd_list[self.pwd_index-1]):
+            elif not color_id == self.pwd_ids[self.pwd_index-1]:
                 # We compare to the value for index-1, meaning the color previously found (no change)
                 # The reason we treat the index==0 case differently is because we don't want
                 # to use -1 as an index.
                 print('Found an invalid color {:5.3f}, {:5.3f}, {:5.3f}; resetting.'.format(detected_color.red, detected_color.green, detected_color.blue))
                 self.pwd_index = 0
 
-        return (password_complete, detected_color, matched_color) # We are returning a tuple, with three values.
+        return password_complete
+
+###############################################
+
+class Color_Codes():
+    """
+    Recognizes several color codes at once, for instance a different "gesture" for each thing the
+    operator might want to do.  Unlike Color_Password2, one object handles any number of codes.
+    Like the passwords, the colors must be shown one after another with no other color between.
+    Samples go through a ColorFilter first, so the blends seen while changing colors don't break a code.
+    Optionally, samples count as no color unless something is close to the sensor.
+
+    After initialization, call the check() method from robot.py's teleop_periodic().
+    """
+
+    def __init__(self, codes, sampler=None, color_filter=None, min_proximity=0):
+        """
+        :param codes: dictionary of {name: list of target wpilib.Colors or ColorIDs}.
+        :param sampler: ColorSampler to get colors from.  Defaults to the shared one.
+        :param color_filter: ColorFilter to use.  Defaults to one with the calibrated radii, if any.
+        :param min_proximity: samples with a lower proximity reading (0 to 2047) are ColorID.OTHER.
+                              Proximity comes with every sample, so this doesn't add an I2C read.
+        """
+        self.min_proximity = min_proximity
+        self.sampler = sampler if sampler is not None else color_sampler.get_sampler()
+        self.classifier = default_classifier()
+        self.color_filter = color_filter if color_filter is not None else ColorFilter(radii=self.classifier.radius_list)
+        self.matcher = ColorSequenceMatcher()
+        for (name, colors) in codes.items():
+            self.matcher.add_pattern(name, colors)
+        self.sample_cursor = max(self.sampler.get_cursor() - 1, 0)
+
+    def check(self):
+        """
+        Check every sample since the last call.
+        :return: list of the names of the codes completed since the last call, usually empty.
+        """
+        (samples, self.sample_cursor) = self.sampler.get_since(self.sample_cursor)
+        found = []
+        for sample in samples:
+            if sample.proximity < self.min_proximity:
+                (color_id, distance) = (ColorID.OTHER, 0.0) # Nothing close enough to trust the color.
+            else:
+                (color_id, distance) = self.classifier.classify(sample, reject=False)
+            event = self.color_filter.update(sample.timestamp, color_id, distance)
+            if event is not None:
+                found.extend(self.matcher.update(event.color_id))
+        return found
@@ -0,0 +1,177 @@
+"""
+The ADXRS450 gyro, without the wait at startup.
+
+wpilib.ADXRS450_Gyro() calibrates when it is made: it measures the gyro's
+bias (what it reads when still) for 5 seconds, and robot code can't do
+anything else meanwhile.  Each time robot code restarts, that's 5 more
+seconds, and the robot has to be kept still the whole time.
+
+Class Gyro reads the same sensor the same way (with the roboRIO's SPI
+accumulator), but calibrates in the background, a little at a time from
+update(), which should be called every loop:
+
+* The bias from the last good calibration is saved in wpilib.Preferences,
+  which the roboRIO keeps across reboots.  If there is one, the gyro is
+  ready at once.  While the robot is still disabled after boot, it then
+  measures again, and keeps the new bias if it is close to the old one
+  (if not, the robot was probably moved).  The heading carries on across
+  the change.
+* With no saved bias, is_ready() is False until the first calibration is
+  done.  Until then, getAngle() reads 0, and the drive holds off on
+  field-relative driving, which needs a good heading.
+* A bias is only measured while the robot is disabled, since an enabled
+  robot may be moving.  Enabling stops a calibration; if the gyro wasn't
+  ready yet, it starts over the next time the robot is disabled.
+
+In simulation, it wraps wpilib.ADXRS450_Gyro, which doesn't calibrate in
+simulation, and is ready at once.  Use its "device" with
+wpilib.simulation.ADXRS450_GyroSim.
+
+Like ADXRS450_Gyro, angles are + clockwise, except for getRotation2d().
+"""
+
+# Import standard Python modules.
+import threading
+
+# Import WPILib and other robotics modules.
+import wpilib
+import wpimath.geometry
+
+BIAS_KEY = 'Gyro/bias'
+CALIBRATION_TIME = 5.0      # Seconds to measure the bias for.
+MAX_BIAS_CHANGE = 0.5       # Most a new bias may differ from the saved one, in degrees/second.
+
+# From the ADXRS450 data sheet and WPILib's ADXRS450_Gyro.
+SAMPLE_PERIOD = 0.0005      # Seconds between accumulator samples.
+DEGREES_PER_SECOND_PER_LSB = 0.0125
+
+class Gyro():
+    def __init__(self, port: wpilib.SPI.Port = wpilib.SPI.Port.kOnboardCS0) -> None:
+        """:param: port SPI port the gyro is plugged into."""
+        self.device = None # The ADXRS450_Gyro, in simulation only.
+        self.spi = None
+        self.ready = False
+        self.calibration_start = None # FPGA time the present calibration started, or None.
+        self.calibration_pending = False # Start a calibration when next disabled.
+        self.angle_offset = 0.0 # Degrees added to the accumulator's angle, to keep the heading across calibrations.
+        # getAngle() may be called from another thread, such as the drive's
+        # odometry Notifier.  The lock keeps it from seeing the accumulator
+        # and angle_offset halfway through a change.
+        self.lock = threading.Lock()
+
+        if wpilib.RobotBase.isSimulation():
+            self.device = wpilib.ADXRS450_Gyro(port)
+            self.ready = True
+            return
+
+        # Set up the SPI port and accumulator the way ADXRS450_Gyro does.
+        self.spi = wpilib.SPI(port)
+        self.spi.setClockRate(3000000)
+        self.spi.setMode(wpilib.SPI.Mode.kMode0)
+        self.spi.setChipSelectActiveLow()
+        self.spi.initAccumulator(SAMPLE_PERIOD, 0x20000000, 4, 0x0C00000E, 0x04000000, 10, 16, True, True)
+
+        # The bias is in the gyro's units (LSB), like the accumulator's center.
+        self.bias = wpilib.Preferences.getDouble(BIAS_KEY, float('nan'))
+        if self.bias == self.bias: # Not NaN, so there is a saved bias.
+            self.spi.setAccumulatorIntegratedCenter(self.bias)
+            self.ready = True
+        else:
+            self.bias = 0.0
+            self.spi.setAccumulatorIntegratedCenter(0.0)
+        self._start_calibration()
+
+    def update(self):
+        """Call every loop.  Does the background calibration."""
+        if self.spi is None:
+            return
+        if wpilib.DriverStation.isEnabled():
+            # The robot may be moving, which would spoil the bias.  Keep the
+            # angle measured so far, with the old bias if there is one.
+            if self.calibration_start is not None:
+                self.calibration_start = None
+                self.calibration_pending = not self.ready
+            return
+        if self.calibration_pending:
+            self.calibration_pending = False
+            self._start_calibration()
+        if self.calibration_start is None:
+            return
+        if wpilib.Timer.getFPGATimestamp() - self.calibration_start < CALIBRATION_TIME:
+            return
+
+        # The average is per accumulator sample, measured from the present
+        # center (the old bias).
+        change = self.spi.getAccumulatorIntegratedAverage()
+        rate_change = change / SAMPLE_PERIOD * DEGREES_PER_SECOND_PER_LSB
+        self.calibration_start = None
+        if self.ready and abs(rate_change) > MAX_BIAS_CHANGE:
+            print('Gyro calibration off by {:.2f} degrees/second; the robot probably moved.  Keeping the old one.'.format(
+                rate_change))
+            return
+        with self.lock:
+            # Re-centering needs an accumulator reset, so carry the angle over.
+            self.angle_offset = self._angle()
+            self.bias += change
+            self.spi.setAccumulatorIntegratedCenter(self.bias)
+            self.spi.resetAccumulator()
+            self.ready = True
+        wpilib.Preferences.setDouble(BIAS_KEY, self.bias)
+
+    def calibrate(self):
+        """
+        Measure the bias again, in the background.  The robot must be still
+        for CALIBRATION_TIME seconds.  The angle is reset to 0.
+        """
+        if self.spi is not None:
+            self._start_calibration()
+
+    def _start_calibration(self):
+        with self.lock:
+            self.spi.resetAccumulator()
+            self.angle_offset = 0.0
+        self.calibration_start = wpilib.Timer.getFPGATimestamp()
+
+    def is_ready(self) -> bool:
+        """:returns: True once the gyro has a bias, so its angle can be trusted."""
+        return self.ready
+
+    def is_calibrating(self) -> bool:
+        """:returns: True while a calibration is going on.  The robot should be kept still."""
+        return self.calibration_start is not None
+
+    def getAngle(self) -> float:
+        """:returns: degrees turned since the last reset, + clockwise.  0 until ready."""
+        if self.device is not None:
+            return self.device.getAngle()
+        with self.lock:
+            return self._angle()
+
+    def _angle(self) -> float:
+        """getAngle() for the real gyro.  Call with the lock held."""
+        if not self.ready:
+            return 0.0
+        return self.angle_offset + self.spi.getAccumulatorIntegratedValue() * DEGREES_PER_SECOND_PER_LSB
+
+    def getRate(self) -> float:
+        """:returns: degrees/second, + clockwise."""
+        if self.device is not None:
+            return self.device.getRate()
+        return self.spi.getAccumulatorLastValue() * DEGREES_PER_SECOND_PER_LSB
+
+    def getRotation2d(self) -> wpimath.geometry.Rotation2d:
+        """:returns: the heading as a Rotation2d, + counterclockwise, as WPILib expects."""
+        return wpimath.geometry.Rotation2d.fromDegrees(-self.getAngle())
+
+    def reset(self):
+        """Make the present heading 0."""
+        if self.device is not None:
+            self.device.reset()
+            return
+        with self.lock:
+            if self.calibration_start is None:
+                self.spi.resetAccumulator()
+                self.angle_offset = 0.0
+            else:
+                # Resetting the accumulator would spoil the calibration.
+                self.angle_offset = -self.spi.getAccumulatorIntegratedValue() * DEGREES_PER_SECOND_PER_LSB
@@ -4,7 +4,12 @@
 """
 
 import wpilib
+import color_calibration
+import color_log
+import color_sampler
+import color_sim
 import color_util # Imports definitions in the file color_util.py that we created (same folder).
+import gyro
 
 class MAKORobot(wpilib.TimedRobot):
     def robotInit(self):
@@ -12,18 +17,34 @@ class MAKORobot(wpilib.TimedRobot):
            In it, we should initialize the robot's shared variables and objects.
         """
         self.print_timer = wpilib.Timer() # A timer to help us print info periodically; still need to start it.
+        if wpilib.RobotBase.isSimulation():
+            # No sensor; show the default password on the lab bench over and over instead.
+            script = [(color_util.BENCH_TARGET, 2.0), (color_util.BLUE_TARGET, 1.0, 0.05),
+                      (color_util.PURPLE_TARGET, 1.0, 0.05), (color_util.YELLOW_TARGET, 2.0, 0.05)]
+            color_sampler.set_sampler(color_sampler.ColorSampler(color_sim.SimColorSource(script, repeat=True, realtime=True)))
+        # Read the color sensor in the background, so I2C transactions don't hold up the robot loop.
+        color_sampler.get_sampler().start()
         self.color_pwd = color_util.Color_Password2() # A class that looks for a password based on colors.
+        self.calibrator = None # Created in test mode, which calibrates the color targets.
+        self.recorder = None   # Test mode also records the samples, labeled, for color_benchmark.py.
 
         # Gyro measures rate of rotation, and plugs into the "SPI" port on the roboRIO
         # https://wiki.analog.com/first/adxrs450_gyro_board_frc
         # Positive rotation is clockwise.
-        self.gyro = wpilib.ADXRS450_Gyro() # Calibration happens during initialization, so keep the robot still when powering on.
+        # wpilib.ADXRS450_Gyro() calibrates during initialization, holding up startup for 5 seconds.  gyro.Gyro calibrates
+        # in the background instead, or reuses the last good calibration (see gyro.py).  Keep the robot still until DB/LED 1 lights.
+        self.gyro = gyro.Gyro()
         # It is best to let the robot warm up so that the sensor reaches a steady temperature before calibrating it.  This may not
         # always be possible in a match situation.  For reference, Rod measured the amount of drift during a 2:30 match by just letting
         # the robot sit still.  I rebooted robot code between measurements, so that recalibration and zeroing would happen.
         # First turned on, and then repeated 2.5-minute tests: 9.9, 1.8, 3.0, 16.8 (!), 1.6, 8.0 degrees.
         # Similar test, after the robot had been on 1/2 hour:  2.4, 1.9, -2.0, 0.3, 0.3, 0.7 degrees.
 
+    def robotPeriodic(self):
+        """This function is called periodically in every mode, after the mode's periodic function."""
+        self.gyro.update() # Calibrates the gyro in the background.
+        wpilib.SmartDashboard.putBoolean('DB/LED 1', self.gyro.is_ready() and not self.gyro.is_calibrating())
+
     def disabledInit(self):
         """This function gets called once when the robot is disabled.
            In the past, we have not used this function, but it could occasionally
@@ -33,6 +54,19 @@ class MAKORobot(wpilib.TimedRobot):
         wpilib.SmartDashboard.putNumber('DB/Slider 0', 0)
         wpilib.SmartDashboard.putBoolean('DB/LED 0', False)
 
+        # Coming out of test mode, save the color calibration, if anything was recorded.
+        if self.calibrator is not None:
+            result = self.calibrator.save()
+            for (color_id, (color, radius, sigma, count)) in result.items():
+                print('{}: {:5.3f}, {:5.3f}, {:5.3f} radius {:5.3f} ({} samples)'.format(
+                    color_util.COLOR_NAMES[color_id], color.red, color.green, color.blue, radius, count))
+            if result:
+                print('Saved color calibration to {}; restart robot code to use it.'.format(color_util.CALIBRATION_FILE))
+            self.calibrator = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
     def disabledPeriodic(self):
         """Another function we have not used in the past.  Adding for completeness."""
         pass
@@ -46,6 +80,30 @@ class MAKORobot(wpilib.TimedRobot):
         """This function is called periodically during autonomous."""
         pass
 
+    def testInit(self):
+        """
+        Test mode calibrates the color targets.  On the driver station dashboard's Basic tab, set
+        DB/Slider 1 to a target's ColorID (0 blue, 1 purple, 2 pink, 3 yellow, 4 bench), hold the target
+        in front of the sensor, and hold down DB/Button 0 for a few seconds.  Repeat for each target,
+        then disable the robot to save the calibration.
+        The samples are also recorded to a log, labeled with the target while the button is held.
+        """
+        self.calibrator = color_calibration.ColorCalibrator()
+        self.recorder = color_log.ColorRecorder()
+
+    def testPeriodic(self):
+        """This function is called periodically during test mode."""
+        color_id = int(round(wpilib.SmartDashboard.getNumber('DB/Slider 1', 0.0)))
+        color_id = min(max(color_id, 0), len(color_util.TARGETS) - 1)
+        if wpilib.SmartDashboard.getBoolean('DB/Button 0', False):
+            self.calibrator.record(color_id)
+            self.recorder.record(color_id)
+        else:
+            self.calibrator.pause()
+            self.recorder.record(color_log.NO_LABEL)
+        wpilib.SmartDashboard.putString('DB/String 0', 'calibrate {}: {} samples'.format(
+            color_util.COLOR_NAMES[color_id], self.calibrator.sample_count(color_id)))
+
     def teleopInit(self):
         """This function is run once each time the robot enters teleop mode."""
         self.print_timer.start() # Now it starts counting.
@@ -54,11 +112,11 @@ class MAKORobot(wpilib.TimedRobot):
         """This function is called periodically during teleop."""
         (password, detected, closest_match) = self.color_pwd.check() # Note that this method returns two colors:
                                                                        # The detected one and its closest match.
-        match_descr = color_util.get_color_string(closest_match) # Turn into a string.
+        match_descr = color_util.get_color_string(self.color_pwd.matched_id) # Turn the match's ID into a string.
 
-        # The timer's hasPeriodPassed() method returns true if the time has passed, and updates
-        # the timer's internal "start time".  This period is 1.0 seconds.
-        if self.print_timer.hasPeriodPassed(1.0):
+        # The timer's advanceIfElapsed() method returns true if the time has passed, and updates
+        # the timer's internal "start time".  This period is 1.0 seconds.  (It used to be called hasPeriodPassed().)
+        if self.print_timer.advanceIfElapsed(1.0) and detected is not None:
             # Send a string representing the red component to a field called 'DB/String 0' on the SmartDashboard.
             # The default driver station dashboard's "Basic" tab has some pre-defined keys/fields
             # that it looks for, which is why I chose these.
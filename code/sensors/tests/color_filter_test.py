@@ -0,0 +1,48 @@
+'''
+    Tests of ColorFilter's hysteresis with calibrated radii.
+'''
+
+import color_util
+from color_util import ColorClassifier, ColorFilter, ColorID, PINK_TARGET, TARGETS
+from color_sampler import ColorSample, ColorSampler
+
+RADIUS = 0.06 # Calibrated radius of every target.
+PERIOD = 0.025
+
+def sample(timestamp, red_offset=0.0):
+    # Off from pink in red only, which moves away from the other targets.
+    return ColorSample(timestamp, PINK_TARGET.red + red_offset, PINK_TARGET.green, PINK_TARGET.blue)
+
+def feed(classifier, color_filter, start, count, red_offset=0.0):
+    events = []
+    for i in range(count):
+        (color_id, distance) = classifier.classify(sample(start + i * PERIOD, red_offset), reject=False)
+        event = color_filter.update(start + i * PERIOD, color_id, distance)
+        if event is not None:
+            events.append(event.color_id)
+    return events
+
+def test_calibrated_exit():
+    classifier = ColorClassifier(TARGETS, max_distance=RADIUS)
+    color_filter = ColorFilter(radii=classifier.radius_list)
+    assert feed(classifier, color_filter, 0.0, 10) == [ColorID.PINK]
+    # Past the radius, but inside exit_scale times it: stays pink.
+    assert feed(classifier, color_filter, 1.0, 10, red_offset=0.07) == []
+    assert color_filter.stable_id == ColorID.PINK
+    # Past that, it's no color.
+    assert feed(classifier, color_filter, 2.0, 10, red_offset=0.1) == [ColorID.OTHER]
+
+def test_calibrated_enter():
+    classifier = ColorClassifier(TARGETS, max_distance=RADIUS)
+    color_filter = ColorFilter(radii=classifier.radius_list)
+    # Inside the default enter_distance, but not the calibrated radius.
+    assert feed(classifier, color_filter, 0.0, 10, red_offset=0.07) == [ColorID.OTHER]
+    assert feed(classifier, color_filter, 1.0, 10, red_offset=0.05) == [ColorID.PINK]
+
+def test_default_filters_use_calibration(monkeypatch):
+    monkeypatch.setattr(color_util, '_default_classifier', ColorClassifier(TARGETS, max_distance=RADIUS))
+    radii = color_util.default_classifier().radius_list
+    sampler = ColorSampler(source=object())
+    for user in (color_util.Color_Password(sampler), color_util.Color_Password2(sampler=sampler),
+                 color_util.Color_Codes({'pink': [PINK_TARGET]}, sampler)):
+        assert user.color_filter.enter_distances == radii